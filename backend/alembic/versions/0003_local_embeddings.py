@@ -0,0 +1,23 @@
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+revision: str = "0003_local_embeddings"
+down_revision: Union[str, None] = "0002_ingest_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Filled by `python -m app.embedding_backfill` with EMBEDDING_PROVIDER=local.
+    op.add_column(
+        "chapter_chunks",
+        sa.Column("embedding_local", Vector(384), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("chapter_chunks", "embedding_local")
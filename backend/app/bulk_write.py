@@ -0,0 +1,101 @@
+"""
+Bulk write path for chapter chunks.
+
+`copy_chunks` streams chunk rows into `chapter_chunks` with
+`COPY ... FROM STDIN (FORMAT BINARY)` on the session's own connection, so it
+joins the caller's transaction. Embeddings go over the wire as pgvector's
+binary format (4 bytes per dimension) instead of a ~20-character text float
+each, and no ORM objects are tracked, flushed or refreshed per chunk.
+
+Non-PostgreSQL binds (tests, sqlite) fall back to one executemany INSERT.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .models import ChapterChunk
+
+
+CHUNK_COLUMNS = (
+    "chapter_id",
+    "section_title",
+    "kind",
+    "chunk_index",
+    "text",
+    "embedding",
+    "embedding_local",
+    "created_at",
+)
+# Binary COPY needs the exact wire type per column; varchar and text share one.
+_CHUNK_TYPES = [
+    "int4",
+    "text",
+    "text",
+    "int4",
+    "text",
+    "vector",
+    "vector",
+    "timestamp",
+]
+
+
+def chunk_rows(
+    chapter_id: int, chunks: Iterable[ChapterChunk], created_at: datetime | None = None
+) -> list[tuple[Any, ...]]:
+    """Rows in `CHUNK_COLUMNS` order for chunks built by `chapter_ingest`."""
+    created_at = created_at or datetime.utcnow()
+    return [
+        (
+            chapter_id,
+            chunk.section_title,
+            chunk.kind,
+            chunk.chunk_index,
+            chunk.text,
+            chunk.embedding,
+            chunk.embedding_local,
+            created_at,
+        )
+        for chunk in chunks
+    ]
+
+
+def _ensure_vector_type(raw_connection: Any) -> None:
+    """Register pgvector's dumpers once per DBAPI connection."""
+    if raw_connection.adapters.types.get("vector") is None:
+        from pgvector.psycopg import register_vector
+
+        register_vector(raw_connection)
+
+
+def copy_chunks(db: Session, rows: Sequence[tuple[Any, ...]]) -> int:
+    """Insert chunk rows (see `chunk_rows`) in the session's transaction."""
+    if not rows:
+        return 0
+
+    connection = db.connection()
+    if connection.dialect.name != "postgresql":
+        connection.execute(
+            insert(ChapterChunk),
+            [dict(zip(CHUNK_COLUMNS, row)) for row in rows],
+        )
+        return len(rows)
+
+    raw_connection = connection.connection.driver_connection
+    if raw_connection is None:
+        raise RuntimeError("COPY needs a live DBAPI connection; none is checked out")
+    _ensure_vector_type(raw_connection)
+    with raw_connection.cursor() as cursor:
+        with cursor.copy(
+            f"COPY {ChapterChunk.__tablename__} ({', '.join(CHUNK_COLUMNS)}) "
+            "FROM STDIN (FORMAT BINARY)"
+        ) as copy:
+            copy.set_types(_CHUNK_TYPES)
+            for row in rows:
+                copy.write_row(row)
+    return len(rows)
@@ -0,0 +1,125 @@
+"""
+Pre-serialized catalog of documented chapters for `GET /chapters`.
+
+The catalog only changes when chapters are ingested, so it is built once
+from a column-projected query (no `raw_infobox` JSON), grouped by game,
+rendered to JSON bytes and tagged with a content ETag. Requests are then
+served from memory, or with a 304 when the client already has it.
+
+The ingest functions call `invalidate_chapter_catalog` after committing.
+Ingests in another process (a separate `python -m app.job_queue` worker, the dump
+importer) cannot reach this process's cache, so a built catalog also expires
+after `CHAPTER_CATALOG_TTL_SECONDS`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .http_cache import make_etag
+from .models import Chapter
+from .schemas.wiki import ChapterListResponse
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    body: bytes
+    etag: str
+    built_at: float
+
+
+def _normalize_game_name(raw: str | None) -> str | None:
+    if raw is None:
+        return None
+    text = raw.strip()
+    if text.startswith("[[") and text.endswith("]]") and len(text) > 4:
+        return text[2:-2].strip()
+    return text
+
+
+def build_chapter_catalog(db: Session) -> dict[str, Any]:
+    """Documented chapters grouped by game, in the `ChapterListResponse` shape."""
+    rows = db.execute(
+        select(Chapter.id, Chapter.title, Chapter.infobox_title, Chapter.game).order_by(
+            Chapter.game.is_(None), Chapter.game, Chapter.id
+        )
+    ).all()
+
+    groups: dict[str | None, list[dict[str, Any]]] = {}
+    for row in rows:
+        game = _normalize_game_name(row.game)
+        groups.setdefault(game, []).append(
+            {
+                "id": row.id,
+                "title": row.title,
+                "infobox_title": row.infobox_title,
+                "game": game,
+            }
+        )
+
+    return {
+        "total_chapters": len(rows),
+        "games": [
+            {"game": game, "chapters": chapters} for game, chapters in groups.items()
+        ],
+    }
+
+
+class ChapterCatalogCache:
+    def __init__(self, ttl_seconds: float | None = None) -> None:
+        self.ttl_seconds = (
+            settings.chapter_catalog_ttl_seconds if ttl_seconds is None else ttl_seconds
+        )
+        self._snapshot: CatalogSnapshot | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _fresh(self, snapshot: CatalogSnapshot) -> bool:
+        return self.ttl_seconds <= 0 or (
+            time.monotonic() - snapshot.built_at < self.ttl_seconds
+        )
+
+    def get(self, db: Session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and self._fresh(snapshot):
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self._fresh(snapshot):
+                return snapshot
+            generation = self._generation
+
+        # Build outside the lock; an invalidation meanwhile discards the result.
+        data = build_chapter_catalog(db)
+        body = ChapterListResponse.model_validate(data).model_dump_json().encode()
+        snapshot = CatalogSnapshot(
+            body=body, etag=make_etag(body), built_at=time.monotonic()
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+
+_catalog = ChapterCatalogCache()
+
+
+def get_chapter_catalog(db: Session) -> CatalogSnapshot:
+    return _catalog.get(db)
+
+
+def invalidate_chapter_catalog() -> None:
+    _catalog.invalidate()
@@ -10,8 +10,11 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
+from .bulk_write import chunk_rows, copy_chunks
+from .chapter_catalog import invalidate_chapter_catalog
 from .models import Chapter, ChapterChunk
 from .openai_service import create_embeddings_batch
+from .providers import embedding_column_name
 
 
 logger = logging.getLogger(__name__)
@@ -26,6 +29,15 @@ class DuplicateChapterError(Exception):
         self.game = game
 
 
+def _assign_embeddings(
+    chunks: list[ChapterChunk], embeddings: list[list[float] | None]
+) -> None:
+    """Store vectors in the column that matches the embedding provider."""
+    column = embedding_column_name()
+    for chunk, embedding in zip(chunks, embeddings):
+        setattr(chunk, column, embedding)
+
+
 def build_chapter_records_from_wikitext(
     pageid: int,
     title: str,
@@ -188,21 +200,19 @@ def ingest_chapter_to_db(
         try:
             texts = [chunk.text for chunk in chunks]
             embeddings = create_embeddings_batch(texts)
-            for chunk, embedding in zip(chunks, embeddings):
-                chunk.embedding = embedding
+            _assign_embeddings(chunks, embeddings)
             logger.info(f"Generated {len(embeddings)} embeddings")
         except Exception as e:
             logger.warning(
                 f"Failed to generate embeddings: {e}. Chunks will be stored without embeddings."
             )
 
-    # Associate chunks with chapter
-    for chunk in chunks:
-        chunk.chapter = chapter_row
-
-    # Add to database
+    # Insert the chapter to get its id, then COPY the chunks in binary
     db.add(chapter_row)
+    db.flush()
+    copy_chunks(db, chunk_rows(chapter_row.id, chunks))
     db.commit()
+    invalidate_chapter_catalog()
     db.refresh(chapter_row)
 
     logger.info(f"Ingested chapter: {title} with {len(chunks)} chunks")
@@ -236,8 +246,7 @@ def reingest_chapter_to_db(
         try:
             texts = [chunk.text for chunk in chunks]
             embeddings = create_embeddings_batch(texts)
-            for chunk, embedding in zip(chunks, embeddings):
-                chunk.embedding = embedding
+            _assign_embeddings(chunks, embeddings)
             logger.info(f"Generated {len(embeddings)} embeddings")
         except Exception as e:
             logger.warning(
@@ -256,11 +265,11 @@ def reingest_chapter_to_db(
     existing.raw_infobox = chapter_row.raw_infobox
     existing.source_url = chapter_row.source_url
 
-    for chunk in chunks:
-        chunk.chapter = existing
-
     db.add(existing)
+    db.flush()
+    copy_chunks(db, chunk_rows(existing.id, chunks))
     db.commit()
+    invalidate_chapter_catalog()
     db.refresh(existing)
 
     logger.info(f"Reingested chapter: {title} with {len(chunks)} chunks")
@@ -279,3 +288,87 @@ def build_chapter_records(
     Kept for backward compatibility with HTML-parsed data.
     """
     return build_chapter_records_from_wikitext(pageid, title, chapter)
+
+
+def bulk_ingest_chapters(
+    db: Session,
+    pages: list[tuple[int, str, dict[str, Any]]],
+    generate_embeddings: bool = True,
+) -> dict[str, int]:
+    """
+    Insert many parsed chapters in one transaction.
+
+    Pages are `(pageid, title, chapter_data)` tuples. Chapters whose pageid
+    already exists, or that `ingest_chapter_to_db` would reject as duplicates
+    (same title and game), are skipped instead of raising, so an import can
+    be re-run safely.
+
+    Returns:
+        Counts of inserted chapters, skipped pages and stored chunks
+    """
+    built = [
+        build_chapter_records_from_wikitext(pageid, title, chapter_data)
+        for pageid, title, chapter_data in pages
+    ]
+    if not built:
+        return {"inserted": 0, "skipped": 0, "chunks": 0}
+
+    pageids = [chapter_row.pageid for chapter_row, _ in built]
+    lookup_titles = [
+        chapter_row.infobox_title or chapter_row.title for chapter_row, _ in built
+    ]
+    existing = (
+        db.query(Chapter.pageid, Chapter.title, Chapter.game)
+        .filter(Chapter.pageid.in_(pageids) | Chapter.title.in_(lookup_titles))
+        .all()
+    )
+    seen_pageids = {row.pageid for row in existing}
+    seen_titles: dict[str, set[str | None]] = {}
+    for row in existing:
+        seen_titles.setdefault(row.title, set()).add(row.game)
+
+    accepted: list[tuple[Chapter, list[ChapterChunk]]] = []
+    for (chapter_row, chunks), lookup_title in zip(built, lookup_titles):
+        games = seen_titles.get(lookup_title, set())
+        is_duplicate = chapter_row.pageid in seen_pageids or (
+            bool(games) if chapter_row.game is None else chapter_row.game in games
+        )
+        if is_duplicate:
+            continue
+        seen_pageids.add(chapter_row.pageid)
+        seen_titles.setdefault(chapter_row.title, set()).add(chapter_row.game)
+        accepted.append((chapter_row, chunks))
+
+    all_chunks = [chunk for _, chunks in accepted for chunk in chunks]
+    if generate_embeddings and all_chunks:
+        logger.info(f"Generating embeddings for {len(all_chunks)} chunks...")
+        try:
+            embeddings = create_embeddings_batch([chunk.text for chunk in all_chunks])
+            _assign_embeddings(all_chunks, embeddings)
+        except Exception as e:
+            logger.warning(
+                f"Failed to generate embeddings: {e}. Chunks will be stored without embeddings."
+            )
+
+    db.add_all([chapter_row for chapter_row, _ in accepted])
+    db.flush()
+    copy_chunks(
+        db,
+        [
+            row
+            for chapter_row, chunks in accepted
+            for row in chunk_rows(chapter_row.id, chunks)
+        ],
+    )
+    db.commit()
+    invalidate_chapter_catalog()
+
+    logger.info(
+        f"Bulk ingested {len(accepted)} chapters with {len(all_chunks)} chunks "
+        f"({len(built) - len(accepted)} skipped)"
+    )
+    return {
+        "inserted": len(accepted),
+        "skipped": len(built) - len(accepted),
+        "chunks": len(all_chunks),
+    }
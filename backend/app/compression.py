@@ -0,0 +1,192 @@
+"""
+Response compression: Brotli when the client accepts it and the `brotli`
+package is installed, otherwise gzip.
+
+Bodies smaller than `COMPRESSION_MINIMUM_SIZE` go out as-is. Streaming
+responses are compressed chunk by chunk with a flush after each one, so
+NDJSON lines still reach the client as they are produced. A strong ETag on a
+compressed response is made weak: the bytes differ from the identity
+representation, but `If-None-Match` (a weak comparison) still matches it.
+
+Built on the plain ASGI interface and public Starlette datastructures only,
+so framework upgrades cannot change how bodies are encoded.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections.abc import Callable
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+# Compress bodies at least this large on a worker thread, off the event loop.
+_THREAD_MINIMUM_SIZE = 128 * 1024
+# Server-sent events must reach the client unbuffered.
+_EXCLUDED_CONTENT_TYPES = ("text/event-stream",)
+
+# Takes (body, more_body) and returns the encoded bytes for that chunk.
+Encoder = Callable[[bytes, bool], bytes]
+
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Whether an Accept-Encoding header allows `coding` (q=0 refuses it)."""
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if name.strip() not in (coding, "*"):
+            continue
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def gzip_encoder(level: int) -> Encoder:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def encode(body: bytes, more_body: bool) -> bytes:
+        flush = zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        return compressor.compress(body) + compressor.flush(flush)
+
+    return encode
+
+
+def brotli_encoder(quality: int) -> Encoder:
+    if brotli is None:
+        raise RuntimeError("Brotli compression needs `pip install brotli`")
+    compressor = brotli.Compressor(quality=quality)
+
+    def encode(body: bytes, more_body: bool) -> bytes:
+        compressed = compressor.process(body)
+        if more_body:
+            return compressed + compressor.flush()
+        return compressed + compressor.finish()
+
+    return encode
+
+
+class _Responder:
+    """Wraps `send` for one response: compress it with `encoder`, if given."""
+
+    def __init__(
+        self,
+        send: Send,
+        minimum_size: int,
+        content_encoding: str | None = None,
+        encoder: Encoder | None = None,
+    ) -> None:
+        self.send = send
+        self.minimum_size = minimum_size
+        self.content_encoding = content_encoding
+        self.encoder = encoder
+        self.start_message: Message | None = None
+        # Decided on the first body chunk
+        self.compressing: bool | None = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.start_message is None:
+            await self.send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self.compressing is None:
+            start_message = self.start_message
+            self.compressing = self._prepare_headers(start_message, body, more_body)
+            if self.compressing and not more_body:
+                # The whole body is here, so the encoded length can be sent.
+                encoded = await self._encode(body, False)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Length"] = str(len(encoded))
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": encoded})
+                return
+            await self.send(start_message)
+
+        if not self.compressing:
+            await self.send(message)
+            return
+        await self.send(
+            {
+                "type": "http.response.body",
+                "body": await self._encode(body, more_body),
+                "more_body": more_body,
+            }
+        )
+
+    def _prepare_headers(self, message: Message, body: bytes, more_body: bool) -> bool:
+        """Set the start headers for this response; True when compressing it."""
+        headers = MutableHeaders(raw=message["headers"])
+        if (
+            "content-encoding" in headers
+            or headers.get("content-type", "").startswith(_EXCLUDED_CONTENT_TYPES)
+            or (not more_body and len(body) < self.minimum_size)
+        ):
+            return False
+
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoder is None or self.content_encoding is None:
+            return False
+
+        headers["Content-Encoding"] = self.content_encoding
+        # Streaming bodies go out chunked; single bodies get a new length.
+        del headers["Content-Length"]
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        return True
+
+    async def _encode(self, body: bytes, more_body: bool) -> bytes:
+        assert self.encoder is not None
+        if len(body) >= _THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.encoder, body, more_body)
+        return self.encoder(body, more_body)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if brotli is not None and accepts_encoding(accept_encoding, "br"):
+            responder = _Responder(
+                send, self.minimum_size, "br", brotli_encoder(self.brotli_quality)
+            )
+        elif accepts_encoding(accept_encoding, "gzip"):
+            responder = _Responder(
+                send, self.minimum_size, "gzip", gzip_encoder(self.gzip_level)
+            )
+        else:
+            # Still adds `Vary: Accept-Encoding` to compressible responses.
+            responder = _Responder(send, self.minimum_size)
+
+        await self.app(scope, receive, responder)
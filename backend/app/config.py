@@ -52,6 +52,30 @@ class Settings(BaseSettings):
         default=None,
         description="Full database URL (overrides individual settings if provided)",
     )
+    database_pool_mode: Literal["queue", "transaction_pooler"] = Field(
+        default="queue",
+        description="queue: keep a connection pool per process; transaction_pooler: no client-side pool and no prepared statements, for PgBouncer / Supabase transaction mode",
+    )
+    database_pool_size: int = Field(
+        default=5,
+        description="Connections kept open per process (queue mode)",
+    )
+    database_max_overflow: int = Field(
+        default=10,
+        description="Extra connections opened under load on top of the pool size (queue mode)",
+    )
+    database_pool_timeout: float = Field(
+        default=30.0,
+        description="Seconds to wait for a free pooled connection before failing (queue mode)",
+    )
+    database_pool_recycle: int | None = Field(
+        default=None,
+        description="Replace pooled connections older than this many seconds, e.g. below a proxy's idle timeout (queue mode)",
+    )
+    database_pool_pre_ping: bool = Field(
+        default=True,
+        description="Test each pooled connection on checkout, one extra round trip (queue mode)",
+    )
 
     # OpenAI
     openai_api_key: str = Field(default="", description="OpenAI API key for embeddings")
@@ -74,6 +98,60 @@ class Settings(BaseSettings):
         description="Enable Cloudflare Turnstile verification",
     )
 
+    # Providers (fakes are for offline load testing)
+    embedding_provider: Literal["openai", "fake", "local"] = Field(
+        default="openai",
+        description="Embedding backend: 'openai', in-process 'local' model, or deterministic 'fake' (load tests only)",
+    )
+    local_embedding_model: str = Field(
+        default="sentence-transformers/all-MiniLM-L6-v2",
+        description="sentence-transformers model for EMBEDDING_PROVIDER=local (must output 384 dimensions)",
+    )
+    local_embedding_backend: Literal["torch", "onnx", "openvino"] = Field(
+        default="torch",
+        description="Inference backend for the local embedding model",
+    )
+    local_embedding_batch_size: int = Field(
+        default=32,
+        description="Texts per local inference batch",
+    )
+    local_embedding_threads: int = Field(
+        default=2,
+        description="Threads running local embedding inference",
+    )
+    chat_provider: Literal["openai", "fake"] = Field(
+        default="openai",
+        description="Chat completion backend: 'openai' or deterministic 'fake' (load tests only)",
+    )
+    turnstile_provider: Literal["cloudflare", "fake"] = Field(
+        default="cloudflare",
+        description="Turnstile verifier: 'cloudflare' or 'fake' (accepts any token not starting with 'fail')",
+    )
+    fake_embedding_latency_ms: float = Field(
+        default=120.0,
+        description="Median simulated latency of the fake embedding provider",
+    )
+    fake_chat_latency_ms: float = Field(
+        default=1500.0,
+        description="Median simulated latency of the fake chat provider",
+    )
+    fake_turnstile_latency_ms: float = Field(
+        default=80.0,
+        description="Median simulated latency of the fake Turnstile verifier",
+    )
+    fake_latency_distribution: Literal["fixed", "uniform", "lognormal"] = Field(
+        default="lognormal",
+        description="Distribution used to draw fake provider latencies",
+    )
+    fake_latency_jitter: float = Field(
+        default=0.25,
+        description="Spread of fake latencies (sigma for lognormal, +/- fraction for uniform)",
+    )
+    fake_seed: int = Field(
+        default=0,
+        description="Seed for fake latency draws (keeps load tests reproducible)",
+    )
+
     # Server
     host: str = Field(default="0.0.0.0", description="Server host")
     port: int = Field(default=8000, description="Server port")
@@ -91,6 +169,150 @@ class Settings(BaseSettings):
     # Logging
     log_level: str = Field(default="INFO", description="Logging level")
 
+    # Response compression
+    compression_enabled: bool = Field(
+        default=True,
+        description="Compress responses (Brotli when the brotli package is installed, else gzip)",
+    )
+    compression_minimum_size: int = Field(
+        default=1024,
+        description="Send bodies smaller than this many bytes uncompressed",
+    )
+    compression_gzip_level: int = Field(
+        default=6,
+        description="gzip level (1-9); 6 is most of level 9's ratio at a fraction of the CPU",
+    )
+    compression_brotli_quality: int = Field(
+        default=4,
+        description="Brotli quality (0-11); 4-5 suit dynamic responses",
+    )
+
+    # Metrics
+    metrics_enabled: bool | None = Field(
+        default=None,
+        description="Expose Prometheus-style metrics at /metrics (unset: only in local and development)",
+    )
+
+    # MediaWiki fetching
+    mediawiki_max_concurrency: int = Field(
+        default=8,
+        description="Pages fetched in parallel for a category (1 fetches sequentially)",
+    )
+    mediawiki_maxlag: int = Field(
+        default=5,
+        description="maxlag sent to the MediaWiki API; the wiki asks us to back off when replicas lag more (0 omits it)",
+    )
+    mediawiki_max_retries: int = Field(
+        default=3,
+        description="Retries for MediaWiki requests refused with maxlag, 429 or 503",
+    )
+    mediawiki_cache_path: str = Field(
+        default="",
+        description="SQLite file caching MediaWiki parse responses (empty disables the cache)",
+    )
+    mediawiki_cache_ttl_seconds: int = Field(
+        default=300,
+        description="Serve cached pages without asking the wiki for this long; older entries are revalidated by revision id",
+    )
+    mediawiki_cache_max_mb: int = Field(
+        default=256,
+        description="Size cap for the compressed MediaWiki cache; least recently used pages are evicted",
+    )
+    wiki_preview_max_age_seconds: int = Field(
+        default=60,
+        description="Cache-Control max-age for /wiki preview responses; clients revalidate with the revision-based ETag afterwards",
+    )
+
+    # Wikitext parsing
+    wikitext_ast_cache_size: int = Field(
+        default=32,
+        description="Parsed wikitext trees kept in memory, keyed by content hash (0 disables)",
+    )
+
+    # HTML parsing
+    html_stream_threshold_chars: int = Field(
+        default=1_000_000,
+        description="Parse wiki pages longer than this with the streaming parser (0 disables)",
+    )
+    parse_workers: int = Field(
+        default=0,
+        description="Worker processes for page parsing, started with the app (0 parses inline)",
+    )
+
+    # Embedding batching (ingest)
+    embedding_batch_max_inputs: int = Field(
+        default=512,
+        description="Most texts sent in one embeddings request",
+    )
+    embedding_batch_max_tokens: int = Field(
+        default=100_000,
+        description="Most estimated tokens sent in one embeddings request",
+    )
+    embedding_max_input_tokens: int = Field(
+        default=8000,
+        description="Longer inputs are truncated to this many estimated tokens",
+    )
+    embedding_max_concurrency: int = Field(
+        default=4,
+        description="Embeddings requests in flight at once per process",
+    )
+    embedding_tokens_per_minute: int = Field(
+        default=1_000_000,
+        description="Embedding token budget per minute shared by all requests in the process (0 disables)",
+    )
+    embedding_max_retries: int = Field(
+        default=5,
+        description="Retries for embeddings requests failing with 429, 5xx or connection errors",
+    )
+
+    # Query embedding coalescing
+    embedding_coalesce_window_ms: float = Field(
+        default=5.0,
+        description="Wait this long to batch concurrent query embeddings into one request (0 disables)",
+    )
+    embedding_coalesce_max_batch: int = Field(
+        default=64,
+        description="Send a coalesced query batch as soon as it holds this many texts",
+    )
+
+    # Background ingest jobs
+    job_workers: int = Field(
+        default=1,
+        description="Ingest job worker threads in the API process (0 leaves jobs to `python -m app.job_queue`)",
+    )
+    job_max_attempts: int = Field(
+        default=3,
+        description="Attempts per ingest job before it is marked failed",
+    )
+    job_retry_backoff_seconds: float = Field(
+        default=30.0,
+        description="Delay before the first retry of a failed job; doubles per attempt",
+    )
+    job_poll_interval_seconds: float = Field(
+        default=2.0,
+        description="How often idle job workers check the queue",
+    )
+    job_stale_after_seconds: int = Field(
+        default=900,
+        description="Requeue running jobs whose worker has not reported progress for this long",
+    )
+    job_heartbeat_seconds: float = Field(
+        default=30.0,
+        description="How often a worker touches its running job; keep well below job_stale_after_seconds",
+    )
+
+    # Chapter catalog (GET /chapters)
+    chapter_catalog_ttl_seconds: int = Field(
+        default=300,
+        description="Rebuild the cached chapter catalog after this long, to pick up ingests from other processes (0 = only on local ingest)",
+    )
+
+    # Health checks
+    health_check_interval_seconds: float = Field(
+        default=10.0,
+        description="How often a background thread re-checks the database for /health and /health/ready",
+    )
+
     # Redis / Rate limiting
     redis_url: str | None = Field(
         default=None,
@@ -148,6 +370,14 @@ class Settings(BaseSettings):
     )
 
     # API Docs (Swagger/ReDoc)
+    docs_enabled: bool | None = Field(
+        default=None,
+        description="Serve /docs, /redoc and /openapi.json (unset: yes, except in production without DOCS_USERNAME/DOCS_PASSWORD)",
+    )
+    openapi_schema_path: str = Field(
+        default="",
+        description="openapi.json prebuilt with `python -m app.openapi_schema`, served as-is instead of generating the schema in each worker",
+    )
     docs_auth_enabled: bool = Field(
         default=False,
         description="Require HTTP Basic Auth for /docs, /redoc, and /openapi.json",
@@ -197,6 +427,22 @@ class Settings(BaseSettings):
             url = "postgresql+psycopg://" + url[len("postgresql://") :]
         return url
 
+    @computed_field
+    @property
+    def docs_served(self) -> bool:
+        """Whether the docs routes are registered at all."""
+        if self.docs_enabled is not None:
+            return self.docs_enabled
+        return not self.is_production or bool(self.docs_username and self.docs_password)
+
+    @computed_field
+    @property
+    def metrics_served(self) -> bool:
+        """Whether /metrics is registered; it has no auth of its own."""
+        if self.metrics_enabled is not None:
+            return self.metrics_enabled
+        return self.environment in ("local", "development")
+
     @computed_field
     @property
     def is_local(self) -> bool:
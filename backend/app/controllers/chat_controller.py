@@ -3,6 +3,7 @@ from typing import Any
 from sqlalchemy.orm import Session
 
 from ..config import settings
+from ..metrics import track_stage
 from ..openai_service import FIRE_EMBLEM_SYSTEM_PROMPT, chat_completion
 from ..rag_service import build_context_from_chunks, retrieve_similar_chunks
 
@@ -13,12 +14,13 @@ def chat_plain(
     context: str | None,
     temperature: float,
 ) -> dict[str, Any]:
-    result, usage = chat_completion(
-        system_prompt=system_prompt or FIRE_EMBLEM_SYSTEM_PROMPT,
-        user_message=message,
-        context=context,
-        temperature=temperature,
-    )
+    with track_stage("chat_completion"):
+        result, usage = chat_completion(
+            system_prompt=system_prompt or FIRE_EMBLEM_SYSTEM_PROMPT,
+            user_message=message,
+            context=context,
+            temperature=temperature,
+        )
 
     return {
         "response": result,
@@ -43,14 +45,16 @@ def chat_rag(
             "usage": None,
         }
 
-    context = build_context_from_chunks(chunks)
+    with track_stage("context_build"):
+        context = build_context_from_chunks(chunks)
 
-    result, usage = chat_completion(
-        system_prompt=system_prompt or FIRE_EMBLEM_SYSTEM_PROMPT,
-        user_message=message,
-        context=context,
-        temperature=temperature,
-    )
+    with track_stage("chat_completion"):
+        result, usage = chat_completion(
+            system_prompt=system_prompt or FIRE_EMBLEM_SYSTEM_PROMPT,
+            user_message=message,
+            context=context,
+            temperature=temperature,
+        )
 
     sources = []
     seen_chapter_ids = set()
@@ -0,0 +1,31 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from ..job_queue import enqueue_ingest_job
+from ..models import IngestJob
+from ..schemas.jobs import IngestJobResponse
+
+
+def enqueue_ingest(
+    db: Session,
+    title: str,
+    reingest: bool,
+    generate_embeddings: bool,
+) -> IngestJobResponse:
+    job = enqueue_ingest_job(
+        db,
+        title,
+        reingest=reingest,
+        generate_embeddings=generate_embeddings,
+    )
+    return IngestJobResponse.model_validate(job)
+
+
+def get_job(db: Session, job_id: int) -> IngestJobResponse:
+    job = db.get(IngestJob, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found",
+        )
+    return IngestJobResponse.model_validate(job)
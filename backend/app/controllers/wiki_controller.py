@@ -1,24 +1,69 @@
+import logging
+from collections.abc import Iterator
+from functools import partial
 from typing import Any, Dict
 
 from fastapi import HTTPException, status
 from sqlalchemy.orm import Session
 
+from ..chapter_catalog import CatalogSnapshot
+from ..chapter_catalog import get_chapter_catalog as get_cached_catalog
 from ..chapter_ingest import (
     DuplicateChapterError,
     ingest_chapter_to_db,
     reingest_chapter_to_db,
 )
-from ..mediawiki_client import MediaWikiClient
-from ..models import Chapter
+from ..config import settings
+from ..http_cache import make_etag
+from ..mediawiki_client import get_mediawiki_client
+from ..parse_pool import map_parser, run_parser
 from ..parsers import (
-    extract_tables_as_json,
-    extract_tables_as_markdown,
-    parse_chapter_page,
+    PARSER_VERSION,
+    parse_chapter_html,
     parse_chapter_wikitext,
+    parse_page_html,
 )
+from ..responses import render_json
 
 
-client = MediaWikiClient()
+logger = logging.getLogger(__name__)
+
+client = get_mediawiki_client()
+
+# Bump whenever the shape of a preview body changes; it is part of the ETag.
+PREVIEW_SCHEMA_VERSION = 1
+
+
+def wiki_etag(revisions: list[tuple[str, int | None]], *variant: Any) -> str | None:
+    """Weak ETag for a preview built from these page revisions, or None if
+    any revision is unknown. `variant` covers the options that shape the body.
+
+    The parser and schema versions and the streaming threshold (which picks
+    the HTML parser) are included too, so a deploy or config change that
+    alters the output invalidates ETags clients already hold.
+    """
+    if not revisions or any(revid is None for _, revid in revisions):
+        return None
+    return make_etag(
+        PARSER_VERSION,
+        PREVIEW_SCHEMA_VERSION,
+        settings.html_stream_threshold_chars,
+        *revisions,
+        *variant,
+        weak=True,
+    )
+
+
+def current_page_etag(title: str, prop: str, *variant: Any) -> str | None:
+    """The ETag a page preview would carry now, from its latest revid only."""
+    revid = client.current_revids([title], prop).get(title)
+    return wiki_etag([(title, revid)], prop, *variant)
+
+
+def current_category_etag(category_name: str, limit: int, *variant: Any) -> str | None:
+    """The ETag a category preview would carry now, without fetching pages."""
+    revisions = client.category_revisions(category_name=category_name, limit=limit)
+    return wiki_etag(revisions, category_name, limit, *variant)
 
 
 def get_category_pages(
@@ -37,27 +82,15 @@ def get_category_pages(
             "pages": pages,
         }
 
-    results = []
-    for page in pages:
-        html = page["html"]
-        chapter = parse_chapter_page(html)
-        tables_json = extract_tables_as_json(html)
-        tables_markdown = extract_tables_as_markdown(html) if as_markdown else None
-
-        result_page = {
-            "pageid": page["pageid"],
-            "title": page["title"],
-            "chapter": chapter,
-            "tables_json": tables_json,
-        }
-
-        if tables_markdown is not None:
-            result_page["tables_markdown"] = tables_markdown
-
-        if include_html:
-            result_page["html"] = html
+    parsed_pages = map_parser(
+        partial(parse_page_html, as_markdown=as_markdown),
+        [page["html"] for page in pages],
+    )
 
-        results.append(result_page)
+    results = [
+        _category_result_page(page, parsed, include_html)
+        for page, parsed in zip(pages, parsed_pages)
+    ]
 
     return {
         "category": category_name,
@@ -66,6 +99,58 @@ def get_category_pages(
     }
 
 
+def _category_result_page(
+    page: Dict[str, Any], parsed: Dict[str, Any], include_html: bool
+) -> Dict[str, Any]:
+    result_page = {
+        "pageid": page["pageid"],
+        "title": page["title"],
+        "revid": page.get("revid"),
+        "chapter": parsed["chapter"],
+        "tables_json": parsed["tables_json"],
+    }
+
+    if parsed["tables_markdown"] is not None:
+        result_page["tables_markdown"] = parsed["tables_markdown"]
+
+    if include_html:
+        result_page["html"] = page["html"]
+
+    return result_page
+
+
+def stream_category_pages(
+    category_name: str,
+    limit: int,
+    include_html: bool,
+    as_markdown: bool,
+    raw: bool,
+) -> Iterator[bytes]:
+    """NDJSON lines: one per page as soon as it is fetched and parsed.
+
+    Lines arrive in completion order with the page's category position as
+    `index`. Up to `max_concurrency` fetched pages are buffered meanwhile
+    (see `iter_pages_in_category`). The status is already sent when a page
+    fails, so the failure is reported as a final `{"error": ...}` line.
+    """
+    parse = partial(parse_page_html, as_markdown=as_markdown)
+    try:
+        for page in client.iter_pages_in_category(
+            category_name=category_name, limit=limit
+        ):
+            if raw:
+                line = page
+            else:
+                line = _category_result_page(
+                    page, run_parser(parse, page["html"]), include_html
+                )
+                line["index"] = page["index"]
+            yield render_json(line) + b"\n"
+    except Exception as e:
+        logger.warning(f"Streaming category {category_name!r} failed: {e}")
+        yield render_json({"error": str(e) or type(e).__name__}) + b"\n"
+
+
 def get_single_page_html(
     title: str,
     include_html: bool,
@@ -77,11 +162,12 @@ def get_single_page_html(
         return page
 
     html = page["html"]
-    chapter = parse_chapter_page(html)
+    chapter = run_parser(parse_chapter_html, html)
 
     result = {
         "pageid": page["pageid"],
         "title": page["title"],
+        "revid": page.get("revid"),
         "chapter": chapter,
     }
 
@@ -101,11 +187,12 @@ def get_single_page_wikitext(
         return page
 
     wikitext = page["wikitext"]
-    chapter = parse_chapter_wikitext(wikitext)
+    chapter = run_parser(parse_chapter_wikitext, wikitext)
 
     return {
         "pageid": page["pageid"],
         "title": page["title"],
+        "revid": page.get("revid"),
         "chapter": chapter,
     }
 
@@ -132,7 +219,7 @@ def ingest_chapter_from_wikitext(
     pageid = page["pageid"]
 
     # Parse the wikitext
-    chapter_data = parse_chapter_wikitext(wikitext)
+    chapter_data = run_parser(parse_chapter_wikitext, wikitext)
 
     # Ingest into database
     try:
@@ -173,7 +260,7 @@ def reingest_chapter_from_wikitext(
     wikitext = page["wikitext"]
     pageid = page["pageid"]
 
-    chapter_data = parse_chapter_wikitext(wikitext)
+    chapter_data = run_parser(parse_chapter_wikitext, wikitext)
 
     chapter = reingest_chapter_to_db(
         db=db,
@@ -193,42 +280,5 @@ def reingest_chapter_from_wikitext(
     }
 
 
-def _normalize_game_name(raw: str | None) -> str | None:
-    if raw is None:
-        return None
-    text = raw.strip()
-    if text.startswith("[[") and text.endswith("]]") and len(text) > 4:
-        return text[2:-2].strip()
-    return text
-
-
-def list_documented_chapters(db: Session) -> Dict[str, Any]:
-    chapters = (
-        db.query(Chapter)
-        .order_by(Chapter.game.is_(None), Chapter.game, Chapter.id)
-        .all()
-    )
-
-    groups: dict[str | None, list[Chapter]] = {}
-    for chapter in chapters:
-        key = _normalize_game_name(chapter.game)
-        groups.setdefault(key, []).append(chapter)
-
-    games: list[Dict[str, Any]] = []
-    for game_name, game_chapters in groups.items():
-        games.append(
-            {
-                "game": game_name,
-                "chapters": [
-                    {
-                        "id": c.id,
-                        "title": c.title,
-                        "infobox_title": c.infobox_title,
-                        "game": _normalize_game_name(c.game),
-                    }
-                    for c in game_chapters
-                ],
-            }
-        )
-
-    return {"total_chapters": len(chapters), "games": games}
+def get_chapter_catalog(db: Session) -> CatalogSnapshot:
+    return get_cached_catalog(db)
@@ -8,25 +8,47 @@ Supports both local development and production deployments.
 import logging
 from collections.abc import Generator
 from contextlib import contextmanager
+from typing import Any
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import NullPool
 
-from .config import settings
+from .config import Settings, settings
 
 
 logger = logging.getLogger(__name__)
 
+
+def engine_options(config: Settings) -> dict[str, Any]:
+    """
+    Keyword arguments for `create_engine` from the DATABASE_POOL_* settings.
+
+    In transaction_pooler mode PgBouncer (or Supabase's pooler) owns the
+    pooling: every session gets a fresh server connection per transaction, so
+    a client-side pool would only hold connections idle, and psycopg must not
+    prepare statements that the next transaction's backend does not know.
+    """
+    options: dict[str, Any] = {"echo": config.debug, "future": True}
+    if config.database_pool_mode == "transaction_pooler":
+        options["poolclass"] = NullPool
+        options["connect_args"] = {"prepare_threshold": None}
+        return options
+
+    options.update(
+        pool_size=config.database_pool_size,
+        max_overflow=config.database_max_overflow,
+        pool_timeout=config.database_pool_timeout,
+        pool_pre_ping=config.database_pool_pre_ping,
+    )
+    if config.database_pool_recycle is not None:
+        options["pool_recycle"] = config.database_pool_recycle
+    return options
+
+
 # Create engine with settings from config
-engine = create_engine(
-    settings.database_url_computed,
-    echo=settings.debug,
-    future=True,
-    pool_pre_ping=True,  # Check connection health before using
-    pool_size=5,
-    max_overflow=10,
-)
+engine = create_engine(settings.database_url_computed, **engine_options(settings))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -135,3 +157,27 @@ def check_db_connection() -> bool:
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
         return False
+
+
+def pool_status() -> dict[str, int]:
+    """
+    Return connection pool counters for metrics and health reporting.
+
+    Pools without these counters (e.g. NullPool) report an empty dict.
+    """
+    pool = engine.pool
+    status: dict[str, int] = {}
+    for key, attr in (
+        ("size", "size"),
+        ("checked_in", "checkedin"),
+        ("checked_out", "checkedout"),
+        ("overflow", "overflow"),
+    ):
+        getter = getattr(pool, attr, None)
+        if getter is None:
+            continue
+        try:
+            status[key] = int(getter())
+        except Exception:  # pragma: no cover - defensive
+            continue
+    return status
@@ -20,14 +20,15 @@ import time
 from urllib.parse import quote
 
 from fastapi import FastAPI
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
+from starlette.datastructures import Headers
+from starlette.requests import HTTPConnection, Request
 from starlette.responses import (
     HTMLResponse,
     PlainTextResponse,
     RedirectResponse,
     Response,
 )
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .config import settings
 
@@ -71,7 +72,8 @@ def _verify_token(*, token: str | None, secret: str) -> bool:
 
     try:
         raw = base64.urlsafe_b64decode(token.encode("utf-8"))
-        payload_bytes, sig = raw.rsplit(b".", 1)
+        # The payload is JSON without dots; the raw signature may contain them
+        payload_bytes, sig = raw.split(b".", 1)
     except Exception:
         return False
 
@@ -278,16 +280,20 @@ def _login_html(*, next_url: str, error: str | None) -> str:
 </html>"""
 
 
-class DocsBasicAuthMiddleware(BaseHTTPMiddleware):
+class DocsBasicAuthMiddleware:
+    """Pure ASGI middleware: requests outside the docs paths are passed
+    straight through, without building a Request or wrapping the response.
+    """
+
     def __init__(
         self,
-        app: FastAPI,
+        app: ASGIApp,
         *,
         enabled: bool,
         username: str,
         password: str,
     ) -> None:
-        super().__init__(app)
+        self.app = app
         self.enabled = enabled
         self.username = username
         self.password = password
@@ -323,45 +329,61 @@ class DocsBasicAuthMiddleware(BaseHTTPMiddleware):
             self.password,
         )
 
-    async def dispatch(self, request: Request, call_next):
-        if not self.enabled or not _is_docs_path(request.url.path):
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or not _is_docs_path(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
 
-        if self._valid_basic_auth(request.headers.get("Authorization")):
-            return await call_next(request)
+        if self._valid_basic_auth(Headers(scope=scope).get("authorization")):
+            await self.app(scope, receive, send)
+            return
 
-        return self._unauthorized()
+        await self._unauthorized()(scope, receive, send)
 
 
-class DocsSessionAuthMiddleware(BaseHTTPMiddleware):
+class DocsSessionAuthMiddleware:
+    """Pure ASGI middleware; see `DocsBasicAuthMiddleware`."""
+
     def __init__(
         self,
-        app: FastAPI,
+        app: ASGIApp,
         *,
         enabled: bool,
         secret: str,
         cookie_name: str = _DOCS_COOKIE_NAME,
     ) -> None:
-        super().__init__(app)
+        self.app = app
         self.enabled = enabled
         self.secret = secret
         self.cookie_name = cookie_name
 
-    async def dispatch(self, request: Request, call_next):
-        if not self.enabled or not _is_docs_path(request.url.path):
-            return await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            not self.enabled
+            or scope["type"] != "http"
+            or not _is_docs_path(scope["path"])
+        ):
+            await self.app(scope, receive, send)
+            return
 
+        connection = HTTPConnection(scope)
         if _verify_token(
-            token=request.cookies.get(self.cookie_name), secret=self.secret
+            token=connection.cookies.get(self.cookie_name), secret=self.secret
         ):
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
 
-        next_url = str(request.url.path)
-        if request.url.query:
-            next_url += f"?{request.url.query}"
-        return RedirectResponse(
+        next_url = str(connection.url.path)
+        if connection.url.query:
+            next_url += f"?{connection.url.query}"
+        response = RedirectResponse(
             url=f"/docs-login?next={quote(next_url, safe='/:?&=%')}", status_code=302
         )
+        await response(scope, receive, send)
 
 
 def setup_docs_auth(app: FastAPI, *, logger) -> tuple[bool, str]:
@@ -0,0 +1,208 @@
+"""
+Import chapters from a MediaWiki XML export or database dump.
+
+Bootstraps an empty database without calling the wiki API once per page:
+
+    python -m app.dump_import fireemblem_pages_current.xml.bz2
+    python -m app.dump_import export.xml --no-embeddings --limit 50
+
+The file (plain, .gz or .bz2) is streamed with lxml's iterparse, so memory
+stays flat however large the dump is. Main-namespace pages whose wikitext
+contains `{{Chapterinfobox` are parsed with `parse_chapter_wikitext` (in the
+parse pool when PARSE_WORKERS > 0) and written in batches through
+`bulk_ingest_chapters`. Pages are read in dump order and already-stored
+chapters are skipped, so re-running an import is reproducible and safe.
+"""
+
+from __future__ import annotations
+
+import argparse
+import bz2
+import gzip
+import logging
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import IO, Any, cast
+
+from lxml import etree
+
+from .chapter_ingest import bulk_ingest_chapters
+from .parse_pool import map_parser, shutdown_parse_pool, start_parse_pool
+from .parsers import CHAPTER_INFOBOX_RE, parse_chapter_wikitext
+
+
+logger = logging.getLogger(__name__)
+
+
+def _open_dump(path: str | Path) -> IO[bytes]:
+    path = Path(path)
+    if path.suffix == ".bz2":
+        return bz2.open(path, "rb")
+    if path.suffix == ".gz":
+        # GzipFile is a BufferedIOBase, which typeshed does not count as IO
+        return cast(IO[bytes], gzip.open(path, "rb"))
+    return path.open("rb")
+
+
+def iter_dump_pages(source: str | Path | IO[bytes]) -> Iterator[dict[str, Any]]:
+    """Yield `{pageid, title, ns, redirect, wikitext}` for each page, in order.
+
+    `wikitext` is the page's last `<revision>`, which in full-history dumps
+    is the newest one. The export schema namespace differs between MediaWiki
+    versions, so tags are matched with `{*}`. Each `<revision>` is cleared
+    once read and each `<page>` once yielded.
+    """
+    stream = _open_dump(source) if isinstance(source, (str, Path)) else source
+    wikitext = ""
+    try:
+        for _, element in etree.iterparse(
+            stream,
+            events=("end",),
+            tag=("{*}revision", "{*}page"),
+            huge_tree=True,
+        ):
+            if etree.QName(element).localname == "revision":
+                # Revisions come oldest first; the last one read wins
+                wikitext = element.findtext("{*}text") or ""
+                element.clear(keep_tail=False)
+                continue
+
+            page = element
+            pageid = page.findtext("{*}id")
+            yield {
+                "pageid": int(pageid) if pageid else None,
+                "title": page.findtext("{*}title") or "",
+                "ns": int(page.findtext("{*}ns") or 0),
+                "redirect": page.find("{*}redirect") is not None,
+                "wikitext": wikitext,
+            }
+            wikitext = ""
+
+            page.clear(keep_tail=False)
+            while page.getprevious() is not None:
+                del page.getparent()[0]
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def iter_chapter_pages(
+    source: str | Path | IO[bytes],
+) -> Iterator[dict[str, Any]]:
+    """Main-namespace, non-redirect pages that use `{{Chapterinfobox}}`."""
+    for page in iter_dump_pages(source):
+        if page["ns"] != 0 or page["redirect"] or page["pageid"] is None:
+            continue
+        if CHAPTER_INFOBOX_RE.search(page["wikitext"]):
+            yield page
+
+
+def import_dump(
+    source: str | Path | IO[bytes],
+    *,
+    generate_embeddings: bool = True,
+    batch_size: int = 100,
+    limit: int | None = None,
+) -> dict[str, int]:
+    """Parse and store every chapter page in a dump; returns totals."""
+    from .db import SessionLocal
+
+    totals = {"pages": 0, "inserted": 0, "skipped": 0, "chunks": 0}
+    batch: list[dict[str, Any]] = []
+    started = time.perf_counter()
+
+    def flush() -> None:
+        if not batch:
+            return
+        parsed = map_parser(parse_chapter_wikitext, [p["wikitext"] for p in batch])
+        db = SessionLocal()
+        try:
+            counts = bulk_ingest_chapters(
+                db,
+                [
+                    (page["pageid"], page["title"], chapter_data)
+                    for page, chapter_data in zip(batch, parsed)
+                ],
+                generate_embeddings=generate_embeddings,
+            )
+        finally:
+            db.close()
+
+        totals["pages"] += len(batch)
+        for key, value in counts.items():
+            totals[key] += value
+        logger.info(
+            f"Imported {totals['pages']} chapter pages "
+            f"({totals['inserted']} new) in {time.perf_counter() - started:.1f}s"
+        )
+        batch.clear()
+
+    for page in iter_chapter_pages(source):
+        if limit is not None and totals["pages"] + len(batch) >= limit:
+            break
+        batch.append(page)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    return totals
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", 1)[0])
+    parser.add_argument("dump", help="MediaWiki XML export (.xml, .xml.gz, .xml.bz2)")
+    parser.add_argument(
+        "--no-embeddings",
+        action="store_true",
+        help="Store chunks without embeddings (backfill them later)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Chapters parsed and committed per transaction",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=None, help="Stop after this many chapter pages"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list the chapter pages found in the dump",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    if args.dry_run:
+        count = 0
+        for page in iter_chapter_pages(args.dump):
+            print(f"{page['pageid']}\t{page['title']}")
+            count += 1
+        print(f"{count} chapter pages")
+        return 0
+
+    start_parse_pool()
+    try:
+        totals = import_dump(
+            args.dump,
+            generate_embeddings=not args.no_embeddings,
+            batch_size=args.batch_size,
+            limit=args.limit,
+        )
+    finally:
+        shutdown_parse_pool()
+
+    print(
+        f"{totals['pages']} chapter pages: {totals['inserted']} inserted, "
+        f"{totals['skipped']} already present, {totals['chunks']} chunks"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,103 @@
+"""
+Fill in missing chunk embeddings for the configured provider.
+
+Switching EMBEDDING_PROVIDER changes which column retrieval reads
+(`embedding` for OpenAI, 384-d `embedding_local` for the local model), so
+existing chunks need vectors in the new column before queries can find them:
+
+    EMBEDDING_PROVIDER=local python -m app.embedding_backfill
+    python -m app.embedding_backfill --batch-size 512 --limit 10000
+
+Chunks are read in id order with keyset pagination, embedded through
+`create_embeddings_batch`, and written back one batch per transaction, so
+the command can be stopped and re-run at any point.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import ChapterChunk
+from .openai_service import create_embeddings_batch
+from .providers import embedding_column_name
+
+
+logger = logging.getLogger(__name__)
+
+
+def backfill_embeddings(
+    db: Session,
+    *,
+    batch_size: int = 256,
+    limit: int | None = None,
+) -> int:
+    """Embed chunks whose provider column is NULL; returns how many were filled."""
+    column_name = embedding_column_name()
+    column = getattr(ChapterChunk, column_name)
+    statement = (
+        update(ChapterChunk)
+        .where(ChapterChunk.id == bindparam("chunk_id"))
+        .values({column_name: bindparam("vector")})
+    )
+
+    filled = 0
+    last_id = 0
+    started = time.perf_counter()
+    while limit is None or filled < limit:
+        size = batch_size if limit is None else min(batch_size, limit - filled)
+        rows = db.execute(
+            select(ChapterChunk.id, ChapterChunk.text)
+            .where(column.is_(None), ChapterChunk.id > last_id)
+            .order_by(ChapterChunk.id)
+            .limit(size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        vectors = create_embeddings_batch([row.text for row in rows])
+        params = [
+            {"chunk_id": row.id, "vector": vector}
+            for row, vector in zip(rows, vectors)
+            if vector is not None
+        ]
+        if params:
+            db.connection().execute(statement, params)
+        db.commit()
+
+        filled += len(params)
+        logger.info(
+            f"Backfilled {filled} {column_name} vectors "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    return filled
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n", 1)[0])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    from .db import SessionLocal
+
+    with SessionLocal() as db:
+        filled = backfill_embeddings(db, batch_size=args.batch_size, limit=args.limit)
+    print(f"Filled {filled} chunks in {embedding_column_name()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+"""
+Batch embedding requests for ingest.
+
+`EmbeddingBatcher.embed` takes any number of texts and returns one vector per
+input, index-aligned (None for blank inputs, which the API rejects):
+
+- Inputs are packed greedily, in order, into requests of at most
+  `EMBEDDING_BATCH_MAX_INPUTS` texts and `EMBEDDING_BATCH_MAX_TOKENS`
+  estimated tokens; an input longer than `EMBEDDING_MAX_INPUT_TOKENS` is cut
+  to fit.
+- Up to `EMBEDDING_MAX_CONCURRENCY` requests run at once, all drawing from a
+  shared tokens-per-minute budget (`EMBEDDING_TOKENS_PER_MINUTE`).
+- 429s, 5xx and connection errors are retried up to `EMBEDDING_MAX_RETRIES`
+  times with full-jitter exponential backoff (or the server's Retry-After).
+
+Token counts use the same ~4 characters per token estimate as the fake
+provider, kept conservative by counting 3 characters per token.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from .config import settings
+from .metrics import record_token_usage
+from .providers import EmbeddingProvider, get_embedding_provider
+
+
+logger = logging.getLogger(__name__)
+
+_CHARS_PER_TOKEN = 3
+_RETRY_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+_BACKOFF_BASE_SECONDS = 0.5
+_BACKOFF_MAX_SECONDS = 30.0
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, -(-len(text) // _CHARS_PER_TOKEN))
+
+
+class TokenBudget:
+    """Token bucket refilled continuously at `tokens_per_minute` (0 = unlimited)."""
+
+    def __init__(self, tokens_per_minute: int) -> None:
+        self.capacity = max(0, tokens_per_minute)
+        self._available = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> None:
+        if self.capacity <= 0:
+            return
+        tokens = min(tokens, self.capacity)
+        rate = self.capacity / 60.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._available = min(
+                    self.capacity, self._available + (now - self._updated) * rate
+                )
+                self._updated = now
+                if self._available >= tokens:
+                    self._available -= tokens
+                    return
+                wait = (tokens - self._available) / rate
+            time.sleep(wait)
+
+
+def _is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in _RETRY_STATUS_CODES
+    # openai.APIConnectionError / APITimeoutError carry no status code.
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError"}
+
+
+def _retry_after(error: Exception) -> float | None:
+    response = getattr(error, "response", None)
+    headers: Any = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class EmbeddingBatcher:
+    def __init__(
+        self,
+        provider: EmbeddingProvider | None = None,
+        *,
+        max_inputs: int | None = None,
+        max_tokens: int | None = None,
+        max_input_tokens: int | None = None,
+        max_concurrency: int | None = None,
+        max_retries: int | None = None,
+        budget: TokenBudget | None = None,
+    ) -> None:
+        self._provider = provider
+        self.max_inputs = max(1, max_inputs or settings.embedding_batch_max_inputs)
+        self.max_tokens = max(1, max_tokens or settings.embedding_batch_max_tokens)
+        self.max_input_tokens = min(
+            self.max_tokens, max_input_tokens or settings.embedding_max_input_tokens
+        )
+        self.max_concurrency = max(
+            1, max_concurrency or settings.embedding_max_concurrency
+        )
+        self.max_retries = (
+            settings.embedding_max_retries if max_retries is None else max_retries
+        )
+        self.budget = budget or TokenBudget(settings.embedding_tokens_per_minute)
+
+    @property
+    def provider(self) -> EmbeddingProvider:
+        return self._provider or get_embedding_provider()
+
+    def pack(self, texts: list[str]) -> list[list[tuple[int, str, int]]]:
+        """Group non-blank inputs as `(index, text, tokens)` batches, in order."""
+        batches: list[list[tuple[int, str, int]]] = []
+        current: list[tuple[int, str, int]] = []
+        current_tokens = 0
+        for index, raw in enumerate(texts):
+            text = raw.strip()
+            if not text:
+                continue
+            tokens = estimate_tokens(text)
+            if tokens > self.max_input_tokens:
+                logger.warning(
+                    f"Embedding input {index} is ~{tokens} tokens; truncating to "
+                    f"{self.max_input_tokens}"
+                )
+                text = text[: self.max_input_tokens * _CHARS_PER_TOKEN]
+                tokens = self.max_input_tokens
+            if current and (
+                len(current) >= self.max_inputs
+                or current_tokens + tokens > self.max_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((index, text, tokens))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _embed_batch(self, batch: list[tuple[int, str, int]]) -> list[list[float]]:
+        provider = self.provider
+        texts = [text for _, text, _ in batch]
+        self.budget.acquire(sum(tokens for _, _, tokens in batch))
+
+        attempt = 0
+        while True:
+            try:
+                vectors, usage = provider.embed(texts)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(
+                        0, min(_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2**attempt)
+                    )
+                attempt += 1
+                logger.warning(
+                    f"Embedding request failed ({e}); retry {attempt}/"
+                    f"{self.max_retries} in {delay:.2f}s"
+                )
+                time.sleep(delay)
+                continue
+
+            if len(vectors) != len(texts):
+                raise ValueError(
+                    f"Embedding provider returned {len(vectors)} vectors "
+                    f"for {len(texts)} inputs"
+                )
+            record_token_usage(usage, model=provider.model)
+            return vectors
+
+    def embed(self, texts: list[str]) -> list[list[float] | None]:
+        """One vector per input, in input order; None where the input is blank."""
+        results: list[list[float] | None] = [None] * len(texts)
+        batches = self.pack(texts)
+        if not batches:
+            return results
+
+        if len(batches) == 1 or self.max_concurrency == 1:
+            outputs = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_concurrency, len(batches)),
+                thread_name_prefix="embedding",
+            ) as executor:
+                outputs = list(executor.map(self._embed_batch, batches))
+
+        for batch, vectors in zip(batches, outputs):
+            for (index, _, _), vector in zip(batch, vectors):
+                results[index] = vector
+        return results
+
+
+_batcher: EmbeddingBatcher | None = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Process-wide batcher, so concurrent ingests share one rate budget."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = EmbeddingBatcher()
+    return _batcher
+
+
+def reset_embedding_batcher() -> None:
+    """Forget the cached batcher so the next call re-reads settings (tests)."""
+    global _batcher
+    with _batcher_lock:
+        _batcher = None
@@ -0,0 +1,116 @@
+"""
+Coalesce concurrent query embeddings into shared requests.
+
+Under load many `/chat/rag` requests embed their question at the same time.
+`EmbeddingCoalescer.embed` lets the first caller wait up to
+`EMBEDDING_COALESCE_WINDOW_MS` (or until `EMBEDDING_COALESCE_MAX_BATCH`
+texts have queued) and then sends every queued text in one embeddings call;
+each caller blocks on its own future and gets its own vector back. Identical
+texts in a batch are embedded once.
+
+There is no background thread: the first caller of each batch dispatches it.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future
+
+from .config import settings
+from .metrics import EMBEDDING_BATCH_SIZE, record_token_usage
+from .providers import EmbeddingProvider, get_embedding_provider
+
+
+class _Batch:
+    __slots__ = ("items", "full")
+
+    def __init__(self) -> None:
+        self.items: list[tuple[str, Future[list[float]]]] = []
+        self.full = threading.Event()
+
+
+class EmbeddingCoalescer:
+    def __init__(
+        self,
+        provider: EmbeddingProvider | None = None,
+        *,
+        window_ms: float | None = None,
+        max_batch: int | None = None,
+    ) -> None:
+        self._provider = provider
+        self.window_seconds = (
+            settings.embedding_coalesce_window_ms if window_ms is None else window_ms
+        ) / 1000
+        self.max_batch = max(1, max_batch or settings.embedding_coalesce_max_batch)
+        self._open: _Batch | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def provider(self) -> EmbeddingProvider:
+        return self._provider or get_embedding_provider()
+
+    def embed(self, text: str) -> list[float]:
+        """Embed one non-empty text, sharing the request with concurrent callers."""
+        if self.window_seconds <= 0 or self.max_batch == 1:
+            return self._dispatch([(text, Future())])[0]
+
+        future: Future[list[float]] = Future()
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if batch is None:
+                batch = self._open = _Batch()
+            batch.items.append((text, future))
+            if len(batch.items) >= self.max_batch:
+                self._open = None
+                batch.full.set()
+
+        if leader:
+            batch.full.wait(self.window_seconds)
+            with self._lock:
+                if self._open is batch:
+                    self._open = None
+            self._dispatch(batch.items)
+
+        return future.result()
+
+    def _dispatch(
+        self, items: list[tuple[str, Future[list[float]]]]
+    ) -> list[list[float]]:
+        unique = list(dict.fromkeys(text for text, _ in items))
+        provider = self.provider
+        try:
+            vectors, usage = provider.embed(unique)
+        except BaseException as e:
+            for _, future in items:
+                future.set_exception(e)
+            raise
+
+        record_token_usage(usage, model=provider.model)
+        EMBEDDING_BATCH_SIZE.observe(len(unique))
+
+        by_text = dict(zip(unique, vectors))
+        results = [by_text[text] for text, _ in items]
+        for (_, future), vector in zip(items, results):
+            future.set_result(vector)
+        return results
+
+
+_coalescer: EmbeddingCoalescer | None = None
+_coalescer_lock = threading.Lock()
+
+
+def get_embedding_coalescer() -> EmbeddingCoalescer:
+    global _coalescer
+    if _coalescer is None:
+        with _coalescer_lock:
+            if _coalescer is None:
+                _coalescer = EmbeddingCoalescer()
+    return _coalescer
+
+
+def reset_embedding_coalescer() -> None:
+    """Forget the cached coalescer so the next call re-reads settings (tests)."""
+    global _coalescer
+    with _coalescer_lock:
+        _coalescer = None
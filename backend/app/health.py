@@ -0,0 +1,157 @@
+"""
+Cached database health for the /health endpoints.
+
+Probes hit every instance often, so none of them touch the database
+directly. A `HealthMonitor` thread checks connectivity and pgvector on one
+pooled connection every `HEALTH_CHECK_INTERVAL_SECONDS`, and the endpoints
+report that result together with the pool's current saturation.
+"""
+
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from .config import settings
+from .db import engine
+
+
+logger = logging.getLogger(__name__)
+
+_PGVECTOR_QUERY = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'vector')"
+)
+# A result older than this many check intervals means the monitor is stuck
+_STALE_AFTER_INTERVALS = 3
+
+
+def probe_database(db_engine: Engine | None = None) -> tuple[bool, bool]:
+    """Return (connected, pgvector available) from a single round trip."""
+    db_engine = db_engine or engine
+    try:
+        with db_engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                conn.execute(text("SELECT 1"))
+                return True, False
+            return True, bool(conn.execute(_PGVECTOR_QUERY).scalar_one())
+    except Exception as e:
+        logger.warning(f"Health check could not reach the database: {e}")
+        return False, False
+
+
+def pool_saturation(pool: Pool | None = None) -> dict[str, Any]:
+    """
+    Connections in use against what the pool can hand out before callers
+    block (pool_size + max_overflow). Read from pool counters, no I/O.
+    """
+    pool = pool or engine.pool
+    size = getattr(pool, "size", None)
+    checked_out = getattr(pool, "checkedout", None)
+    if size is None or checked_out is None:
+        return {}
+    # QueuePool keeps max_overflow private; -1 means unlimited
+    max_overflow = getattr(pool, "_max_overflow", 0)
+    in_use = int(checked_out())
+    if max_overflow < 0:
+        return {"in_use": in_use, "capacity": None, "saturation": 0.0}
+    capacity = int(size()) + max_overflow
+    return {
+        "in_use": in_use,
+        "capacity": capacity,
+        "saturation": round(in_use / capacity, 3) if capacity else 0.0,
+    }
+
+
+class HealthMonitor:
+    """Refreshes the database status in a background thread."""
+
+    def __init__(
+        self,
+        interval: float,
+        probe: Any = probe_database,
+        clock: Any = time.monotonic,
+    ) -> None:
+        self.interval = interval
+        self._probe = probe
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._database: bool | None = None
+        self._pgvector = False
+        self._checked_at: float | None = None
+
+    def refresh(self) -> None:
+        database, pgvector = self._probe()
+        with self._lock:
+            self._database = database
+            self._pgvector = pgvector
+            self._checked_at = self._clock()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="health-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Health monitor error: {e}")
+            self._stop.wait(self.interval)
+
+    def status(self) -> dict[str, Any]:
+        """Last result; refreshed inline only when no thread keeps it current."""
+        with self._lock:
+            checked_at = self._checked_at
+        if self._thread is None and (
+            checked_at is None or self._clock() - checked_at >= self.interval
+        ):
+            self.refresh()
+
+        with self._lock:
+            database, pgvector = self._database, self._pgvector
+            checked_at = self._checked_at
+
+        age = None if checked_at is None else self._clock() - checked_at
+        stale = age is None or age > self.interval * _STALE_AFTER_INTERVALS
+        if database is None:
+            database_status = "unknown"
+        else:
+            database_status = "connected" if database else "disconnected"
+        return {
+            "ready": bool(database) and not stale,
+            "database": database_status,
+            "pgvector": "available" if database and pgvector else "missing",
+            "checked_seconds_ago": None if age is None else round(age, 1),
+        }
+
+
+_monitor = HealthMonitor(settings.health_check_interval_seconds)
+
+
+def start_health_monitor() -> None:
+    _monitor.start()
+
+
+def stop_health_monitor(timeout: float = 5.0) -> None:
+    _monitor.stop(timeout)
+
+
+def health_status() -> dict[str, Any]:
+    return {**_monitor.status(), "pool": pool_saturation()}
@@ -0,0 +1,138 @@
+"""
+Parse a wiki page's HTML once and share the tree between extractors.
+
+`parse_chapter_page`, `extract_tables_as_json` and
+`extract_tables_as_markdown` all accept an `HtmlDocument`, so a page fetched
+for a category preview is parsed a single time with lxml (C) instead of once
+per extractor with BeautifulSoup's pure-Python parser.
+
+Text helpers mirror BeautifulSoup's `get_text(...)`, so output is unchanged.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+
+import lxml.html
+from lxml import etree
+
+
+def class_predicate(name: str) -> str:
+    """XPath predicate matching elements whose class list contains `name`."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+_CONTENT_XPATH = etree.XPath(f"//div[{class_predicate('mw-parser-output')}][1]")
+
+
+class HtmlDocument:
+    """An HTML page parsed once with lxml and queried with XPath.
+
+    `content` is the `mw-parser-output` wrapper when present, else `<body>`.
+    `<script>`/`<style>` bodies are dropped up front because BeautifulSoup's
+    `get_text` never includes them.
+    """
+
+    def __init__(self, html: str) -> None:
+        if html.strip():
+            self.root = lxml.html.document_fromstring(html)
+        else:
+            self.root = lxml.html.document_fromstring("<html><body></body></html>")
+        etree.strip_elements(self.root, "script", "style", with_tail=False)
+
+        content = _CONTENT_XPATH(self.root)
+        if content:
+            self.content = content[0]
+        else:
+            body = self.root.find("body")
+            self.content = body if body is not None else self.root
+
+    def xpath(self, query: str, node: etree._Element | None = None) -> list:
+        """Evaluate `query` relative to `node` (the document root by default)."""
+        return (self.root if node is None else node).xpath(query)
+
+    def tables(self) -> list[etree._Element]:
+        """Every `<table>` in the page, nested ones included, in document order."""
+        return list(self.root.iter("table"))
+
+
+def as_document(html: str | HtmlDocument) -> HtmlDocument:
+    return html if isinstance(html, HtmlDocument) else HtmlDocument(html)
+
+
+def first(elements: Iterable[etree._Element]) -> etree._Element | None:
+    """First element of an XPath result or iterator, or None."""
+    return next(iter(elements), None)
+
+
+def element_text(element: etree._Element, separator: str = "") -> str:
+    """Same as BeautifulSoup's `tag.get_text(separator, strip=True)`."""
+    return separator.join(
+        text for text in (part.strip() for part in element.itertext()) if text
+    )
+
+
+_CHUNK_CHARS = 64 * 1024
+
+
+class HtmlBlockStream:
+    """Yield a page's top-level blocks while it is still being parsed.
+
+    Blocks are the children of the `mw-parser-output` wrapper (yielded as
+    `(block, True)`) and any other children of `<body>` (`(block, False)`).
+    Each block is yielded once its closing tag has been read, with
+    `<script>`/`<style>` removed and its earlier siblings already detached,
+    and is cleared once the caller moves on, so only one block's subtree is
+    ever held in memory. `has_content_root` tells whether the wrapper was seen.
+    """
+
+    def __init__(self, html: str | Iterable[str]) -> None:
+        self._chunks = (
+            (html[i : i + _CHUNK_CHARS] for i in range(0, len(html), _CHUNK_CHARS))
+            if isinstance(html, str)
+            else html
+        )
+        self.has_content_root = False
+
+    def __iter__(self) -> Iterator[tuple[etree._Element, bool]]:
+        parser = etree.HTMLPullParser(events=("start", "end"))
+        content_root: etree._Element | None = None
+        fed = False
+
+        def drain() -> Iterator[tuple[etree._Element, bool]]:
+            nonlocal content_root
+            for event, element in parser.read_events():
+                if event == "start":
+                    if (
+                        content_root is None
+                        and element.tag == "div"
+                        and "mw-parser-output" in (element.get("class") or "").split()
+                    ):
+                        content_root = element
+                        self.has_content_root = True
+                    continue
+
+                parent = element.getparent()
+                if parent is None or element is content_root:
+                    continue
+                in_content = parent is content_root
+                if not in_content and parent.tag != "body":
+                    continue
+
+                while element.getprevious() is not None:
+                    del parent[0]
+                if element.tag not in ("script", "style"):
+                    etree.strip_elements(element, "script", "style", with_tail=False)
+                    yield element, in_content
+                element.clear(keep_tail=False)
+
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            fed = True
+            parser.feed(chunk)
+            yield from drain()
+
+        if fed:
+            parser.close()
+            yield from drain()
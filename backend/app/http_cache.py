@@ -0,0 +1,62 @@
+"""
+Conditional GET helpers: ETags, `If-None-Match` and `Cache-Control`.
+
+Endpoints compute an ETag from something cheap (a content hash, revision
+ids) and call `not_modified` before doing the expensive work, so a client or
+CDN revalidating an unchanged resource gets a bodyless 304.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: object, weak: bool = False) -> str:
+    """Quoted ETag from a hash of `parts` (bytes are hashed as-is)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\x00")
+    tag = f'"{digest.hexdigest()[:32]}"'
+    return f"W/{tag}" if weak else tag
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == wanted
+        for candidate in if_none_match.split(",")
+    )
+
+
+def cache_headers(etag: str, cache_control: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(request: Request, etag: str, cache_control: str) -> Response | None:
+    """A 304 response when the request already holds `etag`, else None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag, cache_control))
+    return None
+
+
+def cached_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    cache_control: str,
+    media_type: str = "application/json",
+) -> Response:
+    """`body` with validators attached, or a 304 if the client is current."""
+    return not_modified(request, etag, cache_control) or Response(
+        content=body,
+        media_type=media_type,
+        headers=cache_headers(etag, cache_control),
+    )
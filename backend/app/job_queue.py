@@ -0,0 +1,363 @@
+"""
+Background ingest jobs backed by the `ingest_jobs` table.
+
+`enqueue_ingest_job` stores a job and returns at once; workers claim queued
+jobs with `SELECT ... FOR UPDATE SKIP LOCKED`, so any number of worker
+threads and processes can share the table without handing a job out twice.
+A job moves through `stage` values (fetching, parsing, storing) while it
+runs, and its worker touches `updated_at` every `JOB_HEARTBEAT_SECONDS`;
+failures are retried with exponential backoff up to `max_attempts`, and a
+running job whose worker stops updating it for `JOB_STALE_AFTER_SECONDS` is
+picked up again. A claim owns the attempt number it set, so a worker that
+was overtaken that way can no longer change the job.
+
+Workers run inside the API process (`JOB_WORKERS` threads, started in the
+app lifespan) or on their own:
+
+    python -m app.job_queue --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import signal
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import ColumnElement, and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from .chapter_ingest import (
+    DuplicateChapterError,
+    ingest_chapter_to_db,
+    reingest_chapter_to_db,
+)
+from .config import settings
+from .db import SessionLocal
+from .mediawiki_client import get_mediawiki_client
+from .models import IngestJob
+from .parse_pool import run_parser
+from .parsers import parse_chapter_wikitext
+
+
+logger = logging.getLogger(__name__)
+
+JOB_KINDS = ("ingest", "reingest")
+
+# Errors that would fail the same way on every attempt.
+_PERMANENT_ERRORS: tuple[type[Exception], ...] = (DuplicateChapterError,)
+
+# Set on enqueue so in-process workers start without waiting out a poll.
+_wakeup = threading.Event()
+
+
+def _run_ingest(
+    db: Session,
+    job: IngestJob,
+    report: Callable[[str], None],
+) -> dict[str, Any]:
+    report("fetching")
+    page = get_mediawiki_client().fetch_page_wikitext(title=job.title)
+
+    report("parsing")
+    chapter_data = run_parser(parse_chapter_wikitext, page["wikitext"])
+
+    report("storing")
+    ingest = reingest_chapter_to_db if job.kind == "reingest" else ingest_chapter_to_db
+    chapter = ingest(
+        db=db,
+        pageid=page["pageid"],
+        title=page["title"],
+        chapter_data=chapter_data,
+        generate_embeddings=job.generate_embeddings,
+    )
+    return {
+        "pageid": page["pageid"],
+        "title": page["title"],
+        "chapter_id": chapter.id,
+        "chunks_count": len(chapter.chunks),
+    }
+
+
+JOB_HANDLERS: dict[
+    str, Callable[[Session, IngestJob, Callable[[str], None]], dict[str, Any]]
+] = {kind: _run_ingest for kind in JOB_KINDS}
+
+
+def enqueue_ingest_job(
+    db: Session,
+    title: str,
+    *,
+    reingest: bool = False,
+    generate_embeddings: bool = True,
+) -> IngestJob:
+    job = IngestJob(
+        kind="reingest" if reingest else "ingest",
+        title=title,
+        generate_embeddings=generate_embeddings,
+        status="queued",
+        attempts=0,
+        max_attempts=max(1, settings.job_max_attempts),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    _wakeup.set()
+    return job
+
+
+def claim_next_job(db: Session) -> IngestJob | None:
+    """Mark the next runnable job as running and return it (None if idle)."""
+    while True:
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=settings.job_stale_after_seconds)
+        job = db.execute(
+            select(IngestJob)
+            .where(
+                or_(
+                    and_(IngestJob.status == "queued", IngestJob.run_after <= now),
+                    and_(
+                        IngestJob.status == "running",
+                        IngestJob.updated_at < stale_before,
+                    ),
+                )
+            )
+            .order_by(IngestJob.run_after, IngestJob.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).scalar_one_or_none()
+        if job is None:
+            db.rollback()
+            return None
+
+        if job.status == "running" and job.attempts >= job.max_attempts:
+            # Its worker died on the last allowed attempt.
+            job.status = "failed"
+            job.error = job.error or "worker stopped responding"
+            job.finished_at = now
+            job.updated_at = now
+            db.commit()
+            continue
+
+        job.status = "running"
+        job.stage = "starting"
+        job.attempts += 1
+        job.error = None
+        job.started_at = now
+        job.updated_at = now
+        db.commit()
+        return job
+
+
+def _owned(job_id: int, attempt: int) -> ColumnElement[bool]:
+    """Where-clause matching the job only while this claim still owns it."""
+    return and_(
+        IngestJob.id == job_id,
+        IngestJob.status == "running",
+        IngestJob.attempts == attempt,
+    )
+
+
+def _touch(job_id: int, attempt: int, **values: Any) -> bool:
+    """Update the job if this claim still owns it; False once it was reclaimed."""
+    with SessionLocal() as db:
+        updated = db.execute(
+            update(IngestJob)
+            .where(_owned(job_id, attempt))
+            .values(updated_at=datetime.utcnow(), **values)
+        )
+        db.commit()
+        return bool(updated.rowcount)
+
+
+def _set_stage(job_id: int, attempt: int, stage: str) -> None:
+    _touch(job_id, attempt, stage=stage)
+
+
+@contextmanager
+def _heartbeat(job_id: int, attempt: int) -> Iterator[None]:
+    """Keep `updated_at` fresh while a stage runs longer than the stale limit."""
+    stop = threading.Event()
+
+    def beat() -> None:
+        while not stop.wait(settings.job_heartbeat_seconds):
+            try:
+                if not _touch(job_id, attempt):
+                    logger.warning(f"Job {job_id} was reclaimed by another worker")
+                    return
+            except Exception as e:
+                logger.warning(f"Job {job_id} heartbeat failed: {e}")
+
+    thread = threading.Thread(target=beat, name=f"job-{job_id}-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _finish(
+    job_id: int, attempt: int, error: Exception | None, result: dict | None
+) -> None:
+    with SessionLocal() as db:
+        job = db.execute(
+            select(IngestJob).where(_owned(job_id, attempt)).with_for_update()
+        ).scalar_one_or_none()
+        if job is None:
+            logger.warning(
+                f"Dropping the outcome of job {job_id} attempt {attempt}: "
+                "it was reclaimed by another worker"
+            )
+            db.rollback()
+            return
+        now = datetime.utcnow()
+        job.updated_at = now
+        if error is None:
+            job.status = "succeeded"
+            job.stage = "done"
+            job.result = result
+            job.finished_at = now
+        elif isinstance(error, _PERMANENT_ERRORS) or attempt >= job.max_attempts:
+            job.status = "failed"
+            job.error = str(error) or type(error).__name__
+            job.finished_at = now
+        else:
+            delay = settings.job_retry_backoff_seconds * 2 ** (attempt - 1)
+            job.status = "queued"
+            job.error = str(error) or type(error).__name__
+            job.run_after = now + timedelta(seconds=delay)
+        db.commit()
+
+
+def run_next_job() -> bool:
+    """Claim and run one job; False when nothing was runnable."""
+    with SessionLocal() as db:
+        job = claim_next_job(db)
+        if job is None:
+            return False
+
+        job_id: int = job.id
+        attempt: int = job.attempts
+        logger.info(f"Running {job.kind} job {job_id} for {job.title!r}")
+        try:
+            handler = JOB_HANDLERS[job.kind]
+            with _heartbeat(job_id, attempt):
+                result = handler(
+                    db, job, lambda stage: _set_stage(job_id, attempt, stage)
+                )
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Job {job_id} failed: {e}")
+            _finish(job_id, attempt, e, None)
+        else:
+            _finish(job_id, attempt, None, result)
+    return True
+
+
+class JobWorker:
+    """Threads that poll the queue until `stop` is called."""
+
+    def __init__(self, concurrency: int, poll_interval: float) -> None:
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        for index in range(self.concurrency):
+            thread = threading.Thread(
+                target=self._loop, name=f"ingest-job-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def request_stop(self) -> None:
+        """Let each thread exit after its current job."""
+        self._stop.set()
+        _wakeup.set()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.request_stop()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ran = run_next_job()
+            except Exception as e:
+                logger.error(f"Job worker error: {e}")
+                ran = False
+            if not ran:
+                _wakeup.wait(self.poll_interval)
+                _wakeup.clear()
+
+
+_worker: JobWorker | None = None
+
+
+def start_job_workers(concurrency: int | None = None) -> bool:
+    """Start in-process workers; returns False when JOB_WORKERS is 0."""
+    global _worker
+    concurrency = settings.job_workers if concurrency is None else concurrency
+    if concurrency <= 0 or _worker is not None:
+        return False
+    _worker = JobWorker(concurrency, settings.job_poll_interval_seconds)
+    _worker.start()
+    logger.info(f"Started {concurrency} ingest job worker threads")
+    return True
+
+
+def stop_job_workers(timeout: float = 30.0) -> None:
+    global _worker
+    if _worker is not None:
+        _worker.stop(timeout)
+        _worker = None
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run ingest job workers")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, settings.job_workers),
+        help="Jobs run concurrently by this process",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+    from .parse_pool import shutdown_parse_pool, start_parse_pool
+
+    start_parse_pool()
+    worker = JobWorker(args.workers, settings.job_poll_interval_seconds)
+
+    def handle_signal(signum: int, frame: Any) -> None:
+        logger.info("Stopping job workers after their current jobs")
+        worker.request_stop()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+    logger.info(f"Job worker running with {args.workers} threads")
+    worker.start()
+    worker.join()
+    shutdown_parse_pool()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
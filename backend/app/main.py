@@ -1,15 +1,27 @@
 """Forseti Emblem RAG Backend - Main Application Entry Point."""
 
+import asyncio
+import importlib
 import logging
+import threading
+import time
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
+from .compression import CompressionMiddleware
 from .config import settings
-from .db import check_db_connection, init_db, pgvector_available
+from .db import check_db_connection, init_db
 from .docs_auth import setup_docs_auth
-from .routes import chat, wiki
+from .health import health_status, start_health_monitor, stop_health_monitor
+from .job_queue import start_job_workers, stop_job_workers
+from .metrics import render_metrics
+from .openapi_schema import install_prebuilt_openapi
+from .parse_pool import shutdown_parse_pool, start_parse_pool
+from .providers import warm_up_embedding_provider
+from .routes import chat, jobs, wiki
 
 
 # Configure logging
@@ -20,6 +32,37 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _init_database() -> bool:
+    """Check the connection and enable pgvector; False when unreachable."""
+    if not check_db_connection():
+        logger.warning("Database connection failed - some features may not work")
+        return False
+
+    logger.info("Database connection successful")
+    # Initialize database tables (will skip if pgvector is missing)
+    try:
+        init_db()
+    except Exception as e:
+        logger.warning(f"Database initialization skipped/failed: {e}")
+    return True
+
+
+def _prewarm_imports() -> None:
+    """Import modules kept out of start-up, once the app is already serving,
+    so the first chat request does not pay for them.
+    """
+    modules = []
+    if "openai" in (settings.embedding_provider, settings.chat_provider):
+        modules.append("openai")
+    if settings.redis_url:
+        modules.append("redis")
+    for module in modules:
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            logger.warning(f"Could not preload {module}: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -30,22 +73,30 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting Forseti Emblem RAG Backend in {settings.environment} mode")
     logger.info(f"Debug mode: {settings.debug}")
+    started = time.perf_counter()
+
+    # The server only starts listening once this returns, so the independent
+    # steps (DB round trips, spawning parse workers, loading a local
+    # embedding model) run side by side.
+    db_ok, _, _ = await asyncio.gather(
+        asyncio.to_thread(_init_database),
+        asyncio.to_thread(start_parse_pool),
+        asyncio.to_thread(warm_up_embedding_provider),
+    )
+    if db_ok:
+        start_job_workers()
+    start_health_monitor()
+    logger.info(f"Startup finished in {time.perf_counter() - started:.2f}s")
 
-    # Check database connection
-    if check_db_connection():
-        logger.info("Database connection successful")
-        # Initialize database tables (will skip if pgvector is missing)
-        try:
-            init_db()
-        except Exception as e:
-            logger.warning(f"Database initialization skipped/failed: {e}")
-    else:
-        logger.warning("Database connection failed - some features may not work")
+    threading.Thread(target=_prewarm_imports, name="prewarm", daemon=True).start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down Forseti Emblem RAG Backend")
+    stop_health_monitor()
+    stop_job_workers()
+    shutdown_parse_pool()
 
 
 app = FastAPI(
@@ -53,9 +104,16 @@ app = FastAPI(
     description="RAG-powered API for Fire Emblem game knowledge",
     version="0.1.0",
     lifespan=lifespan,
+    # Without docs, neither the routes nor the schema are ever built
+    docs_url="/docs" if settings.docs_served else None,
+    redoc_url="/redoc" if settings.docs_served else None,
+    openapi_url="/openapi.json" if settings.docs_served else None,
 )
 
-docs_auth_enabled, docs_auth_mode = setup_docs_auth(app, logger=logger)
+if settings.docs_served:
+    docs_auth_enabled, docs_auth_mode = setup_docs_auth(app, logger=logger)
+else:
+    docs_auth_enabled, docs_auth_mode = False, settings.docs_auth_mode
 
 # CORS configuration for frontend access
 app.add_middleware(
@@ -66,24 +124,57 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
 
 @app.get("/health", tags=["system"])
 def health() -> dict:
-    """Health check endpoint."""
-    db_status = "connected" if check_db_connection() else "disconnected"
-    vector_status = (
-        "available"
-        if (db_status == "connected" and pgvector_available())
-        else "missing"
-    )
+    """Health check endpoint (database status from the cached health check)."""
+    status = health_status()
     return {
         "status": "ok",
         "environment": settings.environment,
-        "database": db_status,
-        "pgvector": vector_status,
+        "database": status["database"],
+        "pgvector": status["pgvector"],
     }
 
 
+@app.get("/health/live", tags=["system"])
+def health_live() -> dict:
+    """Liveness probe: the process is serving requests. No I/O."""
+    return {"status": "ok"}
+
+
+@app.get("/health/ready", tags=["system"])
+def health_ready(response: Response) -> dict:
+    """
+    Readiness probe: 503 until a recent background check reached the database.
+
+    Also reports connection pool saturation.
+    """
+    status = health_status()
+    if not status["ready"]:
+        response.status_code = 503
+    return {"status": "ready" if status["ready"] else "unavailable", **status}
+
+
+if settings.metrics_served:
+
+    @app.get("/metrics", tags=["system"], include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        """Prometheus scrape endpoint (per-stage latency, tokens, caches, DB pool)."""
+        return PlainTextResponse(
+            render_metrics(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
 @app.get("/config", tags=["system"])
 def get_config() -> dict:
     """
@@ -101,7 +192,9 @@ def get_config() -> dict:
         "openai_api_key_set": bool(settings.openai_api_key),
         "debug": settings.debug,
         "log_level": settings.log_level,
+        "metrics_enabled": settings.metrics_served,
         "cors_allowed_origin": settings.cors_allowed_origin,
+        "docs_enabled": settings.docs_served,
         "docs_auth_enabled": docs_auth_enabled,
         "docs_auth_mode": docs_auth_mode,
     }
@@ -109,3 +202,7 @@ def get_config() -> dict:
 
 app.include_router(wiki.router)
 app.include_router(chat.router)
+app.include_router(jobs.router)
+
+if settings.openapi_schema_path:
+    install_prebuilt_openapi(app, settings.openapi_schema_path)
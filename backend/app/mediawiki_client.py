@@ -1,6 +1,35 @@
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Any, Dict, List
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from .config import settings
+from .metrics import record_cache_lookup
+from .wiki_cache import WikiResponseCache
+
+logger = logging.getLogger(__name__)
+
+# Used when a throttled response has no usable Retry-After header.
+_DEFAULT_RETRY_AFTER_SECONDS = 5.0
+_MAX_RETRY_AFTER_SECONDS = 60.0
+_RETRY_STATUS_CODES = (429, 503)
+# Titles per revisions query (the API's limit for normal clients).
+_REVISIONS_BATCH = 50
+
+
+def _default_cache() -> WikiResponseCache | None:
+    if not settings.mediawiki_cache_path:
+        return None
+    return WikiResponseCache(
+        settings.mediawiki_cache_path,
+        ttl_seconds=settings.mediawiki_cache_ttl_seconds,
+        max_bytes=settings.mediawiki_cache_max_mb * 1024 * 1024,
+    )
 
 
 class MediaWikiClient:
@@ -8,10 +37,89 @@ class MediaWikiClient:
         self,
         api_url: str = "https://fireemblem.fandom.com/api.php",
         user_agent: str = "forsetiemblem-rag-backend/0.1",
+        max_concurrency: int | None = None,
+        maxlag: int | None = None,
+        max_retries: int | None = None,
+        cache: WikiResponseCache | None | bool = True,
     ) -> None:
         self.api_url = api_url
+        # True builds the cache from settings; False/None disables it.
+        self.cache = _default_cache() if cache is True else (cache or None)
+        self.max_concurrency = max(
+            1,
+            settings.mediawiki_max_concurrency
+            if max_concurrency is None
+            else max_concurrency,
+        )
+        self.maxlag = settings.mediawiki_maxlag if maxlag is None else maxlag
+        self.max_retries = (
+            settings.mediawiki_max_retries if max_retries is None else max_retries
+        )
+
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": user_agent})
+        # One keep-alive connection per fetch thread instead of urllib3's 10.
+        adapter = HTTPAdapter(pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # When the wiki asks for a pause, every thread waits until this time.
+        self._paused_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _wait_for_pause(self) -> None:
+        with self._pause_lock:
+            delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pause(self, seconds: float) -> None:
+        with self._pause_lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @staticmethod
+    def _retry_after(response: requests.Response, attempt: int) -> float:
+        value = response.headers.get("Retry-After", "")
+        try:
+            seconds = float(value)
+        except ValueError:
+            seconds = _DEFAULT_RETRY_AFTER_SECONDS * 2**attempt
+        return min(max(seconds, 0.0), _MAX_RETRY_AFTER_SECONDS)
+
+    def _get(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """GET the API, backing off on maxlag errors, 429 and 503."""
+        if self.maxlag > 0:
+            params = {**params, "maxlag": self.maxlag}
+
+        attempt = 0
+        while True:
+            self._wait_for_pause()
+            response = self.session.get(self.api_url, params=params, timeout=30)
+
+            throttled = response.status_code in _RETRY_STATUS_CODES
+            data: Dict[str, Any] = {}
+            if not throttled:
+                response.raise_for_status()
+                data = response.json()
+                throttled = data.get("error", {}).get("code") == "maxlag"
+
+            if not throttled:
+                return data
+            if attempt >= self.max_retries:
+                response.raise_for_status()
+                raise requests.HTTPError(
+                    f"MediaWiki still lagged after {attempt} retries: "
+                    f"{data['error'].get('info', 'maxlag')}",
+                    response=response,
+                )
+
+            delay = self._retry_after(response, attempt)
+            logger.warning(
+                f"MediaWiki asked to back off (HTTP {response.status_code}); "
+                f"retrying in {delay:.1f}s"
+            )
+            self._pause(delay)
+            attempt += 1
 
     def fetch_category_members(
         self, category_name: str, limit: int = 50
@@ -31,9 +139,7 @@ class MediaWikiClient:
             if cont:
                 params.update(cont)
 
-            response = self.session.get(self.api_url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get(params)
 
             batch = data.get("query", {}).get("categorymembers", [])
             members.extend(batch)
@@ -47,62 +153,195 @@ class MediaWikiClient:
 
         return members
 
-    def fetch_page_html(self, title: str) -> Dict[str, Any]:
+    def _current_revids(self, titles: List[str]) -> Dict[str, int]:
+        """Latest revid of each title that exists, keyed by the title as given."""
+        revids: Dict[str, int] = {}
+        for start in range(0, len(titles), _REVISIONS_BATCH):
+            batch = titles[start : start + _REVISIONS_BATCH]
+            data = self._get(
+                {
+                    "action": "query",
+                    "format": "json",
+                    "prop": "revisions",
+                    "rvprop": "ids",
+                    "titles": "|".join(batch),
+                    "formatversion": "2",
+                }
+            )
+            query = data.get("query", {})
+            normalized = {n["from"]: n["to"] for n in query.get("normalized", [])}
+            latest = {
+                page["title"]: page["revisions"][0]["revid"]
+                for page in query.get("pages", [])
+                if page.get("revisions")
+            }
+            for title in batch:
+                revid = latest.get(normalized.get(title, title))
+                if revid is not None:
+                    revids[title] = revid
+        return revids
+
+    def current_revids(self, titles: List[str], prop: str = "text") -> Dict[str, int]:
+        """Latest revids for validators: fresh cache entries, else one query."""
+        revids = self.cache.fresh_revids("parse", titles, prop) if self.cache else {}
+        missing = [title for title in titles if title not in revids]
+        if missing:
+            revids.update(self._current_revids(missing))
+        return revids
+
+    def category_revisions(
+        self, category_name: str, limit: int = 10
+    ) -> List[tuple[str, int | None]]:
+        """`(title, revid)` of a category's pages, without fetching their HTML."""
+        members = self.fetch_category_members(category_name=category_name, limit=limit)
+        titles = [m["title"] for m in members if m.get("title")]
+        revids = self.current_revids(titles, "text")
+        return [(title, revids.get(title)) for title in titles]
+
+    def _revalidate(self, titles: List[str], prop: str) -> None:
+        """Renew stale cache entries whose page has not been edited since."""
+        if self.cache is None:
+            return
+        stale = self.cache.stale_revids("parse", titles, prop)
+        if not stale:
+            return
+        current = self._current_revids(list(stale))
+        for title, revid in stale.items():
+            if current.get(title) == revid:
+                self.cache.touch("parse", title, prop)
+            else:
+                self.cache.delete("parse", title, prop)
+
+    def _parse(self, title: str, prop: str) -> Dict[str, Any]:
+        """`action=parse` output for a page, served from the cache when current."""
+        if self.cache is not None:
+            cached = self.cache.get("parse", title, prop)
+            if cached is not None and cached.stale:
+                self._revalidate([title], prop)
+                cached = self.cache.get("parse", title, prop)
+            record_cache_lookup("mediawiki", hit=cached is not None)
+            if cached is not None:
+                return cached.data
+
         params = {
             "action": "parse",
             "format": "json",
             "page": title,
-            "prop": "text",
+            "prop": prop,
             "formatversion": "2",
         }
+        parsed = self._get(params).get("parse", {})
 
-        response = self.session.get(self.api_url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        if self.cache is not None and parsed:
+            self.cache.put("parse", title, prop, parsed, parsed.get("revid"))
+        return parsed
 
-        parsed = data.get("parse", {})
+    def fetch_page_html(self, title: str) -> Dict[str, Any]:
+        parsed = self._parse(title, "text")
         html = parsed.get("text", "")
 
         return {
             "pageid": parsed.get("pageid"),
             "title": parsed.get("title", title),
+            "revid": parsed.get("revid"),
             "html": html,
         }
 
     def fetch_page_wikitext(self, title: str) -> Dict[str, Any]:
-        params = {
-            "action": "parse",
-            "format": "json",
-            "page": title,
-            "prop": "wikitext",
-            "formatversion": "2",
-        }
-
-        response = self.session.get(self.api_url, params=params, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        parsed = data.get("parse", {})
+        parsed = self._parse(title, "wikitext")
         wikitext = parsed.get("wikitext", "")
 
         return {
             "pageid": parsed.get("pageid"),
             "title": parsed.get("title", title),
+            "revid": parsed.get("revid"),
             "wikitext": wikitext,
         }
 
     def fetch_pages_in_category(
         self, category_name: str, limit: int = 10
     ) -> List[Dict[str, Any]]:
+        """Fetch HTML for a category's pages in parallel, in category order."""
         members = self.fetch_category_members(category_name=category_name, limit=limit)
+        members = [member for member in members if member.get("title")]
+        if not members:
+            return []
+        # One revisions query renews every stale page instead of one per page.
+        self._revalidate([m["title"] for m in members], "text")
+
+        workers = min(self.max_concurrency, len(members))
+        if workers == 1:
+            html_pages = [self.fetch_page_html(title=m["title"]) for m in members]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="mediawiki"
+            ) as executor:
+                html_pages = list(
+                    executor.map(
+                        lambda m: self.fetch_page_html(title=m["title"]), members
+                    )
+                )
 
         pages: List[Dict[str, Any]] = []
-        for member in members:
-            title = member.get("title")
-            if not title:
-                continue
-            page = self.fetch_page_html(title=title)
+        for member, page in zip(members, html_pages):
             page["pageid"] = member.get("pageid", page.get("pageid"))
             pages.append(page)
 
         return pages
+
+    def iter_pages_in_category(
+        self, category_name: str, limit: int = 10
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield a category's pages as each fetch completes (not in category
+        order; each page carries its category position as `index`).
+
+        At most `max_concurrency` pages are held at once, counting the one
+        being yielded, fetches still running and finished pages waiting their
+        turn. A slow consumer holds back new fetches, so memory is bounded by
+        the concurrency, not by `limit`.
+        """
+        members = self.fetch_category_members(category_name=category_name, limit=limit)
+        members = [member for member in members if member.get("title")]
+        if not members:
+            return
+        self._revalidate([m["title"] for m in members], "text")
+
+        queued = iter(enumerate(members))
+        in_flight: Dict[Future, tuple[int, Dict[str, Any]]] = {}
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_concurrency, len(members)),
+            thread_name_prefix="mediawiki",
+        ) as executor:
+
+            def fill() -> None:
+                while len(in_flight) < self.max_concurrency:
+                    item = next(queued, None)
+                    if item is None:
+                        return
+                    future = executor.submit(self.fetch_page_html, item[1]["title"])
+                    in_flight[future] = item
+
+            fill()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, member = in_flight.pop(future)
+                    page = future.result()
+                    page["pageid"] = member.get("pageid", page.get("pageid"))
+                    page["index"] = index
+                    yield page
+                fill()
+
+
+_client: MediaWikiClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_mediawiki_client() -> MediaWikiClient:
+    """Process-wide client, so API requests and job workers share its cache."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MediaWikiClient()
+    return _client
@@ -0,0 +1,359 @@
+"""Prometheus-style metrics for request stages, token usage, caches and the DB pool.
+
+Metrics are kept in-process and rendered in the Prometheus text exposition
+format by `render_metrics()`, which backs the `/metrics` endpoint. Each
+uvicorn worker keeps its own registry, so scrape every instance separately.
+
+Usage:
+    with track_stage("embedding"):
+        vector = create_embedding(query)
+
+    record_token_usage(usage, model=settings.openai_chat_model)
+    record_cache_lookup("chapter_catalog", hit=True)
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable
+from contextlib import contextmanager
+from typing import Any, TypeVar
+
+
+# Latency buckets (seconds) tuned for a chat request: sub-ms limiter calls up to
+# multi-second chat completions.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelKey = tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        f'{name}="{_escape_label_value(str(value))}"'
+        for name, value in zip(names, values)
+    ]
+    if not pairs:
+        return ""
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames: LabelKey = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def render(self) -> list[str]:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+    def reset(self) -> None:  # pragma: no cover - overridden
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter, optionally split by labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        key = self._key(labels)
+        with self._lock:
+            return self._values.get(key, 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        for key, value in items:
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            )
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds (Prometheus semantics)."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+                self._counts[key] = counts
+                self._sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            counts[-1] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: Any) -> int:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            return counts[-1] if counts else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, list(counts), self._sums[key])
+                for key, counts in self._counts.items()
+            )
+        lines = self._header()
+        for key, counts, total in items:
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                names = (*self.labelnames, "le")
+                values = (*key, _format_value(bound))
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, values)} {count}"
+                )
+            label_str = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {counts[-1]}")
+        return lines
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._sums.clear()
+
+
+class GaugeCollector(_Metric):
+    """Gauge whose samples are computed by a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], Iterable[tuple[dict[str, str], float]]],
+        labelnames: Iterable[str] = (),
+    ):
+        super().__init__(name, help_text, labelnames)
+        self._collect = collect
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, value in self._collect():
+            key = self._key(labels)
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            )
+        return lines
+
+    def reset(self) -> None:
+        return None
+
+
+_REGISTRY: list[_Metric] = []
+
+MetricT = TypeVar("MetricT", bound=_Metric)
+
+
+def register(metric: MetricT) -> MetricT:
+    """Add a metric to the registry rendered at `/metrics`."""
+    _REGISTRY.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """Render every registered metric in the Prometheus text format."""
+    lines: list[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Clear all recorded samples (used by tests)."""
+    for metric in _REGISTRY:
+        metric.reset()
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+REQUEST_STAGE_SECONDS = register(
+    Histogram(
+        "forseti_request_stage_seconds",
+        "Time spent in each request stage (limiter, turnstile, embedding, ...)",
+        labelnames=("stage",),
+    )
+)
+
+OPENAI_TOKENS_TOTAL = register(
+    Counter(
+        "forseti_openai_tokens_total",
+        "OpenAI tokens consumed, by model and token kind",
+        labelnames=("model", "kind"),
+    )
+)
+
+CACHE_REQUESTS_TOTAL = register(
+    Counter(
+        "forseti_cache_requests_total",
+        "Cache lookups by cache name and result (hit/miss)",
+        labelnames=("cache", "result"),
+    )
+)
+
+
+EMBEDDING_BATCH_SIZE = register(
+    Histogram(
+        "forseti_embedding_batch_size",
+        "Query embeddings sent per coalesced embeddings request",
+        buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+    )
+)
+
+
+def _collect_cache_hit_ratio() -> list[tuple[dict[str, str], float]]:
+    with CACHE_REQUESTS_TOTAL._lock:
+        values = dict(CACHE_REQUESTS_TOTAL._values)
+
+    totals: dict[str, list[float]] = {}
+    for (cache, result), value in values.items():
+        entry = totals.setdefault(cache, [0.0, 0.0])
+        if result == "hit":
+            entry[0] += value
+        entry[1] += value
+
+    return [
+        ({"cache": cache}, hits / total)
+        for cache, (hits, total) in sorted(totals.items())
+        if total > 0
+    ]
+
+
+register(
+    GaugeCollector(
+        "forseti_cache_hit_ratio",
+        "Fraction of cache lookups that were hits since process start",
+        collect=_collect_cache_hit_ratio,
+        labelnames=("cache",),
+    )
+)
+
+
+def _collect_db_pool() -> list[tuple[dict[str, str], float]]:
+    # Imported lazily so importing metrics never creates the engine.
+    from .db import pool_status
+
+    return [({"state": state}, float(value)) for state, value in pool_status().items()]
+
+
+register(
+    GaugeCollector(
+        "forseti_db_pool_connections",
+        "SQLAlchemy connection pool state (size, checked_in, checked_out, overflow)",
+        collect=_collect_db_pool,
+        labelnames=("state",),
+    )
+)
+
+
+@contextmanager
+def track_stage(stage: str) -> Generator[None, None, None]:
+    """Time the wrapped block and record it under the given stage name.
+
+    Durations are recorded even when the block raises, so failed OpenAI calls
+    and rejected rate-limit checks still show up in the histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REQUEST_STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def record_token_usage(usage: dict[str, int] | None, *, model: str) -> None:
+    """Add an OpenAI usage dict (prompt/completion/total tokens) to the counters."""
+    if not usage:
+        return
+    for kind in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        value = usage.get(kind)
+        if isinstance(value, int) and value > 0:
+            OPENAI_TOKENS_TOTAL.inc(value, model=model, kind=kind)
+
+
+def record_cache_lookup(cache: str, *, hit: bool) -> None:
+    """Count a cache lookup so `/metrics` can report hit ratios per cache."""
+    CACHE_REQUESTS_TOTAL.inc(cache=cache, result="hit" if hit else "miss")
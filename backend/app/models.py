@@ -3,9 +3,11 @@ from datetime import datetime
 from pgvector.sqlalchemy import Vector
 from sqlalchemy import (
     JSON,
+    Boolean,
     Column,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -52,6 +54,8 @@ class ChapterChunk(Base):
     chunk_index = Column(Integer, nullable=False)
     text = Column(Text, nullable=False)
     embedding = Column(Vector(1536), nullable=True)
+    # Vectors from EMBEDDING_PROVIDER=local (see providers.embedding_column_name)
+    embedding_local = Column(Vector(384), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     chapter = relationship("Chapter", back_populates="chunks")
@@ -61,3 +65,27 @@ class ChapterChunk(Base):
             "chapter_id", "kind", "chunk_index", name="uix_chapter_chunk_order"
         ),
     )
+
+
+class IngestJob(Base):
+    """A queued ingest/reingest of one wiki page, run by `app.job_queue` workers."""
+
+    __tablename__ = "ingest_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)
+    title = Column(String(255), nullable=False)
+    generate_embeddings = Column(Boolean, nullable=False, default=True)
+    status = Column(String(20), nullable=False, default="queued")
+    stage = Column(String(50), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow, nullable=False)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (Index("ix_ingest_jobs_status_run_after", "status", "run_after"),)
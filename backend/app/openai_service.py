@@ -2,24 +2,32 @@
 OpenAI service for embeddings and chat completions.
 
 Provides functions to generate embeddings for text chunks
-and handle RAG-based question answering.
+and handle RAG-based question answering. The actual backend is chosen by
+`providers` (OpenAI by default, deterministic fakes for offline load tests).
 """
 
 import logging
-from typing import Any
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, Any
 
 from .config import settings
+from .embedding_batcher import get_embedding_batcher
+from .embedding_coalescer import get_embedding_coalescer
+from .metrics import record_token_usage
+from .providers import get_chat_provider
+
+
+if TYPE_CHECKING:
+    # The SDK takes ~0.5s to import; it is loaded with the first client.
+    from openai import OpenAI
 
 
 logger = logging.getLogger(__name__)
 
 # Initialize OpenAI client (lazy initialization)
-_client: OpenAI | None = None
+_client: "OpenAI | None" = None
 
 
-def get_openai_client() -> OpenAI:
+def get_openai_client() -> "OpenAI":
     """Get or create OpenAI client instance."""
     global _client
     if _client is None:
@@ -27,6 +35,8 @@ def get_openai_client() -> OpenAI:
             raise ValueError(
                 "OPENAI_API_KEY is not set. Please set it in your .env file or environment variables."
             )
+        from openai import OpenAI
+
         _client = OpenAI(api_key=settings.openai_api_key)
     return _client
 
@@ -41,46 +51,29 @@ def create_embedding(text: str) -> list[float]:
     Returns:
         List of floats representing the embedding vector (1536 dimensions for text-embedding-3-small)
     """
-    client = get_openai_client()
-
     # Clean and truncate text if needed (max ~8000 tokens for embedding models)
     text = text.strip()
     if not text:
         raise ValueError("Cannot create embedding for empty text")
 
-    response = client.embeddings.create(
-        model=settings.openai_embedding_model,
-        input=text,
-    )
-
-    return response.data[0].embedding
+    # Concurrent callers share one embeddings request (see embedding_coalescer)
+    return get_embedding_coalescer().embed(text)
 
 
-def create_embeddings_batch(texts: list[str]) -> list[list[float]]:
+def create_embeddings_batch(texts: list[str]) -> list[list[float] | None]:
     """
-    Create embeddings for multiple texts in a single API call.
+    Create embeddings for any number of texts.
+
+    Requests are packed by token count, run concurrently under the shared
+    rate budget and retried on 429/5xx (see `embedding_batcher`).
 
     Args:
         texts: List of texts to embed
 
     Returns:
-        List of embedding vectors
+        One embedding per input, in input order (None for blank texts)
     """
-    client = get_openai_client()
-
-    # Filter out empty texts
-    cleaned_texts = [t.strip() for t in texts if t.strip()]
-    if not cleaned_texts:
-        return []
-
-    response = client.embeddings.create(
-        model=settings.openai_embedding_model,
-        input=cleaned_texts,
-    )
-
-    # Sort by index to maintain order
-    sorted_data = sorted(response.data, key=lambda x: x.index)
-    return [item.embedding for item in sorted_data]
+    return get_embedding_batcher().embed(texts)
 
 
 def chat_completion(
@@ -101,7 +94,7 @@ def chat_completion(
     Returns:
         Assistant's response text
     """
-    client = get_openai_client()
+    provider = get_chat_provider()
 
     messages: list[dict[str, Any]] = [{"role": "system", "content": system_prompt}]
 
@@ -115,24 +108,9 @@ def chat_completion(
     else:
         messages.append({"role": "user", "content": user_message})
 
-    response = client.chat.completions.create(
-        model=settings.openai_chat_model,
-        messages=messages,
-        temperature=temperature,
-    )
-
-    text = response.choices[0].message.content or ""
-
-    usage_obj = getattr(response, "usage", None)
-    usage: dict[str, int] | None = None
-    if usage_obj is not None:
-        candidate: dict[str, Any] = {
-            "prompt_tokens": getattr(usage_obj, "prompt_tokens", None),
-            "completion_tokens": getattr(usage_obj, "completion_tokens", None),
-            "total_tokens": getattr(usage_obj, "total_tokens", None),
-        }
-        filtered = {k: v for k, v in candidate.items() if isinstance(v, int)}
-        usage = filtered or None
+    text, usage = provider.complete(messages, temperature)
+
+    record_token_usage(usage, model=provider.model)
 
     return text, usage
 
@@ -0,0 +1,110 @@
+"""
+Process pool for CPU-heavy page parsing.
+
+lxml and mwparserfromhell hold the GIL, so parsing the pages of a category
+preview on request threads uses one core at most. `start_parse_pool` (called
+from the app lifespan) starts `PARSE_WORKERS` processes; `run_parser` and
+`map_parser` send a picklable parser function from `parsers.py` there and
+return its plain-dict result. Without a pool, or if the pool breaks, they
+parse inline instead.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_executor: ProcessPoolExecutor | None = None
+_workers = 0
+_lock = threading.Lock()
+
+
+def _warm_up(_: int) -> None:
+    """Import the parsers (lxml, mwparserfromhell) before the first request."""
+    from .parsers import parse_page_html  # noqa: F401
+
+
+def _start(workers: int) -> ProcessPoolExecutor:
+    # "spawn" avoids forking a process that already runs an event loop and
+    # threads (DB pool, Redis client).
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    list(executor.map(_warm_up, range(workers)))
+    return executor
+
+
+def start_parse_pool(workers: int | None = None) -> bool:
+    """Start the pool; returns False when parsing stays inline."""
+    global _executor, _workers
+    workers = settings.parse_workers if workers is None else workers
+    if workers <= 0:
+        return False
+
+    with _lock:
+        if _executor is None:
+            _executor = _start(workers)
+            _workers = workers
+    logger.info(f"Parse pool started with {workers} worker processes")
+    return True
+
+
+def shutdown_parse_pool() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _restart(broken: ProcessPoolExecutor) -> None:
+    """Replace a pool whose worker died, so later calls use processes again."""
+    global _executor
+    with _lock:
+        if _executor is not broken:
+            return
+        _executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            _executor = _start(_workers)
+        except Exception as e:
+            logger.error(f"Parse pool restart failed, parsing inline: {e}")
+
+
+def run_parser(func: Callable[..., T], *args: Any) -> T:
+    """Run `func(*args)` in the pool, or inline when there is no pool."""
+    executor = _executor
+    if executor is None:
+        return func(*args)
+    try:
+        return executor.submit(func, *args).result()
+    except BrokenProcessPool:
+        logger.warning("Parse pool is broken; restarting and parsing inline")
+        _restart(executor)
+        return func(*args)
+
+
+def map_parser(func: Callable[[Any], T], items: Iterable[Any]) -> list[T]:
+    """`[func(item) for item in items]`, spread across the pool, in order."""
+    items = list(items)
+    executor = _executor
+    if executor is None or len(items) < 2:
+        return [run_parser(func, item) for item in items]
+    try:
+        return list(executor.map(func, items))
+    except BrokenProcessPool:
+        logger.warning("Parse pool is broken; restarting and parsing inline")
+        _restart(executor)
+        return [func(item) for item in items]
@@ -1,17 +1,39 @@
+from collections import OrderedDict
+from collections.abc import Iterable
+import hashlib
+import re
+import threading
 from typing import Any, Dict, List
 
 import mwparserfromhell
-from bs4 import BeautifulSoup, Tag
-import re
+from lxml import etree
+from mwparserfromhell.nodes import Heading, Node, Template, Text
+from mwparserfromhell.wikicode import Wikicode
+
+from .config import settings
+from .html_document import (
+    HtmlDocument,
+    as_document,
+    class_predicate,
+    element_text,
+    first,
+    HtmlBlockStream,
+)
+from .metrics import record_cache_lookup
+
+
+# Bump whenever a change makes the parsers return something different for
+# the same page; /wiki preview ETags include it.
+PARSER_VERSION = 2
 
 
-def parse_chapter_page(html: str) -> Dict[str, Any]:
-    soup = BeautifulSoup(html, "html.parser")
-    root = soup.find("div", class_="mw-parser-output") or soup
+def parse_chapter_page(html: str | HtmlDocument) -> Dict[str, Any]:
+    document = as_document(html)
+    root = document.content
 
     infobox = {}
-    aside = root.find("aside")
-    if aside:
+    aside = first(root.iter("aside"))
+    if aside is not None:
         infobox = _parse_infobox(aside)
 
     sections = _parse_sections(root)
@@ -22,36 +44,44 @@ def parse_chapter_page(html: str) -> Dict[str, Any]:
     }
 
 
-def _parse_infobox(aside: Tag) -> Dict[str, Any]:
-    title_tag = aside.find(class_="pi-title") or aside.find("h2") or aside.find("h1")
-    title = title_tag.get_text(" ", strip=True) if title_tag else None
+_PI_TITLE_XPATH = etree.XPath(f".//*[{class_predicate('pi-title')}]")
+_PI_DATA_XPATH = etree.XPath(f".//*[{class_predicate('pi-data')}]")
+_PI_LABEL_XPATH = etree.XPath(f".//*[{class_predicate('pi-data-label')}]")
+_PI_VALUE_XPATH = etree.XPath(f".//*[{class_predicate('pi-data-value')}]")
+_PI_GROUP_XPATH = etree.XPath(f"ancestor::*[{class_predicate('pi-group')}][1]")
+_PI_HEADER_XPATH = etree.XPath(f".//*[{class_predicate('pi-header')}] | .//h2 | .//h3")
 
-    image_tag = aside.find("img")
+
+def _parse_infobox(aside: etree._Element) -> Dict[str, Any]:
+    title_tag = first(_PI_TITLE_XPATH(aside))
+    if title_tag is None:
+        title_tag = first(aside.iter("h2"))
+    if title_tag is None:
+        title_tag = first(aside.iter("h1"))
+    title = element_text(title_tag, " ") if title_tag is not None else None
+
+    image_tag = first(aside.iter("img"))
     image = None
-    if image_tag:
+    if image_tag is not None:
         image = {
             "src": image_tag.get("src"),
             "alt": image_tag.get("alt"),
         }
 
     fields: List[Dict[str, Any]] = []
-    for data in aside.select(".pi-data"):
-        label_tag = data.select_one(".pi-data-label")
-        value_tag = data.select_one(".pi-data-value")
-
-        label = label_tag.get_text(" ", strip=True) if label_tag else None
-        value_text = (
-            value_tag.get_text(" ", strip=True)
-            if value_tag
-            else data.get_text(" ", strip=True)
-        )
+    for data in _PI_DATA_XPATH(aside):
+        label_tag = first(_PI_LABEL_XPATH(data))
+        value_tag = first(_PI_VALUE_XPATH(data))
+
+        label = element_text(label_tag, " ") if label_tag is not None else None
+        value_text = element_text(value_tag if value_tag is not None else data, " ")
 
         group_title = None
-        group = data.find_parent(class_="pi-group")
-        if group:
-            header = group.find(class_="pi-header") or group.find(["h2", "h3"])
-            if header:
-                group_title = header.get_text(" ", strip=True)
+        group = first(_PI_GROUP_XPATH(data))
+        if group is not None:
+            header = _infobox_group_header(group)
+            if header is not None:
+                group_title = element_text(header, " ")
 
         fields.append(
             {
@@ -68,195 +98,302 @@ def _parse_infobox(aside: Tag) -> Dict[str, Any]:
     }
 
 
-def _parse_sections(root: Tag) -> List[Dict[str, Any]]:
+def _infobox_group_header(group: etree._Element) -> etree._Element | None:
+    """The group's `pi-header`, falling back to its first h2/h3."""
+    candidates = _PI_HEADER_XPATH(group)
+    for candidate in candidates:
+        if "pi-header" in (candidate.get("class") or "").split():
+            return candidate
+    return first(candidates)
+
+
+def _parse_sections(root: etree._Element) -> List[Dict[str, Any]]:
     sections: List[Dict[str, Any]] = []
-    current_section: Dict[str, Any] | None = None
+    for child in root:
+        _add_section_block(sections, child)
+    return sections
 
-    for child in root.children:
-        if not isinstance(child, Tag):
-            continue
 
-        if child.name in ("h2", "h3", "h4"):
-            title = child.get_text(" ", strip=True)
-            if not title:
-                continue
-            current_section = {
-                "title": title,
-                "content": [],
-            }
-            sections.append(current_section)
-            continue
+def _add_section_block(sections: List[Dict[str, Any]], child: etree._Element) -> None:
+    """Fold one top-level content element into `sections`.
 
-        if current_section is None:
+    Headings open a new section; paragraphs and top-level list items are
+    appended to the latest one. Anything before the first heading is ignored.
+    """
+    if not isinstance(child.tag, str):
+        return
+
+    if child.tag in ("h2", "h3", "h4"):
+        title = element_text(child, " ")
+        if title:
+            sections.append(
+                {
+                    "title": title,
+                    "content": [],
+                }
+            )
+        return
+
+    if not sections:
+        return
+    current_section = sections[-1]
+
+    if child.tag == "p":
+        text = element_text(child, " ")
+        if text:
+            current_section["content"].append(text)
+    elif child.tag in ("ul", "ol"):
+        for li in child.iterchildren("li"):
+            li_text = element_text(li, " ")
+            if li_text:
+                current_section["content"].append(li_text)
+
+
+def _table_rows(
+    table: etree._Element,
+) -> tuple[etree._Element | None, List[etree._Element]]:
+    """Header row and remaining rows, nested tables' rows included (as before)."""
+    rows = list(table.iter("tr"))
+    return (rows[0] if rows else None), rows[1:]
+
+
+def extract_tables_as_json(html: str | HtmlDocument) -> List[Dict[str, Any]]:
+    document = as_document(html)
+    tables = (_table_to_json(table) for table in document.tables())
+    return [table for table in tables if table is not None]
+
+
+def _table_to_json(table: etree._Element) -> Dict[str, Any] | None:
+    headers: List[str] = []
+    header_row, body_rows = _table_rows(table)
+
+    if header_row is not None:
+        for th in header_row.iter("th", "td"):
+            header_text = element_text(th)
+            headers.append(header_text)
+
+    rows_data: List[Dict[str, Any]] = []
+    for row in body_rows:
+        cells = list(row.iter("th", "td"))
+        if not cells:
             continue
 
-        if child.name == "p":
-            text = child.get_text(" ", strip=True)
-            if text:
-                current_section["content"].append(text)
-        elif child.name in ("ul", "ol"):
-            for li in child.find_all("li", recursive=False):
-                li_text = li.get_text(" ", strip=True)
-                if li_text:
-                    current_section["content"].append(li_text)
+        row_values: Dict[str, Any] = {}
+        for index, cell in enumerate(cells):
+            key = headers[index] if index < len(headers) else f"col_{index}"
+            row_values[key] = element_text(cell)
 
-    return sections
+        rows_data.append(row_values)
 
+    if not rows_data:
+        return None
 
-def extract_tables_as_json(html: str) -> List[Dict[str, Any]]:
-    soup = BeautifulSoup(html, "html.parser")
-    tables = soup.find_all("table")
+    caption_tag = first(table.iter("caption"))
+    caption = element_text(caption_tag) if caption_tag is not None else None
 
-    result: List[Dict[str, Any]] = []
+    return {
+        "caption": caption,
+        "headers": headers,
+        "rows": rows_data,
+    }
 
-    for table in tables:
-        headers: List[str] = []
-        header_row = table.find("tr")
 
-        if header_row:
-            for th in header_row.find_all(["th", "td"]):
-                header_text = th.get_text(strip=True)
-                headers.append(header_text)
+def extract_tables_as_markdown(html: str | HtmlDocument) -> List[str]:
+    document = as_document(html)
+    tables = (_table_to_markdown(table) for table in document.tables())
+    return [table for table in tables if table is not None]
 
-        rows_data: List[Dict[str, Any]] = []
-        for row in table.find_all("tr")[1:]:
-            cells = row.find_all(["th", "td"])
-            if not cells:
-                continue
 
-            row_values: Dict[str, Any] = {}
-            for index, cell in enumerate(cells):
-                key = headers[index] if index < len(headers) else f"col_{index}"
-                row_values[key] = cell.get_text(strip=True)
+def _table_to_markdown(table: etree._Element) -> str | None:
+    header_row, body_rows = _table_rows(table)
+    headers: List[str] = []
 
-            rows_data.append(row_values)
+    if header_row is not None:
+        for th in header_row.iter("th", "td"):
+            header_text = element_text(th)
+            headers.append(header_text or " ")
 
-        if rows_data:
-            caption_tag = table.find("caption")
-            caption = caption_tag.get_text(strip=True) if caption_tag else None
+    if not headers:
+        return None
 
-            table_data: Dict[str, Any] = {
-                "caption": caption,
-                "headers": headers,
-                "rows": rows_data,
-            }
-            result.append(table_data)
+    header_line = "|" + "|".join(headers) + "|"
+    separator_line = "|" + "|".join("---" for _ in headers) + "|"
 
-    return result
+    body_lines: List[str] = []
+    for row in body_rows:
+        cells = list(row.iter("th", "td"))
+        if not cells:
+            continue
+        values: List[str] = []
+        for index, cell in enumerate(cells):
+            text = element_text(cell)
+            values.append(text or " ")
+        while len(values) < len(headers):
+            values.append(" ")
+        body_line = "|" + "|".join(values[: len(headers)]) + "|"
+        body_lines.append(body_line)
+
+    if not body_lines:
+        return None
+    return "\n".join([header_line, separator_line, *body_lines])
+
+
+def parse_page_streaming(
+    html: str | Iterable[str], as_markdown: bool = False
+) -> Dict[str, Any]:
+    """Parse a chapter page and its tables without building the whole DOM.
+
+    Gives the same result as `parse_chapter_page` plus
+    `extract_tables_as_json` / `extract_tables_as_markdown` on one
+    `HtmlDocument`, but each top-level block is processed as soon as it is
+    closed and then discarded (see `HtmlBlockStream`), so memory stays flat
+    however long the page is. Used for pages above
+    HTML_STREAM_THRESHOLD_CHARS.
+
+    Only difference: tables in an element that wraps the `mw-parser-output`
+    div are listed after the wrapper's own tables. MediaWiki output never
+    nests the wrapper that way.
+    """
+    content: Dict[str, Any] = {"infobox": {}, "sections": []}
+    # Used only when the page has no mw-parser-output wrapper.
+    body: Dict[str, Any] = {"infobox": {}, "sections": []}
+    tables_json: List[Dict[str, Any]] = []
+    tables_markdown: List[str] = []
+
+    stream = HtmlBlockStream(html)
+    for block, in_content in stream:
+        target = content if in_content else body
+        if not target["infobox"]:
+            aside = first(block.iter("aside"))
+            if aside is not None:
+                target["infobox"] = _parse_infobox(aside)
+        _add_section_block(target["sections"], block)
+
+        for table in block.iter("table"):
+            table_json = _table_to_json(table)
+            if table_json is not None:
+                tables_json.append(table_json)
+            if as_markdown:
+                table_markdown = _table_to_markdown(table)
+                if table_markdown is not None:
+                    tables_markdown.append(table_markdown)
 
+    return {
+        "chapter": content if stream.has_content_root else body,
+        "tables_json": tables_json,
+        "tables_markdown": tables_markdown if as_markdown else None,
+    }
 
-def extract_tables_as_markdown(html: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    tables = soup.find_all("table")
 
-    markdown_tables: List[str] = []
+def _use_streaming(html: str) -> bool:
+    threshold = settings.html_stream_threshold_chars
+    return 0 < threshold < len(html)
 
-    for table in tables:
-        header_row = table.find("tr")
-        headers: List[str] = []
 
-        if header_row:
-            for th in header_row.find_all(["th", "td"]):
-                header_text = th.get_text(strip=True)
-                headers.append(header_text or " ")
+def parse_chapter_html(html: str) -> Dict[str, Any]:
+    """`parse_chapter_page`, streaming pages above HTML_STREAM_THRESHOLD_CHARS."""
+    if _use_streaming(html):
+        return parse_page_streaming(html)["chapter"]
+    return parse_chapter_page(html)
 
-        if not headers:
-            continue
 
-        header_line = "|" + "|".join(headers) + "|"
-        separator_line = "|" + "|".join("---" for _ in headers) + "|"
+def parse_page_html(html: str, as_markdown: bool = False) -> Dict[str, Any]:
+    """Chapter fields and tables for one page, streaming very large pages.
 
-        body_lines: List[str] = []
-        for row in table.find_all("tr")[1:]:
-            cells = row.find_all(["th", "td"])
-            if not cells:
-                continue
-            values: List[str] = []
-            for index, cell in enumerate(cells):
-                text = cell.get_text(strip=True)
-                values.append(text or " ")
-            while len(values) < len(headers):
-                values.append(" ")
-            body_line = "|" + "|".join(values[: len(headers)]) + "|"
-            body_lines.append(body_line)
+    Returns plain data only, so it can run in the parse pool.
+    """
+    if _use_streaming(html):
+        return parse_page_streaming(html, as_markdown=as_markdown)
 
-        if body_lines:
-            markdown_table = "\n".join([header_line, separator_line, *body_lines])
-            markdown_tables.append(markdown_table)
+    document = HtmlDocument(html)
+    return {
+        "chapter": parse_chapter_page(document),
+        "tables_json": extract_tables_as_json(document),
+        "tables_markdown": (
+            extract_tables_as_markdown(document) if as_markdown else None
+        ),
+    }
 
-    return markdown_tables
+
+CHAPTER_INFOBOX = "Chapterinfobox"
+# Finds pages using the infobox without parsing them. Mirrors
+# `Template.name.matches`: surrounding whitespace is ignored and the first
+# letter is case-insensitive, as in MediaWiki.
+CHAPTER_INFOBOX_RE = re.compile(r"\{\{\s*[Cc]hapterinfobox\s*(?:\||\}\}|<!--)")
 
 
 def parse_chapter_wikitext(wikitext: str) -> Dict[str, Any]:
-    infobox = _parse_wikitext_infobox(wikitext)
-    sections = _parse_wikitext_sections(wikitext)
+    """Parse summary, infobox and sections from chapter wikitext.
+
+    The page is parsed by mwparserfromhell once, into a tree cached by
+    content hash (see `_get_wikicode`). Infobox params come from the
+    template API, sections from `get_sections`, and stripped text from the
+    same nodes. Multi-line constructs such as tables and multi-line
+    templates are stripped as a whole rather than line by line.
+    """
+    code = _get_wikicode(wikitext)
+    lead = code.get_sections(include_lead=True, flat=True)[0]
+    if lead and isinstance(lead.nodes[0], Heading):
+        lead = Wikicode([])
+
+    infobox: Dict[str, Any] = {}
+    summary: str | None = None
+    for index, node in enumerate(lead.nodes):
+        if isinstance(node, Template) and node.name.matches(CHAPTER_INFOBOX):
+            infobox = _build_wikitext_infobox(
+                {
+                    str(param.name).strip().lower(): str(param.value).strip()
+                    for param in node.params
+                }
+            )
+            summary = _parse_wikitext_summary(lead.nodes[index + 1 :])
+            break
+
+    sections: List[Dict[str, Any]] = []
+    for section in code.get_sections(flat=True, include_lead=False):
+        heading = section.nodes[0]
+        if not isinstance(heading, Heading) or heading.level < 2:
+            continue
+        lines = [
+            line.strip()
+            for _, text in _node_lines(list(section.nodes)[1:])
+            for line in text.splitlines()
+            if line.strip()
+        ]
+        if lines:
+            sections.append(
+                {
+                    "title": str(heading.title).strip(),
+                    "content": lines,
+                }
+            )
+
     return {
-        "summary": _parse_wikitext_summary(wikitext),
+        "summary": summary,
         "infobox": infobox,
         "sections": sections,
     }
 
 
-def _extract_chapterinfobox_block(wikitext: str) -> str | None:
-    marker = "{{Chapterinfobox"
-    start = wikitext.find(marker)
-    if start == -1:
-        return None
-    i = start
-    depth = 0
-    length = len(wikitext)
-    while i < length - 1:
-        pair = wikitext[i : i + 2]
-        if pair == "{{":
-            depth += 1
-            i += 2
-            continue
-        if pair == "}}":
-            depth -= 1
-            i += 2
-            if depth == 0:
-                return wikitext[start:i]
+def _parse_wikitext_summary(nodes: List[Node]) -> str | None:
+    """First bold line after the infobox, skipping templates that follow it."""
+    start = 0
+    while start < len(nodes):
+        node = nodes[start]
+        if isinstance(node, Template) or (
+            isinstance(node, Text) and not node.value.strip()
+        ):
+            start += 1
             continue
-        i += 1
-    return None
+        break
 
+    for source, text in _node_lines(nodes[start:], with_source=True):
+        if "'''" in source and text:
+            return text
+    return None
 
-def _parse_wikitext_infobox(wikitext: str) -> Dict[str, Any]:
-    block = _extract_chapterinfobox_block(wikitext)
-    if not block:
-        return {}
-
-    text = block.strip()
-    if text.startswith("{{"):
-        text = text[2:]
-    if text.lower().startswith("chapterinfobox".lower()):
-        text = text[len("chapterinfobox") :]
-
-    lines = text.splitlines()
-    params: Dict[str, str] = {}
-    current_name: str | None = None
-    current_value_lines: List[str] = []
-
-    for line in lines:
-        stripped = line.lstrip()
-        if stripped.startswith("|"):
-            if current_name is not None:
-                params[current_name] = "\n".join(current_value_lines).strip()
-            body = stripped[1:]
-            if "=" in body:
-                name, value = body.split("=", 1)
-                current_name = name.strip().lower()
-                current_value_lines = [value.strip()]
-            else:
-                current_name = body.strip().lower()
-                current_value_lines = []
-        else:
-            if current_name is not None:
-                current_value_lines.append(stripped)
-
-    if current_name is not None:
-        params[current_name] = "\n".join(current_value_lines).strip()
 
+def _build_wikitext_infobox(params: Dict[str, str]) -> Dict[str, Any]:
     title = params.get("title")
 
     label_map = {
@@ -285,111 +422,72 @@ def _parse_wikitext_infobox(wikitext: str) -> Dict[str, Any]:
     }
 
 
-def _strip_templates_from_section(text: str) -> str:
-    code = mwparserfromhell.parse(text)
-    return code.strip_code().strip()
-
-
-def _parse_wikitext_sections(wikitext: str) -> List[Dict[str, Any]]:
-    sections: List[Dict[str, Any]] = []
-    heading_re = re.compile(r"^==+\s*(.+?)\s*==+\s*$", re.MULTILINE)
-    matches = list(heading_re.finditer(wikitext))
-    if not matches:
-        return sections
-
-    for index, match in enumerate(matches):
-        title = match.group(1)
-        start = match.end()
-        end = matches[index + 1].start() if index + 1 < len(matches) else len(wikitext)
-        body = wikitext[start:end]
-
-        lines: List[str] = []
-        for raw_line in body.splitlines():
-            stripped = raw_line.strip()
-            if not stripped:
-                continue
-            if stripped.startswith("{{") and stripped.endswith("}}"):
-                continue
-            cleaned = _strip_templates_from_section(stripped)
-            if not cleaned:
-                continue
-            lines.append(cleaned)
-
-        if lines:
-            sections.append(
-                {
-                    "title": title,
-                    "content": lines,
-                }
-            )
-
-    return sections
-
-
-def _parse_wikitext_summary(wikitext: str) -> str | None:
-    marker = "{{Chapterinfobox"
-    start = wikitext.find(marker)
-    if start == -1:
-        return None
-
-    i = start
-    depth = 0
-    length = len(wikitext)
-    while i < length - 1:
-        pair = wikitext[i : i + 2]
-        if pair == "{{":
-            depth += 1
-            i += 2
-            continue
-        if pair == "}}":
-            depth -= 1
-            i += 2
-            if depth == 0:
-                break
+_ast_cache: OrderedDict[str, Wikicode] = OrderedDict()
+_ast_cache_lock = threading.Lock()
+
+
+def _get_wikicode(wikitext: str) -> Wikicode:
+    """Parse wikitext into a tree, reusing trees of identical text.
+
+    Trees are kept in an LRU keyed by the SHA-256 of the text, so parsing the
+    same revision twice (preview, then ingest) only pays for the first parse.
+    Callers must treat the returned tree as read-only.
+    """
+    size = settings.wikitext_ast_cache_size
+    if size <= 0:
+        return mwparserfromhell.parse(wikitext)
+
+    key = hashlib.sha256(wikitext.encode("utf-8")).hexdigest()
+    with _ast_cache_lock:
+        code = _ast_cache.get(key)
+        if code is not None:
+            _ast_cache.move_to_end(key)
+    record_cache_lookup("wikitext_ast", hit=code is not None)
+    if code is not None:
+        return code
+
+    code = mwparserfromhell.parse(wikitext)
+    with _ast_cache_lock:
+        _ast_cache[key] = code
+        while len(_ast_cache) > size:
+            _ast_cache.popitem(last=False)
+    return code
+
+
+def clear_wikitext_cache() -> None:
+    """Drop every cached wikitext tree."""
+    with _ast_cache_lock:
+        _ast_cache.clear()
+
+
+def _node_lines(
+    nodes: List[Node], *, with_source: bool = False
+) -> List[tuple[str, str]]:
+    """Split top-level nodes into (source, stripped) text per source line.
+
+    Source text is only rendered when `with_source` is set; otherwise it is
+    empty. A node spanning several lines (a table, a multi-line `<ref>`)
+    stays whole on the line where it starts.
+    """
+    lines: List[tuple[List[str], List[str]]] = [([], [])]
+    for node in nodes:
+        if isinstance(node, Text):
+            for offset, part in enumerate(node.value.split("\n")):
+                if offset:
+                    lines.append(([], []))
+                if with_source:
+                    lines[-1][0].append(part)
+                lines[-1][1].append(part)
             continue
-        i += 1
 
-    end_infobox = i
-    if end_infobox >= length:
-        return None
+        if with_source:
+            lines[-1][0].append(str(node))
+        lines[-1][1].append(_strip_node(node))
 
-    after = wikitext[end_infobox:]
-    after = after.lstrip()
+    return [("".join(source), "".join(text).strip()) for source, text in lines]
 
-    while after.lstrip().startswith("{{"):
-        local = after.lstrip()
-        idx = after.find("{{")
-        if idx == -1:
-            break
-        j = idx
-        d = 0
-        n = len(after)
-        while j < n - 1:
-            p = after[j : j + 2]
-            if p == "{{":
-                d += 1
-                j += 2
-                continue
-            if p == "}}":
-                d -= 1
-                j += 2
-                if d == 0:
-                    break
-                continue
-            j += 1
-        after = after[j:].lstrip()
-
-    heading_match = re.search(r"^==+", after, re.MULTILINE)
-    if heading_match:
-        segment = after[: heading_match.start()]
-    else:
-        segment = after
-
-    for line in segment.splitlines():
-        if "'''" not in line:
-            continue
-        cleaned = _strip_templates_from_section(line)
-        if cleaned:
-            return cleaned
 
-    return None
+def _strip_node(node: Node) -> str:
+    return Wikicode([node]).strip_code(
+        normalize=True, collapse=False, keep_template_params=False
+    )
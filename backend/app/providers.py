@@ -0,0 +1,385 @@
+"""
+Pluggable backends for embeddings, chat completions and latency simulation.
+
+`openai_service` talks to whichever provider the settings select:
+
+- `openai`: the real OpenAI API (default).
+- `fake`: deterministic local stand-ins with configurable latency, used for
+  offline load tests. Same text in, same vector/answer out; no network and no
+  cost.
+- `local` (embeddings only): a sentence-transformers model run on the CPU
+  in-process. Its vectors have a different size, so they are stored in
+  `chapter_chunks.embedding_local` (see `embedding_column_name`).
+
+Fake providers are refused in production so a misconfigured deployment can
+never answer users with canned responses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Protocol
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_DIMENSIONS = 1536
+LOCAL_EMBEDDING_DIMENSIONS = 384
+
+
+def embedding_column_name() -> str:
+    """`ChapterChunk` column holding vectors from the configured provider."""
+    return "embedding_local" if settings.embedding_provider == "local" else "embedding"
+
+
+class EmbeddingProvider(Protocol):
+    model: str
+
+    def embed(
+        self, texts: list[str]
+    ) -> tuple[list[list[float]], dict[str, int] | None]:
+        """Embed non-empty texts, returning vectors in input order plus usage."""
+        ...
+
+
+class ChatProvider(Protocol):
+    model: str
+
+    def complete(
+        self, messages: list[dict[str, Any]], temperature: float
+    ) -> tuple[str, dict[str, int] | None]:
+        """Return the assistant text and token usage for a message list."""
+        ...
+
+
+class LatencySimulator:
+    """Sleeps for a duration drawn from a configurable distribution.
+
+    `fixed` always waits `median_ms`; `uniform` draws from
+    median ± median*jitter; `lognormal` has the given median and uses
+    `jitter` as sigma, which gives the long right tail real APIs show.
+    Draws come from a seeded RNG so runs are reproducible.
+    """
+
+    def __init__(
+        self,
+        median_ms: float,
+        *,
+        distribution: str = "lognormal",
+        jitter: float = 0.25,
+        seed: int = 0,
+    ) -> None:
+        self.median_ms = max(0.0, median_ms)
+        self.distribution = distribution
+        self.jitter = max(0.0, jitter)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample_ms(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        with self._lock:
+            if self.distribution == "fixed":
+                return self.median_ms
+            if self.distribution == "uniform":
+                spread = self.median_ms * self.jitter
+                return max(
+                    0.0,
+                    self._rng.uniform(self.median_ms - spread, self.median_ms + spread),
+                )
+            return self._rng.lognormvariate(math.log(self.median_ms), self.jitter)
+
+    def wait(self) -> None:
+        delay_ms = self.sample_ms()
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+
+def make_latency(median_ms: float, *, salt: int = 0) -> LatencySimulator:
+    return LatencySimulator(
+        median_ms,
+        distribution=settings.fake_latency_distribution,
+        jitter=settings.fake_latency_jitter,
+        seed=settings.fake_seed + salt,
+    )
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; good enough for fake usage.
+    return max(1, len(text) // 4)
+
+
+class OpenAIEmbeddingProvider:
+    """Embeddings through the OpenAI API."""
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+
+    def embed(
+        self, texts: list[str]
+    ) -> tuple[list[list[float]], dict[str, int] | None]:
+        from .openai_service import get_openai_client
+
+        response = get_openai_client().embeddings.create(
+            model=self.model,
+            input=texts,
+        )
+
+        # Sort by index to maintain order
+        sorted_data = sorted(response.data, key=lambda x: x.index)
+        vectors = [item.embedding for item in sorted_data]
+
+        usage_obj = getattr(response, "usage", None)
+        usage: dict[str, int] | None = None
+        if usage_obj is not None:
+            candidate: dict[str, Any] = {
+                "prompt_tokens": getattr(usage_obj, "prompt_tokens", None),
+                "total_tokens": getattr(usage_obj, "total_tokens", None),
+            }
+            filtered = {k: v for k, v in candidate.items() if isinstance(v, int)}
+            usage = filtered or None
+
+        return vectors, usage
+
+
+class OpenAIChatProvider:
+    """Chat completions through the OpenAI API."""
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+
+    def complete(
+        self, messages: list[dict[str, Any]], temperature: float
+    ) -> tuple[str, dict[str, int] | None]:
+        from .openai_service import get_openai_client
+
+        response = get_openai_client().chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+        )
+
+        text = response.choices[0].message.content or ""
+
+        usage_obj = getattr(response, "usage", None)
+        usage: dict[str, int] | None = None
+        if usage_obj is not None:
+            candidate: dict[str, Any] = {
+                "prompt_tokens": getattr(usage_obj, "prompt_tokens", None),
+                "completion_tokens": getattr(usage_obj, "completion_tokens", None),
+                "total_tokens": getattr(usage_obj, "total_tokens", None),
+            }
+            filtered = {k: v for k, v in candidate.items() if isinstance(v, int)}
+            usage = filtered or None
+
+        return text, usage
+
+
+class LocalEmbeddingProvider:
+    """Sentence-transformers embeddings computed on the CPU in-process.
+
+    Inference runs on a small dedicated thread pool: the model releases the
+    GIL while encoding, so a batch is split across `threads` workers, and the
+    pool caps how many encodes compete for cores with request handling.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        *,
+        backend: str = "torch",
+        batch_size: int = 32,
+        threads: int = 2,
+        model: Any | None = None,
+    ) -> None:
+        self.model = model_name
+        self.batch_size = max(1, batch_size)
+        if model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise RuntimeError(
+                    "EMBEDDING_PROVIDER=local needs the sentence-transformers "
+                    "package (pip install sentence-transformers)"
+                ) from e
+            kwargs: dict[str, Any] = {"device": "cpu"}
+            if backend != "torch":
+                kwargs["backend"] = backend
+            model = SentenceTransformer(model_name, **kwargs)
+        dimensions = model.get_sentence_embedding_dimension()
+        if dimensions != LOCAL_EMBEDDING_DIMENSIONS:
+            # Vector(384) in migration 0003 would reject every insert later
+            raise ValueError(
+                f"LOCAL_EMBEDDING_MODEL={model_name} outputs {dimensions} "
+                f"dimensions, but the embedding_local column holds "
+                f"{LOCAL_EMBEDDING_DIMENSIONS}; pick a model with that size"
+            )
+        self._model = model
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, threads), thread_name_prefix="local-embedding"
+        )
+
+    def _encode(self, texts: list[str]) -> list[list[float]]:
+        vectors = self._model.encode(
+            texts,
+            batch_size=self.batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    def embed(
+        self, texts: list[str]
+    ) -> tuple[list[list[float]], dict[str, int] | None]:
+        batches = [
+            texts[start : start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        vectors: list[list[float]] = []
+        for batch_vectors in self._executor.map(self._encode, batches):
+            vectors.extend(batch_vectors)
+        # No API usage to report for local inference.
+        return vectors, None
+
+
+class FakeEmbeddingProvider:
+    """Deterministic unit vectors derived from a hash of each text."""
+
+    model = "fake-embedding"
+
+    def __init__(
+        self,
+        *,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        latency: LatencySimulator | None = None,
+    ) -> None:
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def vector_for(self, text: str) -> list[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        values = [rng.gauss(0.0, 1.0) for _ in range(self.dimensions)]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed(
+        self, texts: list[str]
+    ) -> tuple[list[list[float]], dict[str, int] | None]:
+        if self.latency is not None:
+            self.latency.wait()
+        tokens = sum(_estimate_tokens(t) for t in texts)
+        usage = {"prompt_tokens": tokens, "total_tokens": tokens}
+        return [self.vector_for(t) for t in texts], usage
+
+
+class FakeChatProvider:
+    """Canned, deterministic answers that echo the question."""
+
+    model = "fake-chat"
+
+    def __init__(self, *, latency: LatencySimulator | None = None) -> None:
+        self.latency = latency
+
+    def complete(
+        self, messages: list[dict[str, Any]], temperature: float
+    ) -> tuple[str, dict[str, int] | None]:
+        if self.latency is not None:
+            self.latency.wait()
+
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        question = str(messages[-1].get("content", "")) if messages else ""
+        question = question.rsplit("Question:", 1)[-1].strip()
+        text = f"(offline fake response) You asked: {question[:200]}"
+
+        prompt_tokens = _estimate_tokens(prompt)
+        completion_tokens = _estimate_tokens(text)
+        return text, {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+
+def _refuse_fake_in_production(kind: str) -> None:
+    if settings.is_production:
+        raise ValueError(
+            f"{kind}=fake is for offline load testing and is not allowed in production"
+        )
+
+
+_embedding_provider: EmbeddingProvider | None = None
+_chat_provider: ChatProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_embedding_provider() -> EmbeddingProvider:
+    """Get or create the embedding provider selected by EMBEDDING_PROVIDER."""
+    global _embedding_provider
+    if _embedding_provider is None:
+        with _provider_lock:
+            if _embedding_provider is None:
+                if settings.embedding_provider == "fake":
+                    _refuse_fake_in_production("EMBEDDING_PROVIDER")
+                    logger.warning("Using fake embedding provider (offline mode)")
+                    _embedding_provider = FakeEmbeddingProvider(
+                        latency=make_latency(settings.fake_embedding_latency_ms, salt=1)
+                    )
+                elif settings.embedding_provider == "local":
+                    logger.info(
+                        f"Loading local embedding model {settings.local_embedding_model}"
+                    )
+                    _embedding_provider = LocalEmbeddingProvider(
+                        settings.local_embedding_model,
+                        backend=settings.local_embedding_backend,
+                        batch_size=settings.local_embedding_batch_size,
+                        threads=settings.local_embedding_threads,
+                    )
+                else:
+                    _embedding_provider = OpenAIEmbeddingProvider(
+                        settings.openai_embedding_model
+                    )
+    return _embedding_provider
+
+
+def warm_up_embedding_provider() -> None:
+    """Load a local model and run one inference before the first request."""
+    if settings.embedding_provider != "local":
+        return
+    started = time.perf_counter()
+    get_embedding_provider().embed(["warm up"])
+    logger.info(f"Local embedding model ready in {time.perf_counter() - started:.1f}s")
+
+
+def get_chat_provider() -> ChatProvider:
+    """Get or create the chat provider selected by CHAT_PROVIDER."""
+    global _chat_provider
+    if _chat_provider is None:
+        with _provider_lock:
+            if _chat_provider is None:
+                if settings.chat_provider == "fake":
+                    _refuse_fake_in_production("CHAT_PROVIDER")
+                    logger.warning("Using fake chat provider (offline mode)")
+                    _chat_provider = FakeChatProvider(
+                        latency=make_latency(settings.fake_chat_latency_ms, salt=2)
+                    )
+                else:
+                    _chat_provider = OpenAIChatProvider(settings.openai_chat_model)
+    return _chat_provider
+
+
+def reset_providers() -> None:
+    """Forget cached providers so the next call re-reads settings (tests)."""
+    global _embedding_provider, _chat_provider
+    with _provider_lock:
+        _embedding_provider = None
+        _chat_provider = None
@@ -10,8 +10,10 @@ from typing import Iterable
 
 from sqlalchemy.orm import Session, selectinload
 
+from .metrics import track_stage
 from .models import ChapterChunk
 from .openai_service import create_embedding
+from .providers import embedding_column_name
 
 
 def retrieve_similar_chunks(
@@ -23,18 +25,22 @@ def retrieve_similar_chunks(
     if not query:
         return []
 
-    query_embedding = create_embedding(query)
+    with track_stage("embedding"):
+        query_embedding = create_embedding(query)
+
+    embedding_column = getattr(ChapterChunk, embedding_column_name())
 
     # cosine_distance() is provided by pgvector's SQLAlchemy integration.
     # Lower distance = more similar.
-    return (
-        db.query(ChapterChunk)
-        .options(selectinload(ChapterChunk.chapter))
-        .filter(ChapterChunk.embedding.isnot(None))
-        .order_by(ChapterChunk.embedding.cosine_distance(query_embedding))
-        .limit(top_k)
-        .all()
-    )
+    with track_stage("vector_search"):
+        return (
+            db.query(ChapterChunk)
+            .options(selectinload(ChapterChunk.chapter))
+            .filter(embedding_column.isnot(None))
+            .order_by(embedding_column.cosine_distance(query_embedding))
+            .limit(top_k)
+            .all()
+        )
 
 
 def build_context_from_chunks(
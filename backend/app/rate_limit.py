@@ -1,12 +1,15 @@
 import logging
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import redis
 from fastapi import HTTPException, Request, Response, status
 
 from .config import settings
 
 
+if TYPE_CHECKING:
+    import redis
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -30,6 +33,9 @@ def get_redis_client() -> Optional["redis.Redis[bytes]"]:
     ):
         url = url[1:-1]
 
+    # Imported on first use to keep it out of app start-up.
+    import redis
+
     try:
         _redis_client = redis.Redis.from_url(url, decode_responses=False)
         _redis_client.ping()
@@ -0,0 +1,51 @@
+"""
+orjson-rendered JSON responses for large payloads.
+
+FastAPI validates a returned dict against the route's `response_model` and
+then serializes it. For wiki previews (megabytes of HTML, table JSON and
+markdown built by our own controllers) that re-validation costs more than
+the serialization itself, so those routes return `json_response(...)`:
+orjson renders the dict directly, and `response_model` still documents the
+shape in OpenAPI. (FastAPI's deprecated `ORJSONResponse` as a route's
+`response_class` would keep the validation and lose the pydantic fast path.)
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+
+# Headers a bare sub-response may carry that describe its own (empty) body.
+_BODY_HEADERS = {b"content-length", b"content-type"}
+
+
+def render_json(content: Any) -> bytes:
+    # pandas-derived table cells may hold numpy scalars.
+    return orjson.dumps(
+        content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+    )
+
+
+class OrjsonResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
+
+
+def json_response(
+    data: Any, response: Response | None = None, status_code: int = 200
+) -> OrjsonResponse:
+    """Render `data` with orjson, keeping headers and cookies already set on
+    the route's injected `response` (FastAPI drops them for returned responses).
+    """
+    rendered = OrjsonResponse(data, status_code=status_code)
+    if response is not None:
+        rendered.raw_headers.extend(
+            (name, value)
+            for name, value in response.raw_headers
+            if name not in _BODY_HEADERS
+        )
+    return rendered
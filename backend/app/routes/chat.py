@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from ..config import settings
 from ..db import get_db
 from ..controllers import chat_controller
+from ..metrics import track_stage
 from ..security.turnstile import verify_turnstile_token
 from ..schemas.chat import ChatRequest, ChatResponse, RagChatRequest
 from ..rate_limit import (
@@ -30,18 +31,20 @@ def chat(req: ChatRequest, request: Request, response: Response) -> Any:
         )
 
     client_ip = request.client.host if request.client else None
-    enforce_ip_rate_limit(client_ip, scope="chat")
-    enforce_session_quota(request, response, scope="chat")
-    enforce_session_cooldown(request, response, scope="chat")
+    with track_stage("rate_limit"):
+        enforce_ip_rate_limit(client_ip, scope="chat")
+        enforce_session_quota(request, response, scope="chat")
+        enforce_session_cooldown(request, response, scope="chat")
 
     if settings.turnstile_enabled:
         if not req.turnstile_token:
             raise HTTPException(status_code=400, detail="turnstile token is required")
 
-        ok, error = verify_turnstile_token(
-            token=req.turnstile_token,
-            remote_ip=request.client.host if request.client else None,
-        )
+        with track_stage("turnstile"):
+            ok, error = verify_turnstile_token(
+                token=req.turnstile_token,
+                remote_ip=request.client.host if request.client else None,
+            )
         if not ok:
             status_code = (
                 500 if error == "turnstile_secret_key is not configured" else 403
@@ -88,18 +91,20 @@ def chat_rag(
         req.top_k = settings.rag_top_k_max
 
     client_ip = request.client.host if request.client else None
-    enforce_ip_rate_limit(client_ip, scope="chat_rag")
-    enforce_session_quota(request, response, scope="chat_rag")
-    enforce_session_cooldown(request, response, scope="chat_rag")
+    with track_stage("rate_limit"):
+        enforce_ip_rate_limit(client_ip, scope="chat_rag")
+        enforce_session_quota(request, response, scope="chat_rag")
+        enforce_session_cooldown(request, response, scope="chat_rag")
 
     if settings.turnstile_enabled:
         if not req.turnstile_token:
             raise HTTPException(status_code=400, detail="turnstile token is required")
 
-        ok, error = verify_turnstile_token(
-            token=req.turnstile_token,
-            remote_ip=request.client.host if request.client else None,
-        )
+        with track_stage("turnstile"):
+            ok, error = verify_turnstile_token(
+                token=req.turnstile_token,
+                remote_ip=request.client.host if request.client else None,
+            )
         if not ok:
             status_code = (
                 500 if error == "turnstile_secret_key is not configured" else 403
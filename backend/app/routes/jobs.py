@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy.orm import Session
+
+from ..controllers import jobs_controller
+from ..db import get_db
+from ..schemas.jobs import IngestJobResponse
+
+
+router = APIRouter(tags=["jobs"])
+
+
+@router.post(
+    "/jobs/ingest",
+    response_model=IngestJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def enqueue_ingest(
+    title: str = Query(..., description="MediaWiki page title"),
+    reingest: bool = Query(False, description="Replace an existing chapter"),
+    generate_embeddings: bool = Query(
+        True, description="Generate OpenAI embeddings for chunks"
+    ),
+    db: Session = Depends(get_db),
+) -> IngestJobResponse:
+    """
+    Queue an ingest (or reingest) of a chapter and return at once.
+
+    The fetch, parse, embed and store steps run on a job worker; poll
+    `GET /jobs/{id}` for progress and the result.
+    """
+    return jobs_controller.enqueue_ingest(
+        db=db,
+        title=title,
+        reingest=reingest,
+        generate_embeddings=generate_embeddings,
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def get_job(job_id: int, db: Session = Depends(get_db)) -> IngestJobResponse:
+    """Status, current stage, attempts and result of an ingest job."""
+    return jobs_controller.get_job(db=db, job_id=job_id)
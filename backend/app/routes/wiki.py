@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, Query
+from collections.abc import Callable
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
+from ..config import settings
 from ..controllers import wiki_controller
 from ..db import get_db
+from ..http_cache import cache_headers, cached_response, not_modified
+from ..responses import json_response
 from ..schemas.wiki import (
     ChapterListResponse,
     WikiCategoryPagesResponse,
@@ -14,46 +21,132 @@ from ..schemas.wiki import (
 
 router = APIRouter(tags=["chapters"])
 
+# Clients may keep the catalog but must revalidate it (usually a 304).
+CHAPTER_CATALOG_CACHE_CONTROL = "public, no-cache"
+
+
+def _wiki_cache_control() -> str:
+    return f"public, max-age={settings.wiki_preview_max_age_seconds}"
+
+
+def _conditional(
+    request: Request, current_etag: Callable[[], str | None]
+) -> Response | None:
+    """304 when the client's ETag still matches the page revisions.
+
+    Only asked when the request carries `If-None-Match`, so plain requests
+    do not pay for the extra revisions lookup.
+    """
+    if not request.headers.get("if-none-match"):
+        return None
+    etag = current_etag()
+    if etag is None:
+        return None
+    return not_modified(request, etag, _wiki_cache_control())
+
+
+def _set_validators(response: Response, etag: str | None) -> None:
+    if etag is not None:
+        response.headers.update(cache_headers(etag, _wiki_cache_control()))
+
 
 @router.get("/wiki/category/{category_name}", response_model=WikiCategoryPagesResponse)
 def get_category_pages(
+    request: Request,
+    response: Response,
     category_name: str,
     limit: int = Query(10, ge=1, le=100),
     include_html: bool = Query(False),
     as_markdown: bool = Query(False),
     raw: bool = Query(False),
-) -> dict:
-    return wiki_controller.get_category_pages(
+    stream: bool = Query(
+        False,
+        description="Stream one NDJSON line per page as it is fetched and parsed",
+    ),
+) -> Any:
+    if stream:
+        return StreamingResponse(
+            wiki_controller.stream_category_pages(
+                category_name=category_name,
+                limit=limit,
+                include_html=include_html,
+                as_markdown=as_markdown,
+                raw=raw,
+            ),
+            media_type="application/x-ndjson",
+        )
+
+    variant = (include_html, as_markdown, raw)
+    cached = _conditional(
+        request,
+        lambda: wiki_controller.current_category_etag(category_name, limit, *variant),
+    )
+    if cached is not None:
+        return cached
+
+    data = wiki_controller.get_category_pages(
         category_name=category_name,
         limit=limit,
         include_html=include_html,
         as_markdown=as_markdown,
         raw=raw,
     )
+    revisions = [(page.get("title"), page.get("revid")) for page in data["pages"]]
+    _set_validators(
+        response,
+        wiki_controller.wiki_etag(revisions, category_name, limit, *variant),
+    )
+    return json_response(data, response)
 
 
 @router.get("/wiki/page/{title}", response_model=WikiPageHtmlResponse)
 def get_single_page(
+    request: Request,
+    response: Response,
     title: str,
     include_html: bool = Query(False),
     raw: bool = Query(False),
-) -> dict:
-    return wiki_controller.get_single_page_html(
+) -> Any:
+    variant = ("text", include_html, raw)
+    cached = _conditional(
+        request, lambda: wiki_controller.current_page_etag(title, *variant)
+    )
+    if cached is not None:
+        return cached
+
+    data = wiki_controller.get_single_page_html(
         title=title,
         include_html=include_html,
         raw=raw,
     )
+    _set_validators(
+        response, wiki_controller.wiki_etag([(title, data.get("revid"))], *variant)
+    )
+    return json_response(data, response)
 
 
 @router.get("/wiki/page/{title}/wikitext", response_model=WikiPageWikitextResponse)
 def get_page_wikitext(
+    request: Request,
+    response: Response,
     title: str,
     raw: bool = Query(False),
-) -> dict:
-    return wiki_controller.get_single_page_wikitext(
+) -> Any:
+    variant = ("wikitext", raw)
+    cached = _conditional(
+        request, lambda: wiki_controller.current_page_etag(title, *variant)
+    )
+    if cached is not None:
+        return cached
+
+    data = wiki_controller.get_single_page_wikitext(
         title=title,
         raw=raw,
     )
+    _set_validators(
+        response, wiki_controller.wiki_etag([(title, data.get("revid"))], *variant)
+    )
+    return json_response(data, response)
 
 
 @router.post("/wiki/page/{title}/ingest", response_model=WikiIngestResponse)
@@ -103,8 +196,15 @@ def reingest_chapter(
 
 
 @router.get("/chapters", response_model=ChapterListResponse)
-def list_documented_chapters(db: Session = Depends(get_db)) -> ChapterListResponse:
+def list_documented_chapters(
+    request: Request, db: Session = Depends(get_db)
+) -> Response:
     """Return all documented chapters grouped by game."""
 
-    data = wiki_controller.list_documented_chapters(db=db)
-    return ChapterListResponse.model_validate(data)
+    catalog = wiki_controller.get_chapter_catalog(db=db)
+    return cached_response(
+        request,
+        catalog.body,
+        catalog.etag,
+        cache_control=CHAPTER_CATALOG_CACHE_CONTROL,
+    )
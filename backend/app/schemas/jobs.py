@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class IngestJobResponse(BaseModel):
+    """State of a background ingest job (`POST /jobs/ingest`, `GET /jobs/{id}`)."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str = Field(description="ingest or reingest")
+    title: str
+    status: str = Field(description="queued, running, succeeded or failed")
+    stage: str | None = Field(
+        default=None, description="Current step: fetching, parsing, storing, done"
+    )
+    attempts: int
+    max_attempts: int
+    run_after: datetime | None = None
+    error: str | None = None
+    result: Any | None = Field(
+        default=None, description="pageid, title, chapter_id and chunks_count"
+    )
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
@@ -15,6 +15,7 @@ class WikiCategoryPageItem(BaseModel):
 
     pageid: int | None = None
     title: str | None = None
+    revid: int | None = None
 
     html: str | None = None
     chapter: Any | None = None
@@ -46,6 +47,7 @@ class WikiPageHtmlResponse(BaseModel):
 
     pageid: int | None = None
     title: str | None = None
+    revid: int | None = None
 
     html: str | None = None
     chapter: Any | None = None
@@ -62,6 +64,7 @@ class WikiPageWikitextResponse(BaseModel):
 
     pageid: int | None = None
     title: str | None = None
+    revid: int | None = None
 
     wikitext: str | None = None
     chapter: Any | None = None
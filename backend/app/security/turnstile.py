@@ -5,13 +5,34 @@ from typing import Any
 import requests
 
 from ..config import settings
+from ..providers import LatencySimulator, make_latency
 
 TURNSTILE_VERIFY_URL = "https://challenges.cloudflare.com/turnstile/v0/siteverify"
 
+_fake_latency: LatencySimulator | None = None
+
+
+def _verify_fake(token: str) -> tuple[bool, str | None]:
+    """Offline verifier for load tests: tokens starting with 'fail' are rejected."""
+    global _fake_latency
+    if settings.is_production:
+        return False, "turnstile_provider=fake is not allowed in production"
+
+    if _fake_latency is None:
+        _fake_latency = make_latency(settings.fake_turnstile_latency_ms, salt=3)
+    _fake_latency.wait()
+
+    if token.startswith("fail"):
+        return False, "Turnstile verification failed: fake-rejected"
+    return True, None
+
 
 def verify_turnstile_token(
     token: str, remote_ip: str | None
 ) -> tuple[bool, str | None]:
+    if settings.turnstile_provider == "fake":
+        return _verify_fake(token)
+
     if not settings.turnstile_secret_key:
         return False, "turnstile_secret_key is not configured"
 
@@ -0,0 +1,226 @@
+"""
+On-disk cache for MediaWiki `action=parse` responses.
+
+Entries live in one SQLite file keyed by (action, title, prop), stored as
+zlib-compressed JSON together with the page's revision id. An entry younger
+than the TTL is served as-is; an older one is *stale* and is only served after
+`MediaWikiClient` confirms, with a cheap revisions query, that the page's
+latest revid is unchanged. Entries stored without a revid cannot be
+revalidated, so they simply expire with the TTL. The file is kept under a byte
+cap by evicting the least recently read entries; triggers keep the running
+total in `usage`, so a write never has to sum the table.
+
+SQLite's own locking makes the file safe to share between uvicorn workers.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, NamedTuple
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    action TEXT NOT NULL,
+    title TEXT NOT NULL,
+    prop TEXT NOT NULL,
+    revid INTEGER,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (action, title, prop)
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total_size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, total_size)
+    SELECT 0, COALESCE(SUM(size), 0) FROM responses;
+CREATE TRIGGER IF NOT EXISTS responses_usage_insert AFTER INSERT ON responses
+BEGIN
+    UPDATE usage SET total_size = total_size + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_usage_update AFTER UPDATE OF size ON responses
+BEGIN
+    UPDATE usage SET total_size = total_size + NEW.size - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_usage_delete AFTER DELETE ON responses
+BEGIN
+    UPDATE usage SET total_size = total_size - OLD.size WHERE id = 0;
+END;
+"""
+
+# Least recently read rows whose removal brings the total down by `excess`
+_EVICT = """
+DELETE FROM responses WHERE rowid IN (
+    SELECT id FROM (
+        SELECT rowid AS id,
+               SUM(size) OVER (ORDER BY accessed_at ROWS UNBOUNDED PRECEDING)
+                   - size AS freed_before
+        FROM responses
+    )
+    WHERE freed_before < ?
+)
+"""
+
+
+class CachedResponse(NamedTuple):
+    data: dict[str, Any]
+    revid: int | None
+    stale: bool
+
+
+class WikiResponseCache:
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        ttl_seconds: float,
+        max_bytes: int,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=10,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, action: str, title: str, prop: str) -> CachedResponse | None:
+        """Return the cached response (marking it recently used), or None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, revid, fetched_at FROM responses "
+                "WHERE action = ? AND title = ? AND prop = ?",
+                (action, title, prop),
+            ).fetchone()
+            if row is None:
+                return None
+            body, revid, fetched_at = row
+            stale = now - fetched_at >= self.ttl_seconds
+            if stale and revid is None:
+                # Nothing to revalidate against: a plain TTL expiry
+                self._conn.execute(
+                    "DELETE FROM responses WHERE action = ? AND title = ? AND prop = ?",
+                    (action, title, prop),
+                )
+                return None
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? "
+                "WHERE action = ? AND title = ? AND prop = ?",
+                (now, action, title, prop),
+            )
+
+        data = json.loads(zlib.decompress(body))
+        return CachedResponse(data, revid, stale)
+
+    def stale_revids(self, action: str, titles: list[str], prop: str) -> dict[str, int]:
+        """Revids of the stale entries among `titles` (for batch revalidation)."""
+        if not titles:
+            return {}
+        cutoff = time.time() - self.ttl_seconds
+        placeholders = ", ".join("?" * len(titles))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title, revid FROM responses "
+                f"WHERE action = ? AND prop = ? AND title IN ({placeholders}) "
+                "AND fetched_at <= ? AND revid IS NOT NULL",
+                (action, prop, *titles, cutoff),
+            ).fetchall()
+        return dict(rows)
+
+    def fresh_revids(self, action: str, titles: list[str], prop: str) -> dict[str, int]:
+        """Revids of the entries among `titles` still within the TTL."""
+        if not titles:
+            return {}
+        cutoff = time.time() - self.ttl_seconds
+        placeholders = ", ".join("?" * len(titles))
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT title, revid FROM responses "
+                f"WHERE action = ? AND prop = ? AND title IN ({placeholders}) "
+                "AND fetched_at > ? AND revid IS NOT NULL",
+                (action, prop, *titles, cutoff),
+            ).fetchall()
+        return dict(rows)
+
+    def put(
+        self,
+        action: str,
+        title: str,
+        prop: str,
+        data: dict[str, Any],
+        revid: int | None,
+    ) -> None:
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO responses "
+                "(action, title, prop, revid, body, size, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                # An upsert, not OR REPLACE: replace's implicit delete skips
+                # the usage trigger.
+                "ON CONFLICT (action, title, prop) DO UPDATE SET "
+                "revid = excluded.revid, body = excluded.body, "
+                "size = excluded.size, fetched_at = excluded.fetched_at, "
+                "accessed_at = excluded.accessed_at",
+                (action, title, prop, revid, body, len(body), now, now),
+            )
+            self._evict()
+
+    def touch(self, action: str, title: str, prop: str) -> None:
+        """Restart the TTL of an entry whose revid was just confirmed current."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET fetched_at = ? "
+                "WHERE action = ? AND title = ? AND prop = ?",
+                (time.time(), action, title, prop),
+            )
+
+    def delete(self, action: str, title: str, prop: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM responses WHERE action = ? AND title = ? AND prop = ?",
+                (action, title, prop),
+            )
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._total_size()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _total_size(self) -> int:
+        (total,) = self._conn.execute(
+            "SELECT total_size FROM usage WHERE id = 0"
+        ).fetchone()
+        return total
+
+    def _evict(self) -> None:
+        """Drop least recently read entries until the stored bodies fit the cap."""
+        excess = self._total_size() - self.max_bytes
+        if excess > 0:
+            self._conn.execute(_EVICT, (excess,))
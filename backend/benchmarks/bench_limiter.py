@@ -0,0 +1,146 @@
+"""Rate limiter overhead per request (IP limit + session quota + cooldown)."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app import rate_limit
+from app.config import settings
+
+from .harness import BenchmarkResult, measure
+
+
+class _InMemoryPipeline:
+    def __init__(self, store: dict[str, int]):
+        self.store = store
+        self.ops: list[tuple[str, str]] = []
+
+    def __enter__(self) -> _InMemoryPipeline:
+        return self
+
+    def __exit__(self, *_exc: Any) -> bool:
+        return False
+
+    def incr(self, key: str) -> None:
+        self.ops.append(("incr", key))
+
+    def expire(self, key: str, _ttl: int) -> None:
+        self.ops.append(("expire", key))
+
+    def execute(self) -> list[int | bool]:
+        results: list[int | bool] = []
+        for op, key in self.ops:
+            if op == "incr":
+                self.store[key] = self.store.get(key, 0) + 1
+                results.append(self.store[key])
+            else:
+                results.append(True)
+        self.ops.clear()
+        return results
+
+
+class InMemoryRedis:
+    """Dict-backed stand-in so the benchmark isolates Python-side overhead."""
+
+    def __init__(self) -> None:
+        self.store: dict[str, int] = {}
+
+    def pipeline(self) -> _InMemoryPipeline:
+        return _InMemoryPipeline(self.store)
+
+    def get(self, key: str) -> bytes | None:
+        return b"1" if key in self.store else None
+
+    def setex(self, key: str, _ttl: int, _value: bytes) -> None:
+        self.store[key] = 1
+
+
+@contextmanager
+def _unlimited_settings() -> Iterator[None]:
+    names = (
+        "rate_limit_short_ip_requests",
+        "rate_limit_long_ip_requests",
+        "session_rate_limit_long_ip_requests",
+        "session_cooldown_threshold",
+    )
+    original = {name: getattr(settings, name) for name in names}
+    for name in names:
+        setattr(settings, name, 10**12)
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(settings, name, value)
+
+
+@contextmanager
+def _redis_client(client: Any) -> Iterator[None]:
+    original = rate_limit.get_redis_client
+    rate_limit.get_redis_client = lambda: client  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        rate_limit.get_redis_client = original  # type: ignore[assignment]
+
+
+def _make_request() -> Request:
+    cookie = f"{settings.session_cookie_name}=bench-session".encode()
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/chat/rag",
+            "headers": [(b"cookie", cookie)],
+        }
+    )
+
+
+def run(*, redis_url: str | None = None, quick: bool = False) -> list[BenchmarkResult]:
+    if redis_url:
+        import redis
+
+        client: Any = redis.Redis.from_url(redis_url, decode_responses=False)
+        backend = "redis"
+    else:
+        client = InMemoryRedis()
+        backend = "memory"
+
+    iterations = 200 if quick else 5000
+    request = _make_request()
+    results: list[BenchmarkResult] = []
+
+    with _unlimited_settings(), _redis_client(client):
+        results.append(
+            measure(
+                "enforce_ip_rate_limit",
+                lambda: rate_limit.enforce_ip_rate_limit("10.0.0.1", scope="bench"),
+                params={"backend": backend},
+                iterations=iterations,
+            )
+        )
+
+        def full_limiter() -> None:
+            response = Response()
+            rate_limit.enforce_ip_rate_limit("10.0.0.1", scope="bench")
+            rate_limit.enforce_session_quota(request, response, scope="bench")
+            rate_limit.enforce_session_cooldown(request, response, scope="bench")
+
+        results.append(
+            measure(
+                "chat_rag_limiter_stack",
+                full_limiter,
+                params={"backend": backend},
+                iterations=iterations,
+            )
+        )
+
+    if redis_url:
+        for key in client.scan_iter(match="*:bench:*"):
+            client.delete(key)
+
+    return results
@@ -0,0 +1,99 @@
+"""Per-request cost of the docs auth middleware on non-docs routes.
+
+Drives the ASGI app directly (no HTTP client, no server) so the numbers are
+the middleware's own overhead: a bare endpoint, the same endpoint behind
+`DocsSessionAuthMiddleware`, and behind an equivalent `BaseHTTPMiddleware`
+(the previous implementation) for comparison.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.docs_auth import DocsSessionAuthMiddleware, _is_docs_path
+
+from .harness import BenchmarkResult, measure
+
+
+REQUESTS_PER_CALL = 100
+
+
+async def _endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        }
+    )
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+class _BaseHTTPDocsAuth(BaseHTTPMiddleware):
+    """The shape of the old middleware: pass through unless a docs path."""
+
+    async def dispatch(self, request: Request, call_next: Any) -> Any:
+        if not _is_docs_path(request.url.path):
+            return await call_next(request)
+        return await call_next(request)
+
+
+def _scope(path: str) -> Scope:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 5000),
+        "server": ("bench", 80),
+    }
+
+
+def _runner(app: ASGIApp, loop: asyncio.AbstractEventLoop) -> Any:
+    scope = _scope("/chat/rag")
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        return None
+
+    async def batch() -> None:
+        for _ in range(REQUESTS_PER_CALL):
+            await app(dict(scope), receive, send)
+
+    return lambda: loop.run_until_complete(batch())
+
+
+def run(*, quick: bool = False) -> list[BenchmarkResult]:
+    iterations = 20 if quick else 300
+    apps: dict[str, ASGIApp] = {
+        "none": _endpoint,
+        "asgi": DocsSessionAuthMiddleware(_endpoint, enabled=True, secret="bench"),
+        "base_http": _BaseHTTPDocsAuth(_endpoint),
+    }
+
+    loop = asyncio.new_event_loop()
+    try:
+        return [
+            measure(
+                "docs_auth_passthrough",
+                _runner(app, loop),
+                params={"middleware": name, "requests": REQUESTS_PER_CALL},
+                iterations=iterations,
+            )
+            for name, app in apps.items()
+        ]
+    finally:
+        loop.close()
@@ -0,0 +1,153 @@
+"""Parsing and ingest record-building benchmarks (no network, no database)."""
+
+from __future__ import annotations
+
+from app.chapter_ingest import build_chapter_records_from_wikitext
+from app.html_document import HtmlDocument
+from app.models import Chapter, ChapterChunk
+from app.parsers import (
+    clear_wikitext_cache,
+    extract_tables_as_json,
+    extract_tables_as_markdown,
+    parse_chapter_page,
+    parse_chapter_wikitext,
+    parse_page_streaming,
+)
+from app.rag_service import build_context_from_chunks
+
+from .harness import BenchmarkResult, load_fixture, measure
+
+
+def large_wikitext(base: str, copies: int) -> str:
+    """Blow the fixture up to a "big chapter page" by repeating its sections."""
+    head, sep, body = base.partition("\n==")
+    if not sep:
+        return base * copies
+    sections = "\n==" + body
+    extra = [sections.replace("==\n", f" {index}==\n", 1) for index in range(1, copies)]
+    return head + sections + "".join(extra)
+
+
+def large_html(base: str, copies: int) -> str:
+    """Repeat everything after the infobox inside the content wrapper."""
+    head, sep, body = base.partition("</aside>")
+    if not sep:
+        return base * copies
+    body, _, tail = body.rpartition("</div>")
+    return head + sep + body * copies + "</div>" + tail
+
+
+def category_preview_page(html: str) -> None:
+    """What /wiki/category does for each page (infobox, sections, both table views)."""
+    document = HtmlDocument(html)
+    parse_chapter_page(document)
+    extract_tables_as_json(document)
+    extract_tables_as_markdown(document)
+
+
+def synthetic_chunks(count: int) -> list[ChapterChunk]:
+    chapter = Chapter(
+        id=1,
+        pageid=1,
+        title="Chapter 11: Another Journey",
+        infobox_title="Another Journey",
+        game="[[Fire Emblem: The Blazing Blade]]",
+        objective="Defeat boss",
+        units_gained="[[Matthew]] [[Serra]]",
+        boss="[[Batta]]",
+        raw_infobox={},
+    )
+    chunks: list[ChapterChunk] = []
+    for index in range(count):
+        chunk = ChapterChunk(
+            section_title="Strategy",
+            kind="section",
+            chunk_index=index,
+            text=(
+                "Send Oswin to the front lines; his high Defense makes him "
+                "nearly invulnerable to the Brigands. "
+            )
+            * 2,
+        )
+        chunk.chapter = chapter
+        chunks.append(chunk)
+    return chunks
+
+
+def run(*, quick: bool = False) -> list[BenchmarkResult]:
+    base = load_fixture("chapter.wikitext")
+    iterations = 20 if quick else 200
+    results: list[BenchmarkResult] = []
+
+    for label, copies in (("fixture", 1), ("large", 1 if quick else 25)):
+        wikitext = base if copies == 1 else large_wikitext(base, copies)
+        size = len(wikitext.encode("utf-8"))
+        runs = iterations if copies == 1 else max(5, iterations // 10)
+
+        def parse_cold(text: str = wikitext) -> None:
+            clear_wikitext_cache()
+            parse_chapter_wikitext(text)
+
+        results.append(
+            measure(
+                "parse_chapter_wikitext",
+                parse_cold,
+                params={"page": label, "bytes": size},
+                iterations=runs,
+            )
+        )
+        results.append(
+            measure(
+                "parse_chapter_wikitext",
+                lambda text=wikitext: parse_chapter_wikitext(text),
+                params={"page": label, "bytes": size, "cache": "hit"},
+                iterations=runs,
+            )
+        )
+
+    base_html = load_fixture("chapter.html")
+    for label, copies in (("fixture", 1), ("large", 1 if quick else 25)):
+        html = base_html if copies == 1 else large_html(base_html, copies)
+        size = len(html.encode("utf-8"))
+        runs = iterations if copies == 1 else max(5, iterations // 10)
+        results.append(
+            measure(
+                "category_preview_page",
+                lambda html=html: category_preview_page(html),
+                params={"page": label, "bytes": size},
+                iterations=runs,
+            )
+        )
+        results.append(
+            measure(
+                "category_preview_page",
+                lambda html=html: parse_page_streaming(html, as_markdown=True),
+                params={"page": label, "bytes": size, "mode": "stream"},
+                iterations=runs,
+            )
+        )
+
+    chapter_data = parse_chapter_wikitext(base)
+    results.append(
+        measure(
+            "build_chapter_records_from_wikitext",
+            lambda: build_chapter_records_from_wikitext(
+                1, "Chapter 11: Another Journey", chapter_data
+            ),
+            params={"page": "fixture"},
+            iterations=iterations,
+        )
+    )
+
+    for count in (8, 30):
+        chunks = synthetic_chunks(count)
+        results.append(
+            measure(
+                "build_context_from_chunks",
+                lambda chunks=chunks: build_context_from_chunks(chunks),
+                params={"chunks": count},
+                iterations=iterations * 5,
+            )
+        )
+
+    return results
@@ -0,0 +1,259 @@
+"""`retrieve_similar_chunks` benchmarks against synthetic vector sets.
+
+Two backends are supported:
+
+- fake (default): an in-memory numpy matrix stands in for pgvector and is
+  scanned brute force, which is what Postgres does without an ANN index.
+- pgvector: pass `--database-url` to load synthetic chunks into a scratch
+  `forseti_bench` schema and run the real ORM query against it, optionally
+  with an HNSW or IVFFlat index.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import rag_service
+from app.db import Base
+from app.models import Chapter, ChapterChunk
+
+from .harness import BenchmarkResult, measure
+
+
+BENCH_SCHEMA = "forseti_bench"
+DIMENSIONS = 1536
+
+
+def _random_unit_vectors(rng: np.random.Generator, count: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((count, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+@contextmanager
+def _patched_query_embedding(vector: list[float]) -> Iterator[None]:
+    """Skip the OpenAI round trip: every query embeds to the given vector."""
+    original: Callable[[str], list[float]] = rag_service.create_embedding
+    rag_service.create_embedding = lambda _text: vector  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        rag_service.create_embedding = original  # type: ignore[assignment]
+
+
+class _FakeVectorQuery:
+    """Just enough of `Session.query()` for `retrieve_similar_chunks`."""
+
+    def __init__(self, store: _FakeVectorStore):
+        self.store = store
+        self._limit = 10
+
+    def options(self, *_args: Any) -> _FakeVectorQuery:
+        return self
+
+    def filter(self, *_args: Any) -> _FakeVectorQuery:
+        return self
+
+    def order_by(self, *_args: Any) -> _FakeVectorQuery:
+        return self
+
+    def limit(self, top_k: int) -> _FakeVectorQuery:
+        self._limit = top_k
+        return self
+
+    def all(self) -> list[ChapterChunk]:
+        return self.store.top_k(self._limit)
+
+
+class _FakeVectorStore:
+    def __init__(self, vectors: np.ndarray, query: np.ndarray):
+        self.vectors = vectors
+        self.query_vector = query
+        self.chapter = Chapter(id=1, pageid=1, title="Synthetic", raw_infobox={})
+
+    def query(self, *_args: Any) -> _FakeVectorQuery:
+        return _FakeVectorQuery(self)
+
+    def top_k(self, k: int) -> list[ChapterChunk]:
+        # cosine distance on unit vectors == 1 - dot product
+        distances = 1.0 - self.vectors @ self.query_vector
+        k = min(k, len(distances))
+        candidates = np.argpartition(distances, k - 1)[:k]
+        ordered = candidates[np.argsort(distances[candidates])]
+        chunks = []
+        for index in ordered.tolist():
+            chunk = ChapterChunk(
+                id=index, kind="section", chunk_index=index, text=f"chunk {index}"
+            )
+            chunk.chapter = self.chapter
+            chunks.append(chunk)
+        return chunks
+
+
+def run_fake(
+    sizes: list[int],
+    *,
+    top_k: int,
+    max_memory_mb: int,
+    quick: bool = False,
+) -> list[BenchmarkResult]:
+    rng = np.random.default_rng(1234)
+    query = _random_unit_vectors(rng, 1, DIMENSIONS)[0]
+    results: list[BenchmarkResult] = []
+
+    for size in sizes:
+        params = {"backend": "fake", "vectors": size, "top_k": top_k}
+        needed_mb = size * DIMENSIONS * 4 / (1024 * 1024)
+        if needed_mb > max_memory_mb:
+            results.append(
+                BenchmarkResult.skip(
+                    "retrieve_similar_chunks",
+                    params,
+                    f"needs ~{needed_mb:.0f} MiB (> --max-fake-memory-mb {max_memory_mb})",
+                )
+            )
+            continue
+
+        store = _FakeVectorStore(_random_unit_vectors(rng, size, DIMENSIONS), query)
+        with _patched_query_embedding(query.tolist()):
+            results.append(
+                measure(
+                    "retrieve_similar_chunks",
+                    lambda: rag_service.retrieve_similar_chunks(
+                        store,  # type: ignore[arg-type]
+                        "Who is the boss of chapter 11?",
+                        top_k=top_k,
+                    ),
+                    params=params,
+                    iterations=3 if quick else max(5, 2_000_000 // size),
+                    warmup=1,
+                )
+            )
+        del store
+
+    return results
+
+
+def _vector_literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(map(str, np.round(vector, 6).tolist())) + "]"
+
+
+def _load_pgvector_fixture(
+    database_url: str, size: int, index: str, rng: np.random.Generator
+) -> tuple[Any, Any]:
+    engine = create_engine(database_url, future=True)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+
+    translated = engine.execution_options(schema_translate_map={None: BENCH_SCHEMA})
+    Base.metadata.create_all(translated)
+
+    now = datetime.utcnow()
+    with Session(bind=translated) as db:
+        chapter = Chapter(pageid=1, title="Synthetic", raw_infobox={})
+        db.add(chapter)
+        db.commit()
+        chapter_id = chapter.id
+
+    raw = translated.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            with cur.copy(
+                f"COPY {BENCH_SCHEMA}.chapter_chunks "
+                "(chapter_id, kind, chunk_index, text, embedding, created_at) "
+                "FROM STDIN"
+            ) as copy:
+                batch = 10_000
+                for start in range(0, size, batch):
+                    block = _random_unit_vectors(
+                        rng, min(batch, size - start), DIMENSIONS
+                    )
+                    for offset, vector in enumerate(block):
+                        position = start + offset
+                        copy.write_row(
+                            (
+                                chapter_id,
+                                "section",
+                                position,
+                                f"chunk {position}",
+                                _vector_literal(vector),
+                                now,
+                            )
+                        )
+        raw.commit()
+    finally:
+        raw.close()
+
+    with translated.begin() as conn:
+        if index == "hnsw":
+            conn.execute(
+                text(
+                    f"CREATE INDEX ON {BENCH_SCHEMA}.chapter_chunks "
+                    "USING hnsw (embedding vector_cosine_ops)"
+                )
+            )
+        elif index == "ivfflat":
+            lists = max(1, int(size**0.5))
+            conn.execute(
+                text(
+                    f"CREATE INDEX ON {BENCH_SCHEMA}.chapter_chunks "
+                    f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})"
+                )
+            )
+        conn.execute(text(f"ANALYZE {BENCH_SCHEMA}.chapter_chunks"))
+
+    return engine, translated
+
+
+def run_pgvector(
+    database_url: str,
+    sizes: list[int],
+    *,
+    top_k: int,
+    index: str,
+    keep_schema: bool = False,
+    quick: bool = False,
+) -> list[BenchmarkResult]:
+    rng = np.random.default_rng(1234)
+    query = _random_unit_vectors(rng, 1, DIMENSIONS)[0]
+    results: list[BenchmarkResult] = []
+
+    for size in sizes:
+        engine, translated = _load_pgvector_fixture(database_url, size, index, rng)
+        try:
+            with (
+                Session(bind=translated) as db,
+                _patched_query_embedding(query.tolist()),
+            ):
+                results.append(
+                    measure(
+                        "retrieve_similar_chunks",
+                        lambda: rag_service.retrieve_similar_chunks(
+                            db, "Who is the boss of chapter 11?", top_k=top_k
+                        ),
+                        params={
+                            "backend": "pgvector",
+                            "vectors": size,
+                            "top_k": top_k,
+                            "index": index,
+                        },
+                        iterations=3 if quick else 20,
+                        warmup=2,
+                    )
+                )
+        finally:
+            if not keep_schema:
+                with translated.begin() as conn:
+                    conn.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+            engine.dispose()
+
+    return results
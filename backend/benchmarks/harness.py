@@ -0,0 +1,171 @@
+"""Timing helpers and JSON result recording for the benchmark suite."""
+
+from __future__ import annotations
+
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def load_fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile over an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    params: dict[str, Any]
+    iterations: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    min_ms: float
+    ops_per_sec: float
+    extra: dict[str, Any] = field(default_factory=dict)
+    skipped: str | None = None
+
+    @classmethod
+    def skip(cls, name: str, params: dict[str, Any], reason: str) -> BenchmarkResult:
+        return cls(
+            name=name,
+            params=params,
+            iterations=0,
+            mean_ms=0.0,
+            p50_ms=0.0,
+            p95_ms=0.0,
+            min_ms=0.0,
+            ops_per_sec=0.0,
+            skipped=reason,
+        )
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    *,
+    params: dict[str, Any] | None = None,
+    iterations: int = 100,
+    warmup: int = 5,
+    min_seconds: float = 0.0,
+) -> BenchmarkResult:
+    """Run `func` repeatedly and summarize per-call wall time.
+
+    Runs at least `iterations` timed calls, and keeps going until
+    `min_seconds` have elapsed so very fast functions get a stable sample.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples: list[float] = []
+    started = time.perf_counter()
+    while len(samples) < iterations or (time.perf_counter() - started) < min_seconds:
+        t0 = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - t0)
+
+    samples.sort()
+    mean = statistics.fmean(samples)
+    return BenchmarkResult(
+        name=name,
+        params=params or {},
+        iterations=len(samples),
+        mean_ms=mean * 1000,
+        p50_ms=percentile(samples, 50) * 1000,
+        p95_ms=percentile(samples, 95) * 1000,
+        min_ms=samples[0] * 1000,
+        ops_per_sec=(1.0 / mean) if mean > 0 else 0.0,
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def build_report(results: list[BenchmarkResult]) -> dict[str, Any]:
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+        },
+        "results": [asdict(result) for result in results],
+    }
+
+
+def write_report(report: dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def _result_key(result: dict[str, Any]) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare_reports(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    threshold_pct: float,
+) -> list[str]:
+    """Return human-readable regression lines where p50 grew past the threshold."""
+    previous = {
+        _result_key(r): r for r in baseline.get("results", []) if not r.get("skipped")
+    }
+    regressions: list[str] = []
+    for result in current.get("results", []):
+        if result.get("skipped"):
+            continue
+        key = _result_key(result)
+        old = previous.get(key)
+        if not old or old["p50_ms"] <= 0:
+            continue
+        change = (result["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+        if change > threshold_pct:
+            regressions.append(
+                f"{key}: p50 {old['p50_ms']:.3f}ms -> {result['p50_ms']:.3f}ms (+{change:.1f}%)"
+            )
+    return regressions
+
+
+def format_result(result: BenchmarkResult) -> str:
+    params = ", ".join(f"{k}={v}" for k, v in result.params.items())
+    label = f"{result.name}({params})" if params else result.name
+    if result.skipped:
+        return f"{label:<60} skipped: {result.skipped}"
+    return (
+        f"{label:<60} p50={result.p50_ms:9.3f}ms p95={result.p95_ms:9.3f}ms "
+        f"ops/s={result.ops_per_sec:10.1f} n={result.iterations}"
+    )
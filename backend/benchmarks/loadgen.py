@@ -0,0 +1,267 @@
+"""Closed-loop load generator for `/chat/rag` (or `/chat`).
+
+Meant to run against a server started in offline mode so nothing is billed
+and Turnstile always passes:
+
+    EMBEDDING_PROVIDER=fake CHAT_PROVIDER=fake TURNSTILE_PROVIDER=fake \
+    RATE_LIMIT_SHORT_IP_REQUESTS=1000000 RATE_LIMIT_LONG_IP_REQUESTS=1000000 \
+    uvicorn app.main:app --workers 4
+
+    python -m benchmarks.loadgen --url http://localhost:8000 \
+        --concurrency 64 --duration 60 --output benchmarks/results/load.json
+
+Reports client-side throughput and p50/p95/p99 latency, plus per-stage
+p50/p95/p99 computed from the server's `/metrics` histograms (delta between
+a scrape before and after the run). With several workers behind one port,
+each scrape only sees the worker that answered it, so per-stage numbers are
+a sample; use `--workers 1` for exact stage figures.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from .harness import percentile
+
+
+QUESTIONS = (
+    "Who is the boss of Chapter 11 in The Blazing Blade?",
+    "Which units join in Another Journey?",
+    "What is the objective of the prologue in Path of Radiance?",
+    "How many units can I deploy in Taking Leave?",
+    "Where do I find the Door Key in Hector's Tale chapter 11?",
+    "Which villages should I visit in The Distant Plains?",
+)
+
+_BUCKET_RE = re.compile(
+    r'^forseti_request_stage_seconds_bucket\{stage="(?P<stage>[^"]+)",le="(?P<le>[^"]+)"\} (?P<value>\S+)$'
+)
+
+
+def parse_stage_buckets(text: str) -> dict[str, dict[float, float]]:
+    """Extract cumulative stage histogram buckets from a /metrics scrape."""
+    stages: dict[str, dict[float, float]] = {}
+    for line in text.splitlines():
+        match = _BUCKET_RE.match(line)
+        if not match:
+            continue
+        le = match.group("le")
+        bound = math.inf if le == "+Inf" else float(le)
+        stages.setdefault(match.group("stage"), {})[bound] = float(match.group("value"))
+    return stages
+
+
+def histogram_quantile(q: float, buckets: dict[float, float]) -> float | None:
+    """Estimate a quantile from cumulative buckets (Prometheus-style interpolation)."""
+    bounds = sorted(buckets)
+    if not bounds:
+        return None
+    total = buckets[bounds[-1]]
+    if total <= 0:
+        return None
+
+    rank = q * total
+    previous_bound, previous_count = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if math.isinf(bound):
+                return previous_bound
+            if count == previous_count:
+                return bound
+            fraction = (rank - previous_count) / (count - previous_count)
+            return previous_bound + (bound - previous_bound) * fraction
+        previous_bound, previous_count = bound, count
+    return previous_bound
+
+
+def stage_deltas(
+    before: dict[str, dict[float, float]], after: dict[str, dict[float, float]]
+) -> dict[str, dict[float, float]]:
+    deltas: dict[str, dict[float, float]] = {}
+    for stage, buckets in after.items():
+        base = before.get(stage, {})
+        deltas[stage] = {b: v - base.get(b, 0.0) for b, v in buckets.items()}
+    return deltas
+
+
+async def _scrape(client: httpx.AsyncClient) -> dict[str, dict[float, float]]:
+    try:
+        response = await client.get("/metrics")
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    return parse_stage_buckets(response.text)
+
+
+async def _worker(
+    worker_id: int,
+    base_url: str,
+    endpoint: str,
+    deadline: float,
+    remaining: list[float],
+    latencies: list[float],
+    statuses: Counter[str],
+    top_k: int,
+    timeout: float,
+) -> None:
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        index = worker_id
+        while time.perf_counter() < deadline:
+            if remaining[0] <= 0:
+                return
+            remaining[0] -= 1
+
+            payload: dict[str, Any] = {
+                "message": QUESTIONS[index % len(QUESTIONS)],
+                "temperature": 0.3,
+                "turnstile_token": "loadgen",
+            }
+            if endpoint == "/chat/rag":
+                payload["top_k"] = top_k
+            index += 1
+
+            # New anonymous session per request so per-session quotas don't
+            # throttle the run; only the IP limits apply.
+            client.cookies.clear()
+            started = time.perf_counter()
+            try:
+                response = await client.post(endpoint, json=payload)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError as exc:
+                statuses[type(exc).__name__] += 1
+                continue
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+
+
+async def run_load(args: argparse.Namespace) -> dict[str, Any]:
+    async with httpx.AsyncClient(base_url=args.url, timeout=10) as probe:
+        before = await _scrape(probe)
+
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    remaining = [float(args.requests) if args.requests > 0 else math.inf]
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(
+        *(
+            _worker(
+                i,
+                args.url,
+                args.endpoint,
+                deadline,
+                remaining,
+                latencies,
+                statuses,
+                args.top_k,
+                args.timeout,
+            )
+            for i in range(args.concurrency)
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=10) as probe:
+        after = await _scrape(probe)
+
+    latencies.sort()
+    stages: dict[str, Any] = {}
+    for stage, buckets in sorted(stage_deltas(before, after).items()):
+        count = buckets.get(math.inf, 0.0)
+        if count <= 0:
+            continue
+        stages[stage] = {
+            "count": int(count),
+            **{
+                f"p{int(q * 100)}_ms": (
+                    None if (v := histogram_quantile(q, buckets)) is None else v * 1000
+                )
+                for q in (0.5, 0.95, 0.99)
+            },
+        }
+
+    return {
+        "config": {
+            "url": args.url,
+            "endpoint": args.endpoint,
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "requests": args.requests,
+        },
+        "elapsed_s": elapsed,
+        "completed": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+        "statuses": dict(statuses),
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        },
+        "stages": stages,
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    print(
+        f"{report['completed']} ok in {report['elapsed_s']:.1f}s "
+        f"-> {report['throughput_rps']:.1f} req/s  statuses={report['statuses']}"
+    )
+    lat = report["latency_ms"]
+    print(
+        f"client latency: p50={lat['p50']:.1f}ms p95={lat['p95']:.1f}ms p99={lat['p99']:.1f}ms"
+    )
+    if not report["stages"]:
+        print("no stage metrics (is METRICS_ENABLED=true on the server?)")
+        return
+    print(f"{'stage':<18}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, values in report["stages"].items():
+        cells = [
+            "-" if values[key] is None else f"{values[key]:.1f}"
+            for key in ("p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"{stage:<18}{values['count']:>8}{cells[0]:>10}{cells[1]:>10}{cells[2]:>10}"
+        )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test /chat/rag")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument(
+        "--endpoint", choices=("/chat/rag", "/chat"), default="/chat/rag"
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument(
+        "--requests", type=int, default=0, help="Stop after N requests (0 = no cap)"
+    )
+    parser.add_argument("--top-k", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(run_load(args))
+    _print_report(report)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Wrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app import bulk_write, chapter_ingest, parsers
+from app.db import Base
+from app.models import Chapter, ChapterChunk
+
+
+WIKITEXT = """{{Chapterinfobox
+|title=Another Journey
+|game=Fire Emblem: The Blazing Blade
+}}
+'''Another Journey''' is the eleventh chapter.
+
+==Strategy==
+* Send [[Oswin]] to the front.
+"""
+
+
+def make_session() -> Session:
+    """Chapters and chunks in sqlite, which takes the executemany fallback."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return Session(engine)
+
+
+def test_bulk_ingest_skips_existing_chapters_and_writes_chunks() -> None:
+    """Re-running an import inserts nothing twice."""
+    data = parsers.parse_chapter_wikitext(WIKITEXT)
+    other = parsers.parse_chapter_wikitext(WIKITEXT.replace("Another", "Distant"))
+    pages = [(11, "Another Journey", data), (12, "Distant Journey", other)]
+
+    with make_session() as db:
+        first = chapter_ingest.bulk_ingest_chapters(
+            db, pages, generate_embeddings=False
+        )
+        again = chapter_ingest.bulk_ingest_chapters(
+            db, pages, generate_embeddings=False
+        )
+
+        assert first == {"inserted": 2, "skipped": 0, "chunks": 8}
+        assert again == {"inserted": 0, "skipped": 2, "chunks": 0}
+        chapter = db.query(Chapter).filter(Chapter.pageid == 11).one()
+        assert [(c.kind, c.chunk_index) for c in chapter.chunks] == [
+            ("summary", 0),
+            ("infobox", 1),
+            ("infobox", 2),
+            ("section", 3),
+        ]
+        assert db.query(ChapterChunk).count() == 8
+
+
+def test_chunk_rows_follow_copy_column_order() -> None:
+    """Rows line up with the COPY column list."""
+    _, chunks = chapter_ingest.build_chapter_records_from_wikitext(
+        11, "Another Journey", parsers.parse_chapter_wikitext(WIKITEXT)
+    )
+    chunks[0].embedding = [0.5, 1.0]
+
+    row = dict(zip(bulk_write.CHUNK_COLUMNS, bulk_write.chunk_rows(7, chunks)[0]))
+
+    assert row["chapter_id"] == 7
+    assert (row["kind"], row["chunk_index"], row["embedding"]) == (
+        "summary",
+        0,
+        [0.5, 1.0],
+    )
+
+
+def test_copy_chunks_round_trips_embeddings_through_binary_copy() -> None:
+    """Both vector columns survive the binary COPY path (needs PostgreSQL)."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    try:
+        connection = create_engine(url).connect()
+    except OperationalError as e:
+        pytest.skip(f"PostgreSQL is not reachable: {e}")
+
+    # Everything, tables included, is rolled back at the end
+    with connection, connection.begin() as transaction:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        Base.metadata.create_all(connection)
+        db = Session(bind=connection)
+        chapter = Chapter(pageid=-11, title="Another Journey", raw_infobox={})
+        db.add(chapter)
+        db.flush()
+        _, chunks = chapter_ingest.build_chapter_records_from_wikitext(
+            -11, "Another Journey", parsers.parse_chapter_wikitext(WIKITEXT)
+        )
+        chunks[0].embedding = [0.25] * 1536
+        chunks[0].embedding_local = [-0.5] * 384
+
+        rows = bulk_write.chunk_rows(chapter.id, chunks[:2])
+        assert bulk_write.copy_chunks(db, rows) == 2
+
+        stored = (
+            db.query(ChapterChunk)
+            .filter(ChapterChunk.chapter_id == chapter.id)
+            .order_by(ChapterChunk.chunk_index)
+            .all()
+        )
+        assert [(c.kind, c.text) for c in stored] == [
+            (c.kind, c.text) for c in chunks[:2]
+        ]
+        assert [float(x) for x in stored[0].embedding] == [0.25] * 1536
+        assert [float(x) for x in stored[0].embedding_local] == [-0.5] * 384
+        assert stored[1].embedding is None and stored[1].embedding_local is None
+        transaction.rollback()
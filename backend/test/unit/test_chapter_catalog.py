@@ -0,0 +1,96 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from app import chapter_catalog, chapter_ingest, parsers
+from app.db import Base, get_db
+from app.http_cache import etag_matches
+from app.routes import wiki
+
+
+WIKITEXT = """{{Chapterinfobox
+|title=Another Journey
+|game=Fire Emblem: The Blazing Blade
+|boss=Jerme
+}}
+'''Another Journey''' is the eleventh chapter.
+"""
+
+
+def make_engine():
+    """In-memory sqlite shared with the TestClient's worker thread."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def ingest(db: Session, pageid: int, title: str, game: str) -> None:
+    wikitext = WIKITEXT.replace("Another Journey", title).replace(
+        "Fire Emblem: The Blazing Blade", game
+    )
+    chapter_ingest.bulk_ingest_chapters(
+        db,
+        [(pageid, title, parsers.parse_chapter_wikitext(wikitext))],
+        generate_embeddings=False,
+    )
+
+
+def test_catalog_groups_by_normalized_game() -> None:
+    with Session(make_engine()) as db:
+        ingest(db, 1, "Another Journey", "[[Fire Emblem: The Blazing Blade]]")
+        ingest(db, 2, "Dawn", "Fire Emblem: Radiant Dawn")
+        ingest(db, 3, "Distant Journey", "Fire Emblem: The Blazing Blade")
+
+        catalog = chapter_catalog.build_chapter_catalog(db)
+
+    assert catalog["total_chapters"] == 3
+    assert [
+        (g["game"], [c["id"] for c in g["chapters"]]) for g in catalog["games"]
+    ] == [
+        ("Fire Emblem: Radiant Dawn", [2]),
+        ("Fire Emblem: The Blazing Blade", [3, 1]),
+    ]
+
+
+def test_catalog_is_served_from_memory_until_ingest() -> None:
+    """GET /chapters answers 304 to a current ETag and changes after ingest."""
+    engine = make_engine()
+    app = FastAPI()
+    app.include_router(wiki.router)
+    app.dependency_overrides[get_db] = lambda: Session(engine)
+    client = TestClient(app)
+    chapter_catalog.invalidate_chapter_catalog()
+
+    with Session(engine) as db:
+        ingest(db, 1, "Another Journey", "Fire Emblem: The Blazing Blade")
+
+    first = client.get("/chapters")
+    etag = first.headers["etag"]
+    assert first.json()["total_chapters"] == 1
+    assert first.headers["cache-control"] == "public, no-cache"
+
+    repeat = client.get("/chapters", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+    with Session(engine) as db:
+        ingest(db, 2, "Distant Journey", "Fire Emblem: The Blazing Blade")
+
+    changed = client.get("/chapters", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["total_chapters"] == 2
+    assert changed.headers["etag"] != etag
+    chapter_catalog.invalidate_chapter_catalog()
+
+
+def test_etag_matching_is_weak_and_accepts_lists() -> None:
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
@@ -0,0 +1,79 @@
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.compression import CompressionMiddleware, accepts_encoding
+from app.responses import json_response
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get("/big")
+    def big(response: Response) -> Response:
+        response.set_cookie("session", "abc")
+        response.headers["ETag"] = '"v1"'
+        return json_response({"html": "<p>Lyn</p>" * 500}, response)
+
+    @app.get("/stream")
+    def stream() -> StreamingResponse:
+        lines = (b'{"page": %d}\n' % index for index in range(3))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    @app.get("/small")
+    def small() -> Response:
+        return json_response({"ok": True})
+
+    return app
+
+
+def test_large_responses_are_gzipped_with_a_weak_etag() -> None:
+    http = TestClient(make_app())
+
+    big = http.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert big.headers["content-encoding"] == "gzip"
+    assert big.headers["etag"] == 'W/"v1"'
+    assert big.cookies["session"] == "abc"
+    assert big.json()["html"].startswith("<p>Lyn</p>")
+    assert int(big.headers["content-length"]) < 5000
+
+    small = http.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.json() == {"ok": True}
+
+
+def test_streaming_responses_are_compressed_chunk_by_chunk() -> None:
+    http = TestClient(make_app())
+    response = http.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text.splitlines() == [f'{{"page": {i}}}' for i in range(3)]
+
+
+def test_identity_when_the_client_refuses_compression() -> None:
+    http = TestClient(make_app())
+    response = http.get("/big", headers={"Accept-Encoding": "gzip;q=0"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"v1"'
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_accept_encoding_parsing() -> None:
+    assert accepts_encoding("gzip, deflate, br", "br")
+    assert accepts_encoding("*", "gzip")
+    assert not accepts_encoding("gzip;q=0, br", "gzip")
+    assert not accepts_encoding("gzipx", "gzip")
+    assert not accepts_encoding("", "gzip")
+
+
+def test_brotli_is_preferred_when_installed() -> None:
+    pytest.importorskip("brotli")
+    http = TestClient(make_app())
+
+    response = http.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json()["html"].startswith("<p>Lyn</p>")
@@ -0,0 +1,35 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool, QueuePool
+
+from app.config import settings
+from app.db import engine_options
+
+
+def test_queue_mode_uses_configured_pool() -> None:
+    config = settings.model_copy(
+        update={
+            "database_pool_mode": "queue",
+            "database_pool_size": 2,
+            "database_max_overflow": 1,
+            "database_pool_timeout": 3.0,
+            "database_pool_recycle": 600,
+            "database_pool_pre_ping": False,
+        }
+    )
+    options = engine_options(config)
+    assert options["pool_recycle"] == 600
+    assert not options["pool_pre_ping"]
+
+    engine = create_engine("sqlite://", poolclass=QueuePool, **options)
+    assert isinstance(engine.pool, QueuePool)
+    assert engine.pool.size() == 2
+    assert engine.pool.timeout() == 3.0
+
+
+def test_transaction_pooler_mode_disables_pool_and_prepares() -> None:
+    config = settings.model_copy(update={"database_pool_mode": "transaction_pooler"})
+    options = engine_options(config)
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"] == {"prepare_threshold": None}
+    assert "pool_size" not in options
+    assert "pool_pre_ping" not in options
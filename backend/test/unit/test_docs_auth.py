@@ -0,0 +1,53 @@
+import base64
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.docs_auth import (
+    DocsBasicAuthMiddleware,
+    DocsSessionAuthMiddleware,
+    _docs_issue_token,
+)
+
+
+def make_app(middleware: type, **options) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(middleware, enabled=True, **options)
+
+    @app.get("/chapters")
+    def chapters() -> dict:
+        return {"ok": True}
+
+    return TestClient(app, follow_redirects=False)
+
+
+def test_session_auth_redirects_docs_and_passes_other_routes() -> None:
+    http = make_app(DocsSessionAuthMiddleware, secret="s3cret")
+
+    assert http.get("/chapters").json() == {"ok": True}
+
+    redirect = http.get("/docs", params={"x": "1"})
+    assert redirect.status_code == 302
+    assert redirect.headers["location"] == "/docs-login?next=/docs?x=1"
+
+    token = _docs_issue_token(secret="s3cret", ttl_seconds=60)
+    http.cookies.set("docs_session", token)
+    assert http.get("/openapi.json").status_code == 200
+
+
+def test_basic_auth_checks_credentials_on_docs_only() -> None:
+    http = make_app(DocsBasicAuthMiddleware, username="roy", password="binding")
+    good = base64.b64encode(b"roy:binding").decode()
+    bad = base64.b64encode(b"roy:wrong").decode()
+
+    assert http.get("/chapters").status_code == 200
+    assert http.get("/redoc").status_code == 401
+    assert (
+        http.get("/redoc", headers={"Authorization": f"Basic {bad}"}).status_code == 401
+    )
+    assert (
+        http.get("/openapi.json", headers={"Authorization": f"Basic {good}"}).json()[
+            "info"
+        ]["title"]
+        == "FastAPI"
+    )
@@ -0,0 +1,102 @@
+import bz2
+import io
+from pathlib import Path
+
+from app import dump_import, parsers
+
+
+DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11">
+  <siteinfo><sitename>Fire Emblem Wiki</sitename></siteinfo>
+  <page>
+    <title>Another Journey</title><ns>0</ns><id>11</id>
+    <revision><id>501</id><text xml:space="preserve">{{Chapterinfobox
+|title=Another Journey
+}}
+'''Another Journey''' is a chapter.</text></revision>
+  </page>
+  <page>
+    <title>Hector</title><ns>0</ns><id>12</id>
+    <revision><id>502</id><text xml:space="preserve">'''Hector''' is a lord.</text></revision>
+  </page>
+  <page>
+    <title>Template:Chapterinfobox</title><ns>10</ns><id>13</id>
+    <revision><id>503</id><text xml:space="preserve">{{Chapterinfobox}} docs</text></revision>
+  </page>
+  <page>
+    <title>Chapter 11 (FE7)</title><ns>0</ns><id>14</id>
+    <redirect title="Another Journey" />
+    <revision><id>504</id><text xml:space="preserve">#REDIRECT [[Another Journey]] {{Chapterinfobox}}</text></revision>
+  </page>
+  <page>
+    <title>Taking Leave</title><ns>0</ns><id>15</id>
+    <revision><id>505</id><text xml:space="preserve">{{ chapterinfobox |title=Taking Leave}}</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+def test_dump_yields_only_chapter_articles_in_order() -> None:
+    """Redirects, other namespaces and non-chapter pages are filtered out."""
+    pages = list(dump_import.iter_chapter_pages(io.BytesIO(DUMP.encode())))
+
+    assert [(p["pageid"], p["title"]) for p in pages] == [
+        (11, "Another Journey"),
+        (15, "Taking Leave"),
+    ]
+    assert pages[0]["wikitext"].startswith("{{Chapterinfobox\n|title=Another Journey")
+
+
+def test_every_imported_page_yields_its_infobox() -> None:
+    """The import filter and the parser agree on what an infobox is."""
+    pages = list(dump_import.iter_chapter_pages(io.BytesIO(DUMP.encode())))
+
+    for page in pages:
+        infobox = parsers.parse_chapter_wikitext(page["wikitext"])["infobox"]
+        assert infobox["title"] == page["title"]
+    taking_leave = parsers.parse_chapter_wikitext(pages[1]["wikitext"])
+    assert taking_leave["infobox"]["fields"] == [
+        {"label": "Title", "value": "Taking Leave", "group": None}
+    ]
+
+
+HISTORY_DUMP = """<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11">
+  <page>
+    <title>Another Journey</title><ns>0</ns><id>11</id>
+    <revision><id>401</id><text xml:space="preserve">Stub.</text></revision>
+    <revision><id>501</id><text xml:space="preserve">{{Chapterinfobox
+|title=Another Journey
+}}</text></revision>
+  </page>
+  <page>
+    <title>Hector</title><ns>0</ns><id>12</id>
+    <revision><id>402</id><text xml:space="preserve">{{Chapterinfobox}}</text></revision>
+    <revision><id>502</id><text xml:space="preserve">'''Hector''' is a lord.</text></revision>
+  </page>
+</mediawiki>
+"""
+
+
+def test_full_history_dumps_use_the_latest_revision() -> None:
+    """Only a page's newest revision is filtered and imported."""
+    pages = list(dump_import.iter_dump_pages(io.BytesIO(HISTORY_DUMP.encode())))
+    chapters = dump_import.iter_chapter_pages(io.BytesIO(HISTORY_DUMP.encode()))
+
+    assert [p["wikitext"] for p in pages] == [
+        "{{Chapterinfobox\n|title=Another Journey\n}}",
+        "'''Hector''' is a lord.",
+    ]
+    assert [p["pageid"] for p in chapters] == [11]
+
+
+def test_compressed_dumps_are_streamed(tmp_path: Path) -> None:
+    """.bz2 dumps are read without unpacking them first."""
+    path = tmp_path / "pages.xml.bz2"
+    path.write_bytes(bz2.compress(DUMP.encode()))
+
+    assert [p["pageid"] for p in dump_import.iter_dump_pages(path)] == [
+        11,
+        12,
+        13,
+        14,
+        15,
+    ]
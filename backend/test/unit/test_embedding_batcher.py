@@ -0,0 +1,74 @@
+import pytest
+
+from app import embedding_batcher
+from app.embedding_batcher import EmbeddingBatcher, TokenBudget
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class RecordingProvider:
+    """Embeds each text as [len(text)] and fails the first `failures` calls."""
+
+    model = "recording"
+
+    def __init__(self, failures: int = 0, error: type[Exception] = RateLimited):
+        self.failures = failures
+        self.error = error
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        if self.failures:
+            self.failures -= 1
+            raise self.error("slow down")
+        return [[float(len(t))] for t in texts], None
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch) -> None:
+    monkeypatch.setattr(embedding_batcher.time, "sleep", lambda seconds: None)
+
+
+def make_batcher(provider, **kwargs) -> EmbeddingBatcher:
+    kwargs.setdefault("max_concurrency", 1)
+    return EmbeddingBatcher(provider, budget=TokenBudget(0), **kwargs)
+
+
+def test_results_stay_aligned_with_blank_inputs() -> None:
+    """Blank texts get None in their slot instead of shifting later vectors."""
+    provider = RecordingProvider()
+
+    vectors = make_batcher(provider).embed(["abc", "", "  ", "hello"])
+
+    assert vectors == [[3.0], None, None, [5.0]]
+    assert provider.calls == [["abc", "hello"]]
+
+
+@pytest.mark.parametrize("concurrency", [1, 3])
+def test_inputs_are_packed_by_count_and_tokens(concurrency: int) -> None:
+    """No request exceeds the input or token limits, and order is kept."""
+    provider = RecordingProvider()
+    texts = ["x" * 30] * 5 + ["y" * 3] * 4
+
+    vectors = make_batcher(
+        provider, max_inputs=3, max_tokens=25, max_concurrency=concurrency
+    ).embed(texts)
+
+    assert vectors == [[30.0]] * 5 + [[3.0]] * 4
+    assert all(len(call) <= 3 for call in provider.calls)
+    assert all(sum(len(t) for t in call) <= 25 * 3 for call in provider.calls)
+    assert sorted(len(call) for call in provider.calls) == [2, 2, 2, 3]
+
+
+def test_rate_limits_are_retried_but_other_errors_raise() -> None:
+    """429s back off and retry; a bad request fails immediately."""
+    provider = RecordingProvider(failures=2)
+    assert make_batcher(provider, max_retries=2).embed(["abc"]) == [[3.0]]
+    assert len(provider.calls) == 3
+
+    provider = RecordingProvider(failures=1, error=ValueError)
+    with pytest.raises(ValueError):
+        make_batcher(provider, max_retries=5).embed(["abc"])
+    assert len(provider.calls) == 1
@@ -0,0 +1,54 @@
+import threading
+
+from app import metrics
+from app.embedding_coalescer import EmbeddingCoalescer
+
+
+class CountingProvider:
+    model = "counting"
+
+    def __init__(self) -> None:
+        self.calls: list[list[str]] = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t))] for t in texts], None
+
+
+def embed_concurrently(coalescer: EmbeddingCoalescer, texts: list[str]) -> list:
+    results: list = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def worker(index: int) -> None:
+        start.wait()
+        results[index] = coalescer.embed(texts[index])
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_queries_share_one_request() -> None:
+    """Callers inside the window are batched and each gets its own vector."""
+    metrics.reset_metrics()
+    provider = CountingProvider()
+    coalescer = EmbeddingCoalescer(provider, window_ms=200, max_batch=8)
+    texts = ["a", "bb", "ccc", "bb", "dddd", "eeeee", "ffffff", "g"]
+
+    results = embed_concurrently(coalescer, texts)
+
+    assert results == [[float(len(t))] for t in texts]
+    assert len(provider.calls) == 1
+    assert sorted(provider.calls[0]) == sorted(set(texts))
+    assert metrics.EMBEDDING_BATCH_SIZE.count() == 1
+
+
+def test_zero_window_sends_each_query_alone() -> None:
+    provider = CountingProvider()
+    coalescer = EmbeddingCoalescer(provider, window_ms=0)
+
+    assert coalescer.embed("abc") == [3.0]
+    assert provider.calls == [["abc"]]
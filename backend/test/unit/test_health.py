@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from app.health import HealthMonitor, pool_saturation, probe_database
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_status_is_cached_between_intervals() -> None:
+    calls = []
+
+    def probe() -> tuple[bool, bool]:
+        calls.append(1)
+        return True, True
+
+    clock = FakeClock()
+    monitor = HealthMonitor(10.0, probe=probe, clock=clock)
+
+    for _ in range(5):
+        status = monitor.status()
+    assert len(calls) == 1
+    assert status["ready"]
+    assert status["database"] == "connected"
+    assert status["pgvector"] == "available"
+
+    clock.now = 10.0
+    monitor.status()
+    assert len(calls) == 2
+
+
+def test_stale_or_failed_check_is_not_ready() -> None:
+    clock = FakeClock()
+    monitor = HealthMonitor(10.0, probe=lambda: (False, False), clock=clock)
+    status = monitor.status()
+    assert not status["ready"]
+    assert status["database"] == "disconnected"
+
+    # A background thread that stopped refreshing leaves an old result behind
+    monitor = HealthMonitor(10.0, probe=lambda: (True, False), clock=clock)
+    monitor.refresh()
+    monitor._thread = object()
+    clock.now = 31.0
+    status = monitor.status()
+    assert status["database"] == "connected"
+    assert not status["ready"]
+
+
+def test_pool_saturation_counts_checked_out_connections() -> None:
+    engine = create_engine(
+        "sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=2
+    )
+    assert probe_database(engine) == (True, False)
+    assert pool_saturation(engine.pool) == {
+        "in_use": 0,
+        "capacity": 4,
+        "saturation": 0.0,
+    }
+
+    with engine.connect(), engine.connect(), engine.connect():
+        assert pool_saturation(engine.pool)["saturation"] == 0.75
@@ -0,0 +1,108 @@
+from app import parsers
+from app.html_document import HtmlBlockStream, HtmlDocument
+
+
+HTML = """<div class="mw-parser-output">
+<aside class="portable-infobox">
+  <h2 class="pi-item pi-title">Another Journey</h2>
+  <figure><img src="map.png" alt="Map"></figure>
+  <section class="pi-item pi-group">
+    <h2 class="pi-item pi-header">Chapter information</h2>
+    <div class="pi-item pi-data">
+      <h3 class="pi-data-label">Boss</h3>
+      <div class="pi-data-value"><a href="/wiki/Batta">Batta</a> (<i>Brigand</i>)</div>
+    </div>
+  </section>
+</aside>
+<p>Lead paragraph before any heading.</p>
+<h2><span class="mw-headline">Plot</span></h2>
+<p>Hector sets out for <a href="/wiki/Pherae">Pherae</a>.<!-- hidden --></p>
+<script>window.ignored = true;</script>
+<ul><li>First</li><li>Second<ul><li>nested</li></ul></li></ul>
+<h3>Units</h3>
+<table class="wikitable">
+  <caption>Starting units</caption>
+  <tr><th>Unit</th><th>Level</th></tr>
+  <tr><td><a href="/wiki/Hector">Hector</a></td><td>1</td></tr>
+  <tr><td>Oswin</td></tr>
+</table>
+</div>"""
+
+
+def test_parse_chapter_page_reads_infobox_and_sections() -> None:
+    """Infobox groups, headings, paragraphs and top-level list items are kept."""
+    result = parsers.parse_chapter_page(HTML)
+
+    assert result["infobox"] == {
+        "title": "Another Journey",
+        "image": {"src": "map.png", "alt": "Map"},
+        "fields": [
+            {
+                "label": "Boss",
+                "value": "Batta ( Brigand )",
+                "group": "Chapter information",
+            }
+        ],
+    }
+    assert result["sections"] == [
+        {
+            "title": "Plot",
+            "content": ["Hector sets out for Pherae .", "First", "Second nested"],
+        },
+        {"title": "Units", "content": []},
+    ]
+
+
+def test_table_extractors_share_one_document() -> None:
+    """A parsed document gives the same tables as the raw HTML string."""
+    document = HtmlDocument(HTML)
+
+    assert parsers.extract_tables_as_json(document) == [
+        {
+            "caption": "Starting units",
+            "headers": ["Unit", "Level"],
+            "rows": [{"Unit": "Hector", "Level": "1"}, {"Unit": "Oswin"}],
+        }
+    ]
+    assert parsers.extract_tables_as_markdown(document) == [
+        "|Unit|Level|\n|---|---|\n|Hector|1|\n|Oswin| |"
+    ]
+    assert parsers.extract_tables_as_json(HTML) == parsers.extract_tables_as_json(
+        document
+    )
+    assert parsers.parse_chapter_page(document) == parsers.parse_chapter_page(HTML)
+
+
+def test_streaming_parse_matches_document_parse() -> None:
+    """Streaming gives the same chapter and tables, however the input is chunked."""
+    document = HtmlDocument(HTML)
+    expected = {
+        "chapter": parsers.parse_chapter_page(document),
+        "tables_json": parsers.extract_tables_as_json(document),
+        "tables_markdown": parsers.extract_tables_as_markdown(document),
+    }
+    chunks = [HTML[i : i + 5] for i in range(0, len(HTML), 5)]
+
+    assert parsers.parse_page_streaming(HTML, as_markdown=True) == expected
+    assert parsers.parse_page_streaming(chunks, as_markdown=True) == expected
+
+
+def test_block_stream_keeps_one_block_in_memory() -> None:
+    """Earlier blocks are detached before the next one is handed out."""
+    stream = HtmlBlockStream(HTML + "<p>outside</p>")
+    blocks = []
+    for block, in_content in stream:
+        assert block.getprevious() is None
+        blocks.append((block.tag, in_content))
+
+    assert stream.has_content_root
+    assert blocks == [
+        ("aside", True),
+        ("p", True),
+        ("h2", True),
+        ("p", True),
+        ("ul", True),
+        ("h3", True),
+        ("table", True),
+        ("p", False),
+    ]
@@ -0,0 +1,139 @@
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import job_queue
+from app.chapter_ingest import DuplicateChapterError
+from app.db import Base
+from app.models import IngestJob
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch) -> sessionmaker:
+    """Jobs table in a sqlite file (no SKIP LOCKED, same state machine)."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.sqlite3'}")
+    Base.metadata.create_all(engine, tables=[IngestJob.__table__])
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(job_queue, "SessionLocal", factory)
+    monkeypatch.setattr(job_queue.settings, "job_max_attempts", 2)
+    return factory
+
+
+def use_handler(monkeypatch, handler) -> None:
+    monkeypatch.setattr(
+        job_queue, "JOB_HANDLERS", {"ingest": handler, "reingest": handler}
+    )
+
+
+def load(queue: sessionmaker, job_id: int) -> IngestJob:
+    with queue() as db:
+        return db.get(IngestJob, job_id)
+
+
+def test_job_runs_through_stages_to_success(queue, monkeypatch) -> None:
+    """A claimed job reports its stages and stores the handler's result."""
+    stages = []
+
+    def handler(db, job, report):
+        report("fetching")
+        stages.append(load(queue, job.id).stage)
+        return {"chapter_id": 7, "chunks_count": 3}
+
+    use_handler(monkeypatch, handler)
+    with queue() as db:
+        job_id = job_queue.enqueue_ingest_job(db, "Another Journey").id
+
+    assert job_queue.run_next_job() is True
+    assert job_queue.run_next_job() is False
+
+    job = load(queue, job_id)
+    assert stages == ["fetching"]
+    assert (job.status, job.stage, job.attempts) == ("succeeded", "done", 1)
+    assert job.result == {"chapter_id": 7, "chunks_count": 3}
+
+
+def test_failed_job_is_retried_then_marked_failed(queue, monkeypatch) -> None:
+    """Transient errors back off and retry until max_attempts."""
+
+    def handler(db, job, report):
+        raise RuntimeError("wiki timed out")
+
+    use_handler(monkeypatch, handler)
+    with queue() as db:
+        job_id = job_queue.enqueue_ingest_job(db, "Another Journey", reingest=True).id
+
+    job_queue.run_next_job()
+    job = load(queue, job_id)
+    assert (job.status, job.attempts, job.error) == ("queued", 1, "wiki timed out")
+    assert job.run_after > datetime.utcnow()
+    assert job_queue.run_next_job() is False
+
+    with queue() as db:
+        db.get(IngestJob, job_id).run_after = datetime.utcnow()
+        db.commit()
+    job_queue.run_next_job()
+
+    job = load(queue, job_id)
+    assert (job.status, job.attempts, job.kind) == ("failed", 2, "reingest")
+
+
+def test_duplicate_chapter_fails_without_retry(queue, monkeypatch) -> None:
+    """Errors that cannot succeed on retry fail the job at once."""
+
+    def handler(db, job, report):
+        raise DuplicateChapterError("exists", chapter_title="X", game=None)
+
+    use_handler(monkeypatch, handler)
+    with queue() as db:
+        job_id = job_queue.enqueue_ingest_job(db, "X").id
+
+    job_queue.run_next_job()
+
+    job = load(queue, job_id)
+    assert (job.status, job.attempts, job.error) == ("failed", 1, "exists")
+
+
+def test_heartbeat_keeps_a_long_stage_from_going_stale(queue, monkeypatch) -> None:
+    """updated_at advances while the handler runs, without stage changes."""
+    monkeypatch.setattr(job_queue.settings, "job_heartbeat_seconds", 0.02)
+    seen = []
+
+    def handler(db, job, report):
+        seen.append(load(queue, job.id).updated_at)
+        time.sleep(0.2)
+        seen.append(load(queue, job.id).updated_at)
+        return {}
+
+    use_handler(monkeypatch, handler)
+    with queue() as db:
+        job_queue.enqueue_ingest_job(db, "Another Journey")
+    job_queue.run_next_job()
+
+    assert seen[1] > seen[0]
+
+
+def test_reclaimed_job_ignores_the_first_workers_outcome(queue, monkeypatch) -> None:
+    """Only the latest claim may report stages or finish the job."""
+    monkeypatch.setattr(job_queue.settings, "job_stale_after_seconds", 60)
+
+    def handler(db, job, report):
+        # The heartbeat stalled; a second worker reclaims the job meanwhile.
+        with queue() as other:
+            other.get(IngestJob, job.id).updated_at = datetime(2000, 1, 1)
+            other.commit()
+            reclaimed = job_queue.claim_next_job(other)
+            assert (reclaimed.id, reclaimed.attempts) == (job.id, 2)
+        report("storing")
+        return {"chapter_id": 1}
+
+    use_handler(monkeypatch, handler)
+    with queue() as db:
+        job_id = job_queue.enqueue_ingest_job(db, "Another Journey").id
+    job_queue.run_next_job()
+
+    job = load(queue, job_id)
+    assert (job.status, job.stage, job.attempts) == ("running", "starting", 2)
+    assert job.result is None
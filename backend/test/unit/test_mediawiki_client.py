@@ -0,0 +1,255 @@
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from app.mediawiki_client import MediaWikiClient
+from app.wiki_cache import WikiResponseCache
+
+
+class FakeResponse:
+    def __init__(self, data: dict, status: int = 200, headers: dict | None = None):
+        self._data = data
+        self.status_code = status
+        self.headers = headers or {}
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}", response=self)
+
+    def json(self) -> dict:
+        return self._data
+
+
+class FakeWiki:
+    """Stands in for `session.get`; page fetches overlap when run in parallel."""
+
+    def __init__(self, titles: list[str], lagged: int = 0) -> None:
+        self.titles = titles
+        self.lagged = lagged
+        self.params: list[dict] = []
+        self.revid = 100
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, params: dict, timeout: int) -> FakeResponse:
+        self.params.append(params)
+        if params.get("prop") == "revisions":
+            pages = [
+                {"title": t, "revisions": [{"revid": self.revid}]}
+                for t in params["titles"].split("|")
+            ]
+            return FakeResponse({"query": {"pages": pages}})
+        if params["action"] == "query":
+            members = [{"pageid": i, "title": t} for i, t in enumerate(self.titles)]
+            return FakeResponse({"query": {"categorymembers": members}})
+
+        with self._lock:
+            if self.lagged:
+                self.lagged -= 1
+                return FakeResponse(
+                    {
+                        "error": {
+                            "code": "maxlag",
+                            "info": "Waiting for db: 7 seconds lagged",
+                        }
+                    },
+                    headers={"Retry-After": "0"},
+                )
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        title = params["page"]
+        return FakeResponse(
+            {"parse": {"title": title, "revid": self.revid, "text": f"<p>{title}</p>"}}
+        )
+
+    def calls(self, kind: str) -> int:
+        if kind == "revisions":
+            return sum(p.get("prop") == "revisions" for p in self.params)
+        return sum(p["action"] == kind for p in self.params)
+
+
+def make_client(wiki: FakeWiki, **kwargs) -> MediaWikiClient:
+    kwargs.setdefault("cache", None)
+    client = MediaWikiClient(**kwargs)
+    client.session.get = wiki.get
+    return client
+
+
+def test_category_pages_are_fetched_concurrently_in_order() -> None:
+    """Pages overlap in flight but come back in category order."""
+    titles = [f"Chapter {i}" for i in range(12)]
+    wiki = FakeWiki(titles)
+
+    pages = make_client(wiki, max_concurrency=4).fetch_pages_in_category("Ch", limit=12)
+
+    assert [p["title"] for p in pages] == titles
+    assert [p["pageid"] for p in pages] == list(range(12))
+    assert 1 < wiki.max_active <= 4
+    assert all(p["maxlag"] == 5 for p in wiki.params)
+
+
+def test_maxlag_errors_are_retried_after_retry_after() -> None:
+    """A maxlag error pauses and retries instead of returning an empty page."""
+    wiki = FakeWiki(["Another Journey"], lagged=2)
+
+    page = make_client(wiki, max_retries=3).fetch_page_html("Another Journey")
+
+    assert page["html"] == "<p>Another Journey</p>"
+    assert len(wiki.params) == 3
+
+
+def test_cache_serves_fresh_pages_and_revalidates_stale_ones(tmp_path: Path) -> None:
+    """Stale entries are reused while the revid is unchanged and refetched after."""
+    wiki = FakeWiki(["Another Journey"])
+    cache = WikiResponseCache(
+        tmp_path / "wiki.sqlite3", ttl_seconds=60, max_bytes=1 << 20
+    )
+    client = make_client(wiki, cache=cache)
+
+    first = client.fetch_page_html("Another Journey")
+    assert client.fetch_page_html("Another Journey") == first
+    assert first["revid"] == 100
+    assert wiki.calls("parse") == 1
+
+    cache.ttl_seconds = 0
+    assert client.fetch_page_html("Another Journey") == first
+    assert (wiki.calls("parse"), wiki.calls("revisions")) == (1, 1)
+
+    wiki.revid = 101
+    assert client.fetch_page_html("Another Journey")["revid"] == 101
+    assert (wiki.calls("parse"), wiki.calls("revisions")) == (2, 2)
+
+
+def test_cache_evicts_least_recently_used_pages(tmp_path: Path) -> None:
+    """The byte cap drops the entries read longest ago."""
+    cache = WikiResponseCache(
+        tmp_path / "wiki.sqlite3", ttl_seconds=60, max_bytes=10**6
+    )
+    for title in ("A", "B", "C"):
+        cache.put("parse", title, "text", {"text": title * 1000}, 1)
+        time.sleep(0.01)
+    cache.get("parse", "A", "text")
+
+    cache.max_bytes = cache.size_bytes() - 1
+    cache.put("parse", "D", "text", {"text": "D"}, 1)
+
+    assert cache.get("parse", "B", "text") is None
+    assert cache.get("parse", "A", "text") is not None
+    assert cache.get("parse", "C", "text") is not None
+
+
+def test_cache_expires_entries_without_a_revid_and_tracks_its_size(
+    tmp_path: Path,
+) -> None:
+    """No revid means no revalidation: the TTL alone retires the entry."""
+    cache = WikiResponseCache(
+        tmp_path / "wiki.sqlite3", ttl_seconds=60, max_bytes=10**6
+    )
+    cache.put("parse", "A", "text", {"text": "A" * 1000}, None)
+    cache.put("parse", "B", "text", {"text": "B"}, 1)
+    cache.put("parse", "B", "text", {"text": "B" * 1000}, 2)
+    (total,) = cache._conn.execute("SELECT SUM(size) FROM responses").fetchone()
+    assert cache.size_bytes() == total
+
+    cache.ttl_seconds = 0
+    assert cache.get("parse", "A", "text") is None
+    assert cache.get("parse", "B", "text").stale
+    cache.delete("parse", "B", "text")
+    assert cache.size_bytes() == 0
+
+
+def test_wiki_previews_answer_304_from_revision_ids(monkeypatch) -> None:
+    """A current ETag is confirmed with a revisions query; nothing is parsed."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.controllers import wiki_controller
+    from app.routes import wiki
+
+    fake = FakeWiki(["Prologue", "Chapter 1"])
+    monkeypatch.setattr(wiki_controller, "client", make_client(fake))
+    app = FastAPI()
+    app.include_router(wiki.router)
+    http = TestClient(app)
+
+    first = http.get("/wiki/category/Chapters", params={"limit": 2})
+    etag = first.headers["etag"]
+    assert first.json()["pages"][0]["revid"] == 100
+    assert first.headers["cache-control"].startswith("public, max-age=")
+
+    parses = fake.calls("parse")
+    repeat = http.get(
+        "/wiki/category/Chapters", params={"limit": 2}, headers={"If-None-Match": etag}
+    )
+    assert repeat.status_code == 304
+    assert fake.calls("parse") == parses
+
+    # Another query string is another representation.
+    other = http.get(
+        "/wiki/category/Chapters",
+        params={"limit": 2, "raw": True},
+        headers={"If-None-Match": etag},
+    )
+    assert other.status_code == 200
+
+    page = http.get("/wiki/page/Prologue")
+    fake.revid = 101
+    edited = http.get(
+        "/wiki/page/Prologue", headers={"If-None-Match": page.headers["etag"]}
+    )
+    assert edited.status_code == 200
+    assert edited.json()["revid"] == 101
+    assert edited.headers["etag"] != page.headers["etag"]
+
+
+def test_preview_etags_change_with_the_parser(monkeypatch) -> None:
+    """A parser upgrade or a new parse mode invalidates ETags already handed out."""
+    from app.config import settings
+    from app.controllers import wiki_controller
+
+    revisions = [("Prologue", 100)]
+    etag = wiki_controller.wiki_etag(revisions, "text")
+    assert wiki_controller.wiki_etag(revisions, "text") == etag
+
+    monkeypatch.setattr(wiki_controller, "PARSER_VERSION", -1)
+    assert wiki_controller.wiki_etag(revisions, "text") != etag
+    monkeypatch.undo()
+
+    monkeypatch.setattr(
+        settings,
+        "html_stream_threshold_chars",
+        settings.html_stream_threshold_chars + 1,
+    )
+    assert wiki_controller.wiki_etag(revisions, "text") != etag
+
+
+def test_category_pages_stream_as_ndjson(monkeypatch) -> None:
+    """Every page arrives as its own line, tagged with its category position."""
+    import json
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from app.controllers import wiki_controller
+    from app.routes import wiki
+
+    fake = FakeWiki([f"Chapter {i}" for i in range(6)])
+    monkeypatch.setattr(wiki_controller, "client", make_client(fake, max_concurrency=2))
+    app = FastAPI()
+    app.include_router(wiki.router)
+
+    response = TestClient(app).get(
+        "/wiki/category/Chapters", params={"limit": 6, "stream": True}
+    )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert sorted(line["index"] for line in lines) == list(range(6))
+    assert {line["title"] for line in lines} == {f"Chapter {i}" for i in range(6)}
+    assert fake.max_active <= 2
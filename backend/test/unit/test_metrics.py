@@ -0,0 +1,97 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.config import settings
+from app.main import app
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics() -> None:
+    """Start every test from an empty registry."""
+    metrics.reset_metrics()
+    yield
+    metrics.reset_metrics()
+
+
+def test_track_stage_records_duration_even_on_error() -> None:
+    """A failing block must still be counted in the stage histogram."""
+    with metrics.track_stage("embedding"):
+        pass
+
+    with pytest.raises(RuntimeError):
+        with metrics.track_stage("embedding"):
+            raise RuntimeError("boom")
+
+    assert metrics.REQUEST_STAGE_SECONDS.count(stage="embedding") == 2
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    """Each observation is counted in every bucket whose bound it fits under."""
+    histogram = metrics.Histogram("test_seconds", "test", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5.0)
+
+    rendered = "\n".join(histogram.render())
+
+    assert 'test_seconds_bucket{le="0.1"} 1' in rendered
+    assert 'test_seconds_bucket{le="1"} 2' in rendered
+    assert 'test_seconds_bucket{le="+Inf"} 3' in rendered
+    assert "test_seconds_count 3" in rendered
+
+
+def test_token_usage_and_cache_ratio_rendered() -> None:
+    """Token counters and cache hit ratios appear in the exposition output."""
+    metrics.record_token_usage(
+        {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+        model="gpt-test",
+    )
+    metrics.record_cache_lookup("wiki", hit=True)
+    metrics.record_cache_lookup("wiki", hit=True)
+    metrics.record_cache_lookup("wiki", hit=False)
+    metrics.record_cache_lookup("wiki", hit=False)
+
+    rendered = metrics.render_metrics()
+
+    assert (
+        'forseti_openai_tokens_total{model="gpt-test",kind="total_tokens"} 15'
+        in rendered
+    )
+    assert 'forseti_cache_hit_ratio{cache="wiki"} 0.5' in rendered
+
+
+def test_metrics_endpoint_serves_text_format() -> None:
+    """GET /metrics returns the Prometheus text format, including pool gauges."""
+    with metrics.track_stage("rate_limit"):
+        pass
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'forseti_request_stage_seconds_count{stage="rate_limit"} 1' in (
+        response.text
+    )
+    assert "# TYPE forseti_db_pool_connections gauge" in response.text
+
+
+@pytest.mark.parametrize(
+    ("environment", "enabled", "served"),
+    [
+        ("local", None, True),
+        ("development", None, True),
+        ("staging", None, False),
+        ("production", None, False),
+        ("production", True, True),
+        ("local", False, False),
+    ],
+)
+def test_metrics_are_off_by_default_outside_development(
+    environment: str, enabled: bool | None, served: bool
+) -> None:
+    """/metrics has no auth, so production only serves it when asked to."""
+    config = settings.model_copy(
+        update={"environment": environment, "metrics_enabled": enabled}
+    )
+    assert config.metrics_served is served
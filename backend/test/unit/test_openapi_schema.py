@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.openapi_schema import install_prebuilt_openapi, render_openapi
+
+
+def make_app() -> FastAPI:
+    app = FastAPI(title="Forseti")
+
+    @app.get("/chapters")
+    def chapters() -> dict:
+        return {}
+
+    return app
+
+
+def test_prebuilt_schema_is_served_as_is(tmp_path: Path) -> None:
+    path = tmp_path / "openapi.json"
+    path.write_bytes(render_openapi(make_app()))
+
+    app = make_app()
+    assert install_prebuilt_openapi(app, path)
+    response = TestClient(app).get("/openapi.json")
+
+    assert response.content == path.read_bytes()
+    assert "/chapters" in app.openapi()["paths"]
+    assert TestClient(app).get("/docs").status_code == 200
+
+
+def test_missing_schema_falls_back_to_generation(tmp_path: Path) -> None:
+    app = make_app()
+
+    assert not install_prebuilt_openapi(app, tmp_path / "missing.json")
+    assert "/chapters" in TestClient(app).get("/openapi.json").json()["paths"]
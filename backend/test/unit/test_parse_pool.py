@@ -0,0 +1,35 @@
+from functools import partial
+from pathlib import Path
+
+import pytest
+
+from app import parse_pool, parsers
+
+
+CHAPTER_HTML = (
+    Path(__file__).resolve().parents[2] / "benchmarks" / "fixtures" / "chapter.html"
+).read_text(encoding="utf-8")
+
+
+@pytest.fixture
+def pool() -> None:
+    assert parse_pool.start_parse_pool(workers=1)
+    yield
+    parse_pool.shutdown_parse_pool()
+
+
+def test_without_pool_parsers_run_inline() -> None:
+    """PARSE_WORKERS=0 keeps parsing on the calling thread."""
+    assert not parse_pool.start_parse_pool(workers=0)
+
+    assert parse_pool.run_parser(parsers.parse_chapter_html, CHAPTER_HTML) == (
+        parsers.parse_chapter_page(CHAPTER_HTML)
+    )
+
+
+def test_pool_returns_same_dicts_in_order(pool: None) -> None:
+    """Pages parsed in worker processes match inline parsing, in input order."""
+    pages = [CHAPTER_HTML, "<p>empty page</p>", CHAPTER_HTML]
+    parse = partial(parsers.parse_page_html, as_markdown=True)
+
+    assert parse_pool.map_parser(parse, pages) == [parse(html) for html in pages]
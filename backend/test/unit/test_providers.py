@@ -0,0 +1,126 @@
+import pytest
+
+from app import openai_service, providers
+from app.config import settings
+from app.security import turnstile
+
+
+@pytest.fixture
+def offline_mode() -> None:
+    """Switch every external backend to its fake, without simulated latency."""
+    names = (
+        "embedding_provider",
+        "chat_provider",
+        "turnstile_provider",
+        "fake_embedding_latency_ms",
+        "fake_chat_latency_ms",
+        "fake_turnstile_latency_ms",
+    )
+    original = {name: getattr(settings, name) for name in names}
+    settings.embedding_provider = "fake"
+    settings.chat_provider = "fake"
+    settings.turnstile_provider = "fake"
+    settings.fake_embedding_latency_ms = 0
+    settings.fake_chat_latency_ms = 0
+    settings.fake_turnstile_latency_ms = 0
+    providers.reset_providers()
+    turnstile._fake_latency = None
+    try:
+        yield
+    finally:
+        for name, value in original.items():
+            setattr(settings, name, value)
+        providers.reset_providers()
+        turnstile._fake_latency = None
+
+
+def test_fake_embeddings_are_deterministic_unit_vectors(offline_mode: None) -> None:
+    """Same text must embed to the same normalized 1536-d vector."""
+    first = openai_service.create_embedding("Who is Batta?")
+    second = openai_service.create_embedding("Who is Batta?")
+    other = openai_service.create_embedding("Who is Oswin?")
+
+    assert first == second
+    assert first != other
+    assert len(first) == providers.EMBEDDING_DIMENSIONS
+    assert sum(v * v for v in first) == pytest.approx(1.0)
+
+
+def test_fake_chat_completion_reports_usage(offline_mode: None) -> None:
+    """The fake chat provider answers offline and reports token usage."""
+    text, usage = openai_service.chat_completion(
+        system_prompt="system", user_message="Who is Batta?", context="ctx"
+    )
+
+    assert "Who is Batta?" in text
+    assert usage is not None
+    assert usage["total_tokens"] == usage["prompt_tokens"] + usage["completion_tokens"]
+
+
+def test_fake_turnstile_accepts_and_rejects(offline_mode: None) -> None:
+    """Tokens starting with 'fail' are rejected; anything else passes."""
+    assert turnstile.verify_turnstile_token("anything", remote_ip=None) == (True, None)
+    ok, error = turnstile.verify_turnstile_token("fail-me", remote_ip=None)
+    assert not ok
+    assert error is not None
+
+
+def test_latency_simulator_is_reproducible() -> None:
+    """Seeded latency draws repeat exactly and respect the fixed distribution."""
+    a = providers.LatencySimulator(100, distribution="lognormal", jitter=0.5, seed=7)
+    b = providers.LatencySimulator(100, distribution="lognormal", jitter=0.5, seed=7)
+    fixed = providers.LatencySimulator(42, distribution="fixed")
+
+    assert [a.sample_ms() for _ in range(5)] == [b.sample_ms() for _ in range(5)]
+    assert fixed.sample_ms() == 42
+
+
+class StubSentenceModel:
+    """Stands in for a SentenceTransformer; records each encode batch."""
+
+    def __init__(self, dimensions: int = 384) -> None:
+        self.dimensions = dimensions
+        self.batches: list[list[str]] = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimensions
+
+    def encode(self, texts: list[str], **kwargs):
+        import numpy as np
+
+        self.batches.append(list(texts))
+        return np.array([[float(len(t)), 1.0, 0.0] for t in texts])
+
+
+def test_local_provider_splits_batches_and_keeps_order() -> None:
+    """Batches run on the provider's pool and vectors come back in input order."""
+    model = StubSentenceModel()
+    provider = providers.LocalEmbeddingProvider(
+        "stub-model", batch_size=2, threads=2, model=model
+    )
+
+    vectors, usage = provider.embed(["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert usage is None
+    assert [v[0] for v in vectors] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert sorted(map(len, model.batches)) == [1, 2, 2]
+
+
+def test_local_provider_rejects_a_model_of_the_wrong_size() -> None:
+    """A model that does not fit embedding_local fails when it loads."""
+    with pytest.raises(ValueError, match="outputs 768 dimensions"):
+        providers.LocalEmbeddingProvider(
+            "stub-model", model=StubSentenceModel(dimensions=768)
+        )
+
+
+def test_embedding_column_follows_provider() -> None:
+    """Local vectors are read from and written to their own column."""
+    original = settings.embedding_provider
+    try:
+        settings.embedding_provider = "local"
+        assert providers.embedding_column_name() == "embedding_local"
+        settings.embedding_provider = "openai"
+        assert providers.embedding_column_name() == "embedding"
+    finally:
+        settings.embedding_provider = original
@@ -0,0 +1,109 @@
+import pytest
+
+from app import metrics, parsers
+
+
+WIKITEXT = """{{Chapterinfobox
+|title=Another Journey
+|boss=[[Batta]] {{Item|Iron Axe}}
+|objective=Defeat boss
+}}
+{{Quote|Hector's line.}}
+'''Another Journey''' is the eleventh chapter of ''[[Fire Emblem: The Blazing Blade]]''.
+
+==Strategy==
+* Send [[Oswin]] to the front.
+{{Clear}}
+The village gives '''2000''' [[Gold|gold]].<ref>Guide, p. 3</ref>
+
+==Units==
+{| class="wikitable"
+| [[Hector]] || [[Lord (class)|Lord]]
+|}
+"""
+
+TRICKY_LINES = [
+    "* [[Matthew]] - Starts as a playable unit.",
+    "'''Bold''' and ''[[Link|italic label]]''",
+    "Level 5 ({{Item|Iron Axe}})",
+    "<ref>Hector's Tale opening cutscene.</ref>",
+    "'''unclosed bold",
+    "{{open template",
+    '{| class="wikitable"',
+    "| [[Hector]] || [[Knight]] || 9",
+    "; term : definition",
+    "[[mailto:someone]] and https://example.com",
+    "'{{Item|Axe}}' single quotes around a template",
+    "&amp; entity &#10; newline",
+]
+
+
+def test_parse_chapter_wikitext_extracts_summary_infobox_and_sections() -> None:
+    """Summary, infobox params and section lines come out of one pass."""
+    result = parsers.parse_chapter_wikitext(WIKITEXT)
+
+    assert result["summary"] == (
+        "Another Journey is the eleventh chapter of Fire Emblem: The Blazing Blade."
+    )
+    assert result["infobox"]["title"] == "Another Journey"
+    assert [f["label"] for f in result["infobox"]["fields"]] == [
+        "Title",
+        "Boss",
+        "Objective",
+    ]
+    assert [s["title"] for s in result["sections"]] == ["Strategy", "Units"]
+    assert result["sections"][0]["content"] == [
+        "Send Oswin to the front.",
+        "The village gives 2000 gold.Guide, p. 3",
+    ]
+
+
+@pytest.fixture
+def ast_cache() -> None:
+    """Start from an empty tree cache and registry."""
+    parsers.clear_wikitext_cache()
+    metrics.reset_metrics()
+    yield
+    parsers.clear_wikitext_cache()
+    metrics.reset_metrics()
+
+
+def test_infobox_comes_from_template_params(ast_cache: None) -> None:
+    """The infobox is read through the template API, not the raw text."""
+    result = parsers.parse_chapter_wikitext(WIKITEXT)
+
+    assert result["summary"] == (
+        "Another Journey is the eleventh chapter of Fire Emblem: The Blazing Blade."
+    )
+    fields = {f["label"]: f["value"] for f in result["infobox"]["fields"]}
+    assert fields["Objective"] == "Defeat boss"
+    assert [s["title"] for s in result["sections"]] == ["Strategy", "Units"]
+    assert result["sections"][0]["content"][0] == "Send Oswin to the front."
+
+
+def test_parsing_reuses_cached_tree(ast_cache: None) -> None:
+    """Parsing the same revision twice builds the tree only once."""
+    first = parsers.parse_chapter_wikitext(WIKITEXT)
+    second = parsers.parse_chapter_wikitext(WIKITEXT)
+
+    assert first == second
+    assert metrics.CACHE_REQUESTS_TOTAL.value(cache="wikitext_ast", result="miss") == 1
+    assert metrics.CACHE_REQUESTS_TOTAL.value(cache="wikitext_ast", result="hit") == 1
+
+
+def test_each_page_is_parsed_once(ast_cache: None, monkeypatch) -> None:
+    """One mwparserfromhell parse per page, whatever markup its lines hold."""
+    wikitext = WIKITEXT + "==Tricky==\n" + "\n".join(TRICKY_LINES) + "\n"
+    parse = parsers.mwparserfromhell.parse
+    calls = []
+
+    def counting_parse(text):
+        calls.append(text)
+        return parse(text)
+
+    monkeypatch.setattr(parsers.mwparserfromhell, "parse", counting_parse)
+    result = parsers.parse_chapter_wikitext(wikitext)
+    assert calls == [wikitext]
+    assert [s["title"] for s in result["sections"]] == ["Strategy", "Units", "Tricky"]
+    # The multi-line table is stripped as a whole
+    assert result["sections"][1]["content"] == ["Hector  Lord"]